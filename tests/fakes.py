@@ -0,0 +1,134 @@
+import fnmatch
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+import redis
+import redis.asyncio
+
+from vector_db_external.vectordb import async_redis
+from vector_db_external.vectordb.async_redis import AsyncRedis
+from vector_db_external.vectordb.redis import Redis, RedisConfig
+
+
+class FakeRedis(redis.Redis):
+    """redis.Redis answering commands without a server.
+
+    GET, MGET, SET, EXISTS, DEL, HSET, HGET and SCAN work on `values`, any other command is answered by
+    `replies`: the reply itself, or a callable taking the command arguments. Replies are
+    returned as is, without the redis-py response callbacks. Every command is recorded
+    in `commands`.
+
+    Args:
+        replies(dict): reply or callable by command name, e.g. {"FT.SEARCH": reply}
+        values(dict): string values by key
+    """
+
+    def __init__(self, replies: Optional[Dict[str, Any]] = None, values: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        self.replies = replies or {}
+        self.values = values or {}
+        self.commands = []
+
+    def execute_command(self, *args, **options):
+        self.commands.append(args)
+        return self.reply(*args)
+
+    def reply(self, command: str, *args: Any) -> Any:
+        if command in self.replies:
+            reply = self.replies[command]
+            return reply(*args) if callable(reply) else reply
+        if command == "GET":
+            return self.values.get(args[0])
+        if command == "MGET":
+            return [self.values.get(key) for key in args]
+        if command == "SET":
+            self.values[args[0]] = args[1]
+            return True
+        if command == "EXISTS":
+            return sum(key in self.values for key in args)
+        if command == "DEL":
+            return sum(self.values.pop(key, None) is not None for key in args)
+        if command == "HSET":
+            fields = self.values.setdefault(args[0], {})
+            for field, value in zip(args[1::2], args[2::2]):
+                fields[field] = bytes(value) if isinstance(value, (bytes, memoryview)) else str(value).encode()
+            return len(args[1:]) // 2
+        if command == "HGET":
+            return self.values.get(args[0], {}).get(args[1])
+        if command == "SCAN":
+            # one pass over every key, as parsed by redis-py: (next cursor, keys)
+            pattern = args[args.index(b"MATCH") + 1] if b"MATCH" in args else "*"
+            return 0, [key for key in self.values if fnmatch.fnmatchcase(key, pattern)]
+        raise NotImplementedError(command)
+
+
+class FakeAsyncRedis(redis.asyncio.Redis):
+    """redis.asyncio.Redis answering commands like `FakeRedis`, pipelines included."""
+
+    def __init__(self, replies: Optional[Dict[str, Any]] = None, values: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        self.replies = replies or {}
+        self.values = values or {}
+        self.commands = []
+
+    reply = FakeRedis.reply
+
+    async def execute_command(self, *args, **options):
+        self.commands.append(args)
+        return self.reply(*args)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> "FakeAsyncPipeline":
+        return FakeAsyncPipeline(self, transaction)
+
+
+class FakeAsyncPipeline(redis.asyncio.client.Pipeline):
+    """Pipeline of a FakeAsyncRedis, queued commands are answered one by one on execute."""
+
+    def __init__(self, conn: FakeAsyncRedis, transaction: bool):
+        super().__init__(conn.connection_pool, conn.response_callbacks, transaction, None)
+        self.conn = conn
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        replies = [await self.conn.execute_command(*args) for args, _ in self.command_stack]
+        await self.reset()
+        return replies
+
+
+class OfflineRedis(Redis):
+    """Redis client built by the real constructor, with `conn` (and `full_precision_conn`) as connection and no index creation."""
+
+    def __init__(self, conn: Optional[redis.Redis] = None, **kwargs: Any):
+        self._fake_conn = conn if conn is not None else FakeRedis()
+        kwargs.setdefault("db_config", RedisConfig(password="", host="localhost", port="6379"))
+        super().__init__(**kwargs)
+
+    def _connect(self) -> None:
+        self.conn = self.full_precision_conn = self._fake_conn
+
+    def _make_index(self) -> None:
+        pass
+
+
+class OfflineAsyncRedis(AsyncRedis):
+    """AsyncRedis client built by the real constructor, with `conn` as connection and an `OfflineRedis` sync client."""
+
+    def __init__(self, conn: Optional[redis.asyncio.Redis] = None, **kwargs: Any):
+        self._fake_conn = conn if conn is not None else FakeAsyncRedis()
+        kwargs.setdefault("db_config", RedisConfig(password="", host="localhost", port="6379"))
+        with mock.patch.object(async_redis, "Redis", OfflineRedis):
+            super().__init__(**kwargs)
+
+    def _connect(self, config: RedisConfig, max_connections: Optional[int]) -> redis.asyncio.Redis:
+        return self._fake_conn
+
+
+def offline_redis(conn: Optional[redis.Redis] = None, database_name: str = "test_db", vector_dimension: int = 2, **kwargs: Any) -> Redis:
+    """Redis client answering from a fake connection, see `FakeRedis`."""
+    return OfflineRedis(conn, database_name=database_name, vector_dimension=vector_dimension, **kwargs)
+
+
+def offline_async_redis(
+    conn: Optional[redis.asyncio.Redis] = None, database_name: str = "test_db", vector_dimension: int = 2, **kwargs: Any
+) -> AsyncRedis:
+    """AsyncRedis client answering from a fake connection, see `FakeAsyncRedis`."""
+    return OfflineAsyncRedis(conn, database_name=database_name, vector_dimension=vector_dimension, **kwargs)
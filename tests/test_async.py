@@ -0,0 +1,296 @@
+import unittest
+import asyncio
+import os
+import shutil
+from unittest import mock
+
+import numpy as np
+import redis.asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from vector_db_external.benchmark.async_runner import AsyncLoadTestRunner
+from vector_db_external.benchmark.runner import DBFactory, LoadTestConfig
+from vector_db_external.benchmark.scenarios import Scenario, SearchScenario, WriteScenario
+from vector_db_external.vectordb import async_chroma
+from vector_db_external.vectordb.async_chroma import AsyncChromaClient
+from vector_db_external.vectordb.chroma import ChromaClient, include_fields
+from vector_db_external.vectordb.quantization import ScalarQuantizer
+from vector_db_external.vectordb.async_redis import AsyncRedis
+from vector_db_external.vectordb.redis import RedisConfig, RedisIndexConfig
+from vector_db_external.vectordb.simulated import AsyncSimulatedVectorDB, ServiceTime, SimulatedConfig
+from vector_db_external.vectordb.vectordb_api import Projection
+
+from tests.fakes import FakeAsyncRedis, offline_async_redis
+
+os.environ["CHROMA_SERVER_HOST"] = "dummy"
+os.environ["CHROMA_SERVER_HTTP_PORT"] = "1"
+
+DATABASE_PATH = "database_async.chroma"
+
+
+def search_reply(*ids):
+    reply = [len(ids)]
+    for i, id in enumerate(ids):
+        reply += [f"test_db:{id}".encode(), [b"text_id", id.encode(), b"distance", str(i / 10).encode(), b"document", f"t{id}".encode()]]
+    return reply
+
+
+class TestAsyncRedis(unittest.TestCase):
+
+    def test_insert_and_get_documents(self):
+        conn = FakeAsyncRedis()
+        client = offline_async_redis(conn)
+
+        async def run():
+            await client.insert_embeddings(
+                ids=["a", "b", "c"], embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], documents=["ta", "tb", "tc"], batch_size=2
+            )
+            return await client.get_documents(["c", "a", "missing"])
+
+        documents = asyncio.run(run())
+
+        self.assertEqual([command[:2] for command in conn.commands[:3]], [("HSET", "test_db:a"), ("HSET", "test_db:b"), ("HSET", "test_db:c")])
+        fields = conn.values["test_db:a"]
+        self.assertEqual(np.frombuffer(fields["vector"], dtype=np.float32).tolist(), [1.0, 0.0])
+        self.assertEqual(documents, ["tc", "ta", None])
+
+        asyncio.run(client.delete_embeddings(["a", "b"]))
+        self.assertEqual(conn.commands[-1], ("DEL", "test_db:a", "test_db:b"))
+        self.assertNotIn("test_db:a", conn.values)
+
+    def test_full_precision_written_first(self):
+        conn = FakeAsyncRedis()
+        client = offline_async_redis(conn, full_precision=True)
+
+        asyncio.run(client.upsert_embeddings(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]]))
+
+        self.assertEqual([command[0] for command in conn.commands], ["SET", "SET", "DEL", "HSET", "DEL", "HSET"])
+        self.assertEqual(np.frombuffer(conn.values["test_db_full:b"], dtype=np.float32).tolist(), [0.0, 1.0])
+
+    def test_int8_quantizer(self):
+        conn = FakeAsyncRedis({"FT.SEARCH": search_reply("a")})
+        client = offline_async_redis(conn, index_config=RedisIndexConfig(vector_type="INT8"))
+
+        asyncio.run(client.insert_embeddings(ids=["a", "b"], embeddings=[[1.0, -2.0], [0.5, 1.0]]))
+        asyncio.run(client.search_embedding([1.0, 0.0], k=1))
+
+        # the scales are fitted, stored and read through the asyncio connection only
+        self.assertEqual(client.sync_client.conn.commands, [])
+        self.assertEqual([command[0] for command in conn.commands], ["GET", "SET", "GET", "HSET", "HSET", "FT.SEARCH"])
+        np.testing.assert_allclose(client.sync_client.quantizer().scale, [1 / 127, 2 / 127])
+        self.assertEqual(np.frombuffer(conn.values["test_db:a"]["vector"], dtype=np.int8).tolist(), [127, -127])
+
+        stale = ScalarQuantizer(np.ones(3)).to_json()
+        other = offline_async_redis(FakeAsyncRedis(values={"test_db_quantizer": stale}), index_config=RedisIndexConfig(vector_type="INT8"))
+        with self.assertRaisesRegex(ValueError, "remove_database"):
+            asyncio.run(other.search_embedding([1.0, 0.0], k=1))
+
+    def test_blocking_pool(self):
+        config = RedisConfig(password="", host="localhost", port="6379", blocking_pool=True, max_connections=8, pool_timeout=1.5)
+
+        conn = AsyncRedis._connect(config, None)
+        pool = conn.connection_pool
+        self.assertIsInstance(pool, redis.asyncio.BlockingConnectionPool)
+        self.assertTrue(conn.auto_close_connection_pool)
+        self.assertEqual((pool.max_connections, pool.timeout), (8, 1.5))
+        self.assertEqual(AsyncRedis._connect(config, 4).connection_pool.max_connections, 4)
+        pool = AsyncRedis._connect(config.model_copy(update={"blocking_pool": False}), None).connection_pool
+        self.assertNotIsInstance(pool, redis.asyncio.BlockingConnectionPool)
+
+    def test_search_embedding(self):
+        conn = FakeAsyncRedis({"FT.SEARCH": search_reply("b", "a")})
+        client = offline_async_redis(conn)
+
+        result = asyncio.run(client.search_embedding([1.0, 0.0], k=2, filters={"key": "value"}))
+
+        command = conn.commands[0]
+        self.assertEqual(command[:2], ("FT.SEARCH", "test_db"))
+        self.assertIn("KNN 2 @vector", command[2])
+        self.assertIn("@metadata:{key\\:value}", command[2])
+        self.assertEqual(result.ids, ["b", "a"])
+        self.assertEqual(result.documents, ["tb", "ta"])
+        self.assertEqual(result.distances, [0.0, 0.1])
+
+    def test_search_embeddings_batch(self):
+        conn = FakeAsyncRedis({"FT.SEARCH": lambda *args: search_reply("a") if "key\\:x" in args[1] else search_reply("b")})
+        client = offline_async_redis(conn)
+
+        results = asyncio.run(
+            client.search_embeddings_batch(np.eye(2), k=1, filters=[{"key": "x"}, {"key": "y"}], projection=Projection.IDS)
+        )
+
+        self.assertEqual([command[0] for command in conn.commands], ["FT.SEARCH", "FT.SEARCH"])
+        self.assertEqual([result.ids for result in results], [["a"], ["b"]])
+
+
+class TestAsyncChromaClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    @classmethod
+    def tearDownClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    def client(self, **kwargs) -> AsyncChromaClient:
+        # the collection is created with a local client, requests go to the fake server
+        def local_client(**kwargs):
+            return ChromaClient(**{**kwargs, "client_mode": "local", "database_path": DATABASE_PATH})
+
+        with mock.patch.object(async_chroma, "ChromaClient", local_client):
+            return AsyncChromaClient(database_name="async_test", vector_dimension=2, **kwargs)
+
+    def serve(self, client: AsyncChromaClient, replies: dict, requests: list, run):
+        """Run `run()` with the client pointed at a server answering `replies` by path and recording `requests`."""
+
+        async def handle(request: web.Request) -> web.Response:
+            requests.append((request.match_info["path"], await request.json()))
+            return web.json_response(replies.get(request.match_info["path"], True))
+
+        async def main():
+            app = web.Application()
+            app.router.add_post(f"/api/v1/collections/{client.collection_id}/{{path}}", handle)
+            async with TestServer(app) as server:
+                client._url = str(server.make_url(f"/api/v1/collections/{client.collection_id}"))
+                try:
+                    return await run()
+                finally:
+                    await client.close()
+
+        return asyncio.run(main())
+
+    def test_add(self):
+        client = self.client(insert_batch_size=2)
+        requests = []
+
+        self.serve(
+            client,
+            {},
+            requests,
+            lambda: client.insert_embeddings(
+                ids=["a", "b", "c"],
+                embeddings=np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]),
+                documents=["ta", "tb", "tc"],
+                metadata=[{"key": "x"}, {"key": "y"}, {"key": "z"}],
+            ),
+        )
+
+        self.assertEqual([path for path, _ in requests], ["add", "add"])
+        bodies = sorted((body for _, body in requests), key=lambda body: body["ids"])
+        self.assertEqual(bodies[0]["ids"], ["a", "b"])
+        self.assertEqual(bodies[0]["embeddings"], [[1.0, 0.0], [0.0, 1.0]])
+        self.assertEqual(bodies[0]["documents"], ["ta", "tb"])
+        self.assertEqual(bodies[1]["metadatas"], [{"key": "z"}])
+
+    def test_query(self):
+        client = self.client()
+        requests = []
+        query_reply = {
+            "ids": [["b", "a"], ["c"]],
+            "distances": [[0.1, 0.2], [0.3]],
+            "documents": [["tb", "ta"], ["tc"]],
+            "metadatas": [[{}, {}], [{}]],
+            "embeddings": None,
+        }
+
+        results = self.serve(
+            client,
+            {"query": query_reply},
+            requests,
+            lambda: client.search_embeddings_batch([[1.0, 0.0], [0.0, 1.0]], k=2, filters={"key": "x"}),
+        )
+
+        self.assertEqual(len(requests), 1)
+        path, body = requests[0]
+        self.assertEqual(path, "query")
+        self.assertEqual(body["query_embeddings"], [[1.0, 0.0], [0.0, 1.0]])
+        self.assertEqual(body["n_results"], 2)
+        self.assertEqual(body["where"], {"key": "x"})
+        self.assertEqual(body["include"], include_fields(Projection.DOCUMENTS))
+        self.assertEqual([result.ids for result in results], [["b", "a"], ["c"]])
+        self.assertEqual(results[0].documents, ["tb", "ta"])
+
+    def test_wait_for_indexed(self):
+        client = self.client()
+        counts = [1, 2, 3]
+
+        async def count(request: web.Request) -> web.Response:
+            return web.json_response(counts.pop(0) if len(counts) > 1 else counts[0])
+
+        async def main(**kwargs):
+            app = web.Application()
+            app.router.add_get(f"/api/v1/collections/{client.collection_id}/count", count)
+            async with TestServer(app) as server:
+                client._url = str(server.make_url(f"/api/v1/collections/{client.collection_id}"))
+                try:
+                    await client.wait_for_indexed(poll_interval=0.01, **kwargs)
+                finally:
+                    await client.close()
+
+        asyncio.run(main())
+        self.assertEqual(counts, [1, 2, 3])
+        asyncio.run(main(min_documents=3))
+        self.assertEqual(counts, [3])
+        with self.assertRaisesRegex(TimeoutError, "holds 3 of 5 documents"):
+            asyncio.run(main(min_documents=5, timeout=0.05))
+
+    def test_error_status(self):
+        client = self.client()
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(status=500, text="boom")
+
+        async def main():
+            app = web.Application()
+            app.router.add_post(f"/api/v1/collections/{client.collection_id}/query", handle)
+            async with TestServer(app) as server:
+                client._url = str(server.make_url(f"/api/v1/collections/{client.collection_id}"))
+                try:
+                    await client.search_embedding([1.0, 0.0], k=1)
+                finally:
+                    await client.close()
+
+        with self.assertRaisesRegex(RuntimeError, "status 500"):
+            asyncio.run(main())
+
+
+class SyncOnlyScenario(Scenario):
+    name = "sync_only"
+
+    def run(self, db, worker_id, seq):
+        return None
+
+
+class TestAsyncLoadTestRunner(unittest.TestCase):
+
+    def test_run(self):
+        config = SimulatedConfig(search_time=ServiceTime(median_ms=1.0, sigma=0.0), insert_time=ServiceTime(median_ms=1.0, sigma=0.0))
+        factory = DBFactory(AsyncSimulatedVectorDB, vector_dimension=2, db_config=config)
+        runner_config = LoadTestConfig(concurrency_steps=[1, 8], processes=2, step_duration=0.3, warmup_duration=0.05)
+        scenarios = [SearchScenario(np.eye(2), k=3), WriteScenario(vector_dimension=2), SyncOnlyScenario()]
+
+        report = AsyncLoadTestRunner(factory, runner_config).run(scenarios)
+
+        self.assertEqual(
+            [(step.scenario, step.concurrency) for step in report.steps],
+            [("search", 1), ("search", 8), ("write", 1), ("write", 8), ("sync_only", 1), ("sync_only", 8)],
+        )
+        for step in report.steps[:4]:
+            self.assertGreater(step.summary.count, 0)
+            self.assertEqual(step.summary.errors, 0)
+        # scenarios without run_async fail every call
+        for step in report.steps[4:]:
+            self.assertEqual(step.summary.count, 0)
+            self.assertGreater(step.summary.errors, 0)
+
+    def test_run_async_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            asyncio.run(SyncOnlyScenario().run_async(AsyncSimulatedVectorDB(), 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
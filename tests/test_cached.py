@@ -0,0 +1,141 @@
+import unittest
+
+import numpy as np
+
+from vector_db_external.vectordb.cached import ENTRY_OVERHEAD_BYTES, CachedVectorDB, query_key, result_size
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+from vector_db_external.vectordb.search_result import CompactSearchResult
+
+
+class CountingNumpyVectorDB(NumpyVectorDB):
+    """NumpyVectorDB counting the queries that reach it."""
+
+    searched = 0
+
+    def search_embeddings_batch(self, queries, k=10, filters=None, **kwargs):
+        self.searched += len(queries)
+        return super().search_embeddings_batch(queries, k=k, filters=filters, **kwargs)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCachedVectorDB(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.client = CachedVectorDB(
+            db_class=CountingNumpyVectorDB, database_name="test_cache", vector_dimension=3, drop_old=True, clock=self.clock
+        )
+        ids = ["doc1", "doc2", "doc3"]
+        embeddings = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [3.0, 5.0, 6.0]]
+        metadata = [{"key": "value"}, {"key": "value"}, {"key": "val"}]
+        self.client.insert_embeddings(ids=ids, embeddings=embeddings, documents=["text1", "text2", "text3"], metadata=metadata)
+
+    def test_repeated_search_is_cached(self):
+        first = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=2)
+        second = self.client.search_embedding(query=np.array([1.0, 2.0, 3.0]), k=2)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.client.db.searched, 1)
+        stats = self.client.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+        self.assertEqual(stats.hit_ratio, 0.5)
+
+    def test_key_includes_k_and_filters(self):
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=2)
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=3)
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=2, filters={"key": "val"})
+
+        self.assertEqual(self.client.stats().misses, 3)
+        self.assertEqual(query_key([1.0, 2.0], 2, {"a": "x", "b": "y"}), query_key([1.0, 2.0], 2, {"b": "y", "a": "x"}))
+        self.assertNotEqual(query_key([1.0, 2.0], 2, None), query_key([1.0, 2.0], 2, None, ef_runtime=10))
+
+    def test_insert_invalidates(self):
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+        self.client.insert_embeddings(ids=["doc4"], embeddings=[[1.0, 2.0, 3.1]])
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.1], k=1)
+
+        self.assertEqual(result.ids, ["doc4"])
+        stats = self.client.stats()
+        self.assertEqual((stats.hits, stats.invalidations), (0, 2))
+
+    def test_upsert_and_delete_invalidate(self):
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+        self.client.upsert_embeddings(ids=["doc2"], embeddings=[[1.0, 2.0, 3.0]])
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+        self.client.delete_embeddings(["doc1", "doc2"])
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+
+        self.assertEqual(result.ids, ["doc3"])
+        stats = self.client.stats()
+        self.assertEqual((stats.hits, stats.invalidations), (0, 3))
+
+    def test_wait_for_indexed_invalidates(self):
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+        self.client.wait_for_indexed()
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+
+        self.assertEqual(self.client.db.searched, 2)
+
+    def test_ttl(self):
+        self.client.ttl = 10
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+        self.clock.now = 5
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+        self.clock.now = 11
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+
+        stats = self.client.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.expirations), (1, 2, 1))
+
+    def test_lru_eviction(self):
+        self.client.max_entries = 2
+        for query in ([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 1.0, 0.0]):
+            self.client.search_embedding(query=query, k=1)
+
+        stats = self.client.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.evictions, stats.entries), (1, 4, 2, 2))
+
+    def test_memory_budget(self):
+        self.client.search_embedding(query=[1.0, 0.0, 0.0], k=3)
+        entry_bytes = self.client.stats().bytes
+        self.client.max_bytes = int(entry_bytes * 1.5)
+        self.client.search_embedding(query=[0.0, 1.0, 0.0], k=3)
+
+        stats = self.client.stats()
+        self.assertEqual((stats.entries, stats.evictions, stats.bytes), (1, 1, entry_bytes))
+
+    def test_batch_only_sends_misses(self):
+        self.client.search_embedding(query=[1.0, 2.0, 3.0], k=2)
+        results = self.client.search_embeddings_batch([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]], k=2, filters=[None, {"key": "value"}])
+
+        self.assertEqual(self.client.db.searched, 2)
+        self.assertEqual(results[0].ids, ["doc1", "doc3"])
+        self.assertEqual(results[1].ids, ["doc2", "doc1"])
+        self.assertIs(self.client.search_embedding(query=[4.0, 5.0, 6.0], k=2, filters={"key": "value"}), results[1])
+
+    def test_compact_result_size(self):
+        def decode(raw):
+            raise AssertionError("sizing a result must not decode it")
+
+        result = CompactSearchResult(
+            ids=["doc1"],
+            distances=np.array([0.5], dtype=np.float32),
+            documents=[b"compressed"],
+            metadatas=[{"metadata_key": b"value"}],
+            decode_document=decode,
+            decode_metadata=decode,
+        )
+
+        self.assertEqual(result_size(result), ENTRY_OVERHEAD_BYTES + len("doc1") + len(b"compressed") + len("metadata_key") + len(b"value") + 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
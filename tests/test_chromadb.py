@@ -1,7 +1,10 @@
 import unittest
 import os
 import shutil
-from vector_db_external.vectordb.chroma import ChromaClient
+
+import numpy as np
+from vector_db_external.vectordb.chroma import ChromaClient, ChromaIndexConfig
+from vector_db_external.vectordb.vectordb_api import MetricType, Projection
 
 os.environ["CHROMA_SERVER_HOST"] = "dummy"
 os.environ["CHROMA_SERVER_HTTP_PORT"] = "1"
@@ -118,5 +121,116 @@ class TestChromaClient(unittest.TestCase):
         self.assertEqual(result.ids[0], "doc4")
         self.assertEqual(result.documents[0], None)
 
+    def test_search_embeddings_batch(self):
+        client = ChromaClient(client_mode="local", database_path="database.chroma")
+
+        # Mock data
+        queries = [[1.0, 2.0, 3.0], [700.0, 800.0, 300.0]]
+        k = 1
+
+        # Call search_embeddings_batch
+        results = client.search_embeddings_batch(queries=queries, k=k)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0].ids, ["doc1"])
+        self.assertEqual(results[1].ids, ["doc4"])
+
+    def test_search_embeddings_batch_with_filter_per_query(self):
+        client = ChromaClient(client_mode="local", database_path="database.chroma")
+
+        # Mock data
+        queries = [[1.0, 2.0, 3.0], [1.0, 2.0, 3.0], [1.0, 2.0, 3.0]]
+        filters = [{"key": "val"}, None, {"key": "val"}]
+
+        # Call search_embeddings_batch
+        results = client.search_embeddings_batch(queries=queries, k=1, filters=filters)
+
+        self.assertEqual([result.ids for result in results], [["doc3"], ["doc1"], ["doc3"]])
+
+    def test_search_embedding_projection(self):
+        client = ChromaClient(client_mode="local", database_path="database.chroma")
+
+        result = client.search_embedding(query=[1.0, 2.0, 3.0], k=2, projection=Projection.IDS)
+
+        self.assertEqual(result.ids, ["doc1", "doc3"])
+        self.assertEqual(result.distances[0], 0.0)
+        self.assertIsNone(result.documents)
+        self.assertIsNone(result.metadatas)
+        self.assertEqual(client.get_documents(["doc3", "missing", "doc1"]), ["", None, "text1"])
+
+        result = client.search_embedding(query=[1.0, 2.0, 3.0], k=1, projection=Projection.EMBEDDINGS)
+        self.assertEqual(result.embeddings, [[1.0, 2.0, 3.0]])
+        self.assertEqual(result.documents, ["text1"])
+
+    def test_search_embedding_compact_results(self):
+        client = ChromaClient(client_mode="local", database_path="database.chroma", compact_results=True)
+
+        result = client.search_embedding(query=[1.0, 2.0, 3.0], k=2, filters={"key": "value"})
+
+        self.assertEqual(result.ids, ["doc1", "doc2"])
+        self.assertEqual(result.distances.dtype, np.float32)
+        self.assertEqual(result.distances[0], 0.0)
+        self.assertEqual(result.metadatas, [{"key": "value"}, {"key": "value"}])
+        self.assertEqual(result.to_model().documents, ["text1", "text2"])
+
+
+class TestChromaIndexConfig(unittest.TestCase):
+
+    @classmethod
+    def tearDownClass(self):
+        if os.path.exists("database_index.chroma"):
+            shutil.rmtree("database_index.chroma")
+
+    def test_collection_metadata(self):
+        config = ChromaIndexConfig(metric_type=MetricType.IP, m=32, search_ef=64)
+        self.assertEqual(config.collection_metadata(), {"hnsw:space": "ip", "hnsw:M": 32, "hnsw:search_ef": 64})
+        self.assertEqual(ChromaIndexConfig().collection_metadata(), {})
+
+    def test_chunked_parallel_insert(self):
+        index_config = ChromaIndexConfig(metric_type=MetricType.COSINE, construction_ef=50)
+        client = ChromaClient(
+            database_name="tuned_store",
+            client_mode="local",
+            database_path="database_index.chroma",
+            drop_old=True,
+            index_config=index_config,
+            insert_batch_size=7,
+            insert_workers=4,
+        )
+        self.assertEqual(client.collection.metadata, index_config.collection_metadata())
+
+        embeddings = np.random.default_rng(0).random((50, 3), dtype=np.float32)
+        client.insert_embeddings(ids=[f"doc{i}" for i in range(50)], embeddings=embeddings)
+
+        self.assertEqual(client.collection.count(), 50)
+        result = client.search_embedding(query=embeddings[10].tolist(), k=1, projection=Projection.IDS)
+        self.assertEqual(result.ids, ["doc10"])
+
+        # an existing collection keeps its parameters
+        reopened = ChromaClient(
+            database_name="tuned_store",
+            client_mode="local",
+            database_path="database_index.chroma",
+            index_config=ChromaIndexConfig(m=8),
+        )
+        self.assertEqual(reopened.collection.metadata, index_config.collection_metadata())
+        self.assertEqual(reopened.collection.count(), 50)
+
+    def test_upsert_and_delete(self):
+        client = ChromaClient(
+            database_name="upsert_store", client_mode="local", database_path="database_index.chroma", drop_old=True
+        )
+        client.insert_embeddings(ids=["doc1", "doc2"], embeddings=[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]], documents=["a", "b"])
+
+        client.upsert_embeddings(
+            ids=["doc2", "doc3"], embeddings=[[1.0, 2.0, 3.0], [7.0, 8.0, 9.0]], documents=["b2", "c"], batch_size=1
+        )
+        client.delete_embeddings(["doc1", "missing"])
+
+        self.assertEqual(client.collection.count(), 2)
+        self.assertEqual(client.get_documents(["doc1", "doc2", "doc3"]), [None, "b2", "c"])
+        self.assertEqual(client.search_embedding(query=[1.0, 2.0, 3.0], k=1).ids, ["doc2"])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import os
+import pickle
+import shutil
+
+import numpy as np
+from redis.commands.search.document import Document
+
+from vector_db_external.benchmark.compression import CompressionBenchmark, _sent_bytes
+from vector_db_external.vectordb.chroma import ChromaClient
+from vector_db_external.vectordb.codec import DocumentCodec
+
+from tests.fakes import offline_redis
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+os.environ["CHROMA_SERVER_HOST"] = "dummy"
+os.environ["CHROMA_SERVER_HTTP_PORT"] = "1"
+
+DATABASE_PATH = "database_codec.chroma"
+
+WORDS = "the river city was founded in by national university season album village county first".split()
+
+
+def articles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(WORDS, size=int(rng.integers(20, 60)))) for _ in range(n)]
+
+
+class TestDocumentCodec(unittest.TestCase):
+
+    def test_zlib_round_trip(self):
+        codec = DocumentCodec("zlib", level=6)
+        document = "café " * 100
+
+        compressed = codec.compress(document)
+        self.assertLess(len(compressed), len(document))
+        self.assertEqual(codec.decompress(compressed), document)
+        self.assertEqual(codec.decompress_text(codec.compress_text(document)), document)
+        self.assertIsNone(codec.decompress(None))
+
+        stats = codec.stats()
+        self.assertEqual((stats.documents, stats.raw_bytes), (2, 2 * len(document.encode())))
+        self.assertGreater(stats.ratio, 10)
+
+    def test_dictionary(self):
+        samples = articles(200)
+        documents = articles(50, seed=1)
+        plain = DocumentCodec("zlib")
+        trained = DocumentCodec.train(samples, "zlib")
+
+        self.assertGreater(len(trained.dictionary), 0)
+        self.assertLess(sum(map(trained.compressed_size, documents)), 0.8 * sum(map(plain.compressed_size, documents)))
+        self.assertEqual(trained.stats().documents, 0)
+
+        restored = DocumentCodec.from_json(trained.to_json())
+        self.assertEqual(restored.decompress(trained.compress(documents[0])), documents[0])
+        copy = pickle.loads(pickle.dumps(trained))
+        self.assertEqual(copy.decompress(trained.compress(documents[0])), documents[0])
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        codec = DocumentCodec.train(articles(500), "zstd", dict_size=4096)
+        document = articles(1, seed=2)[0]
+        self.assertEqual(codec.decompress(codec.compress(document)), document)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            DocumentCodec("lz4")
+
+
+class TestRedisDocumentCodec(unittest.TestCase):
+
+    def setUp(self):
+        # hashes, queries and results are built without a connection
+        self.codec = DocumentCodec("zlib")
+        self.client = offline_redis(document_codec=self.codec)
+
+    def test_hash_mapping(self):
+        mapping = self.client._hash_mapping(0, ["doc1"], b"vector", ["text " * 50])
+        self.assertEqual(self.codec.decompress(mapping["document"]), "text " * 50)
+
+    def test_search(self):
+        query, _ = self.client._search_query([1.0, 2.0, 3.0], k=5)
+        self.assertEqual(query._return_fields[-1], "document")
+        self.assertIsNone(query._return_fields_decode_as["document"])
+
+        compressed = self.codec.compress("text1")
+        result = self.client._parse_compact_result([1, b"test_db:doc1", [b"text_id", b"doc1", b"distance", b"0.5", b"document", compressed]])
+        self.assertIsNone(result._documents)
+        self.assertEqual(result.documents, ["text1"])
+        self.assertEqual(result.received_documents, [compressed])
+        self.assertEqual(_sent_bytes(self.client, result), len(compressed))
+
+        result = self.client._parse_search_result([Document("test_db:doc1", text_id="doc1", distance="0.5", document=compressed)])
+        self.assertEqual(result.documents, ["text1"])
+
+
+class TestChromaDocumentCodec(unittest.TestCase):
+
+    @classmethod
+    def tearDownClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    def test_compressed_collection(self):
+        documents = articles(100)
+        embeddings = np.random.default_rng(0).random((100, 4), dtype=np.float32)
+        ids = [f"doc{i}" for i in range(100)]
+        raw = ChromaClient(database_name="raw", client_mode="local", database_path=DATABASE_PATH, drop_old=True)
+        raw.insert_embeddings(ids=ids, embeddings=embeddings, documents=documents)
+        codec = DocumentCodec.train(documents, "zlib")
+        compressed = ChromaClient(
+            database_name="compressed", client_mode="local", database_path=DATABASE_PATH, drop_old=True, document_codec=codec
+        )
+        compressed.insert_embeddings(ids=ids, embeddings=embeddings, documents=documents)
+
+        stored = compressed.collection.get(ids=["doc0"], include=["documents"])["documents"][0]
+        self.assertEqual(codec.decompress_text(stored), documents[0])
+        self.assertEqual(compressed.get_documents(["doc3", "missing"]), [documents[3], None])
+        result = compressed.search_embedding(embeddings[5].tolist(), k=2)
+        self.assertEqual(result.documents[0], documents[5])
+        compressed.compact_results = True
+        self.assertEqual(compressed.search_embedding(embeddings[5].tolist(), k=2).documents[0], documents[5])
+
+        report = CompressionBenchmark(embeddings[:10], k=5, warmup_queries=2).run({"raw": raw, "zlib": compressed})
+
+        self.assertEqual(report.results[0].compression_ratio, 1.0)
+        self.assertGreater(report.results[1].compression_ratio, 2.0)
+        self.assertGreater(report.results[1].bytes_saved_per_query, 0)
+        self.assertIn("zlib", report.table())
+
+        # Chroma sends the base64 text, counted the same way with decoded results
+        result = compressed.search_embedding(embeddings[0].tolist(), k=5)
+        expected = sum(len(codec.compress_text(d)) for d in result.documents)
+        stats = codec.stats()
+        self.assertEqual(_sent_bytes(compressed, result), expected)
+        compressed.compact_results = False
+        again = CompressionBenchmark(embeddings[:10], k=5, warmup_queries=2).run({"zlib": compressed})
+        self.assertEqual(again.results[0].document_bytes_per_query, report.results[1].document_bytes_per_query)
+        # sizing the decoded documents does not count them as compressed again
+        self.assertEqual(codec.stats(), stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
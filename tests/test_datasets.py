@@ -0,0 +1,101 @@
+import unittest
+import csv
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+from vector_db_external.benchmark.datasets import MemmapDataset, convert_records, read_csv
+
+DATASET_PATH = "dataset_test"
+
+
+class TestMemmapDataset(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATASET_PATH):
+            shutil.rmtree(DATASET_PATH)
+
+        os.makedirs(DATASET_PATH)
+        self.embeddings = np.random.default_rng(0).random((25, 4), dtype=np.float32)
+        with open(os.path.join(DATASET_PATH, "source.csv"), "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "text", "content_vector", "metadata"])
+            writer.writeheader()
+            for i, embedding in enumerate(self.embeddings):
+                writer.writerow(
+                    {
+                        "id": f"doc{i}",
+                        "text": f"article, number {i} é",
+                        "content_vector": json.dumps(embedding.tolist()),
+                        "metadata": json.dumps({"a": f"keyword_{i % 3 + 1}", "b": f"keyword_{i % 2 + 1}"}),
+                    }
+                )
+
+        records = read_csv(
+            os.path.join(DATASET_PATH, "source.csv"),
+            embedding_field="content_vector",
+            document_field="text",
+            metadata_field="metadata",
+        )
+        convert_records(records, os.path.join(DATASET_PATH, "converted"))
+
+    @classmethod
+    def tearDownClass(self):
+        if os.path.exists(DATASET_PATH):
+            shutil.rmtree(DATASET_PATH)
+
+    def test_batches(self):
+        dataset = MemmapDataset(os.path.join(DATASET_PATH, "converted"))
+
+        batches = list(dataset.batches(10))
+
+        self.assertEqual(len(dataset), 25)
+        self.assertEqual(dataset.vector_dimension, 4)
+        self.assertEqual([len(batch["ids"]) for batch in batches], [10, 10, 5])
+        self.assertEqual(batches[1]["ids"][0], "doc10")
+        self.assertEqual(batches[2]["documents"][-1], "article, number 24 é")
+        self.assertEqual(batches[0]["metadata"][4], {"a": "keyword_2", "b": "keyword_1"})
+        np.testing.assert_array_equal(np.concatenate([batch["embeddings"] for batch in batches]), self.embeddings)
+
+    def test_embeddings_are_memory_mapped(self):
+        dataset = MemmapDataset(os.path.join(DATASET_PATH, "converted"))
+
+        batch = dataset.batch(5, 10)
+
+        self.assertIsInstance(batch["embeddings"], np.memmap)
+        self.assertEqual(batch["embeddings"].dtype, np.float32)
+
+    def test_metadata_column(self):
+        dataset = MemmapDataset(os.path.join(DATASET_PATH, "converted"))
+
+        codes, values = dataset.metadata_column("a")
+
+        self.assertEqual([values[code] for code in codes[:4]], ["keyword_1", "keyword_2", "keyword_3", "keyword_1"])
+
+    def test_pickle_reopens_by_path(self):
+        dataset = MemmapDataset(os.path.join(DATASET_PATH, "converted"))
+
+        data = pickle.dumps(dataset)
+        copy = pickle.loads(data)
+
+        self.assertLess(len(data), 1000)
+        self.assertEqual(copy.batch(0, 2)["ids"], ["doc0", "doc1"])
+
+    def test_missing_metadata_and_documents(self):
+        records = [
+            {"id": "x", "embedding": [1.0, 2.0]},
+            {"id": "y", "embedding": [3.0, 4.0], "metadata": {"a": 1}},
+        ]
+
+        dataset = convert_records(records, os.path.join(DATASET_PATH, "sparse"))
+
+        batch = dataset.batch(0, 2)
+        self.assertIsNone(batch["documents"])
+        self.assertEqual(batch["metadata"], [{}, {"a": 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
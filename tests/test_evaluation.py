@@ -0,0 +1,94 @@
+import unittest
+import os
+import shutil
+from unittest import mock
+
+import numpy as np
+
+from vector_db_external.benchmark.datasets import convert_records
+from vector_db_external.benchmark.evaluation import RetrievalEvaluator, quality_table, score
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+from vector_db_external.vectordb.vectordb_api import MetricType
+
+DATASET_PATH = "dataset_evaluation_test"
+CACHE_PATH = os.path.join(DATASET_PATH, "ground_truth")
+
+
+class TestRetrievalEvaluator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATASET_PATH):
+            shutil.rmtree(DATASET_PATH)
+
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.standard_normal((300, 8)).astype(np.float32)
+        records = [
+            {"id": f"doc{i}", "embedding": embedding, "metadata": {"a": f"keyword_{i % 10 + 1}"}}
+            for i, embedding in enumerate(self.embeddings)
+        ]
+        self.dataset = convert_records(records, os.path.join(DATASET_PATH, "data"))
+        self.queries = rng.standard_normal((20, 8)).astype(np.float32)
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(DATASET_PATH)
+
+    def setUp(self):
+        if os.path.exists(CACHE_PATH):
+            shutil.rmtree(CACHE_PATH)
+
+    def test_ground_truth_matches_exact_search(self):
+        for metric_type in MetricType:
+            db = NumpyVectorDB(database_name="evaluation", vector_dimension=8, drop_old=True, metric_type=metric_type)
+            db.load_dataset(self.dataset)
+            evaluator = RetrievalEvaluator(self.dataset, metric_type=metric_type, cache_dir=None, chunk_rows=64)
+
+            for filters in (None, {"a": "keyword_3"}):
+                expected = [result.ids for result in db.search_embeddings_batch(self.queries, k=5, filters=filters)]
+                self.assertEqual(evaluator.ground_truth(self.queries, k=5, filters=filters), expected)
+
+    def test_exact_database_has_perfect_scores(self):
+        db = NumpyVectorDB(database_name="evaluation", vector_dimension=8, drop_old=True)
+        db.load_dataset(self.dataset)
+        evaluator = RetrievalEvaluator(self.dataset, cache_dir=CACHE_PATH, chunk_rows=64)
+
+        reports = evaluator.evaluate_all(db, self.queries, k=10, filter_sets={"filtered_search": {"a": "keyword_1"}})
+
+        self.assertEqual([r.name for r in reports], ["search", "filtered_search"])
+        for report in reports:
+            self.assertEqual((report.recall, report.precision, report.f1), (1.0, 1.0, 1.0))
+        self.assertIn("filtered_search", quality_table(reports))
+
+    def test_filter_without_matches(self):
+        db = NumpyVectorDB(database_name="evaluation", vector_dimension=8, drop_old=True)
+        db.load_dataset(self.dataset)
+        evaluator = RetrievalEvaluator(self.dataset, cache_dir=None)
+
+        self.assertEqual(evaluator.ground_truth(self.queries[:2], k=3, filters={"a": "missing"}), [[], []])
+        report = evaluator.evaluate(db, self.queries[:2], k=3, filters={"a": "missing"}, batch=True)
+        self.assertEqual(report.recall, 1.0)
+
+    def test_ground_truth_is_cached(self):
+        evaluator = RetrievalEvaluator(self.dataset, cache_dir=CACHE_PATH)
+        expected = evaluator.ground_truth(self.queries, k=4, filters={"a": "keyword_2"})
+        self.assertEqual(len(os.listdir(CACHE_PATH)), 1)
+
+        with mock.patch.object(evaluator, "exact_neighbours") as exact_neighbours:
+            self.assertEqual(evaluator.ground_truth(self.queries, k=4, filters={"a": "keyword_2"}), expected)
+            exact_neighbours.assert_not_called()
+
+        evaluator.ground_truth(self.queries, k=5, filters={"a": "keyword_2"})
+        evaluator.ground_truth(self.queries, k=4)
+        self.assertEqual(len(os.listdir(CACHE_PATH)), 3)
+
+    def test_score(self):
+        report = score([["a", "b", "x", "y"], ["c"]], [["a", "b", "c", "d"], ["c", "d"]], k=4)
+
+        self.assertAlmostEqual(report.recall, (0.5 + 0.5) / 2)
+        self.assertAlmostEqual(report.precision, (0.5 + 1.0) / 2)
+        self.assertAlmostEqual(report.f1, (0.5 + 2 / 3) / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from vector_db_external.benchmark.index_build import IndexBuildBenchmark
+from vector_db_external.benchmark.ingest import BulkLoadConfig
+from vector_db_external.benchmark.runner import DBFactory
+from vector_db_external.vectordb.chroma import ChromaClient
+
+from tests.fakes import FakeRedis, offline_redis
+
+os.environ["CHROMA_SERVER_HOST"] = "dummy"
+os.environ["CHROMA_SERVER_HTTP_PORT"] = "1"
+
+DATABASE_PATH = "database_index_build.chroma"
+
+
+def indexing(states):
+    """FT.INFO replies going through (num_docs, percent_indexed, indexing) states, the last one repeating."""
+    replies = iter(states)
+    last = [states[-1]]
+
+    def ft_info(index_name):
+        num_docs, percent_indexed, in_progress = last[0] = next(replies, last[0])
+        return [b"num_docs", str(num_docs).encode(), b"percent_indexed", str(percent_indexed).encode(), b"indexing", str(in_progress).encode()]
+
+    return FakeRedis({"FT.INFO": ft_info})
+
+
+class TestWaitForIndexed(unittest.TestCase):
+
+    def test_redis(self):
+        conn = indexing([(10, 0.2, 1), (50, 0.7, 1), (100, 1, 0)])
+        offline_redis(conn).wait_for_indexed(timeout=5, poll_interval=0.001)
+        self.assertEqual(len(conn.commands), 3)
+
+    def test_redis_min_documents(self):
+        conn = indexing([(10, 1, 0), (50, 1, 0), (100, 1, 0)])
+        offline_redis(conn).wait_for_indexed(timeout=5, min_documents=100, poll_interval=0.001)
+        self.assertEqual(len(conn.commands), 3)
+
+    def test_redis_timeout(self):
+        with self.assertRaises(TimeoutError):
+            offline_redis(indexing([(10, 0.5, 1)])).wait_for_indexed(timeout=0.05, poll_interval=0.001)
+
+
+class TestIndexBuildBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    @classmethod
+    def tearDownClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    def test_chroma(self):
+        n = 1000
+        embeddings = np.random.default_rng(0).random((n, 8), dtype=np.float32)
+        ids = [f"doc{i}" for i in range(n)]
+        ChromaClient(database_name="build", client_mode="local", database_path=DATABASE_PATH, drop_old=True)
+        factory = DBFactory(ChromaClient, database_name="build", client_mode="local", database_path=DATABASE_PATH)
+
+        report = IndexBuildBenchmark(BulkLoadConfig(workers=2, chunk_size=100)).run({"chroma": factory}, ids, embeddings)
+
+        result = report.results[0]
+        self.assertEqual(result.vectors, n)
+        self.assertTrue(result.probe_found)
+        self.assertAlmostEqual(result.searchable_seconds, result.insert_seconds + result.indexing_seconds)
+        self.assertGreater(result.build_rate, 0)
+        self.assertLessEqual(result.build_rate, result.insert_rate)
+        self.assertIn("chroma", report.table())
+
+        client = factory()
+        client.wait_for_indexed(min_documents=n)
+        with self.assertRaises(TimeoutError):
+            client.wait_for_indexed(timeout=0.05, min_documents=n + 1, poll_interval=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import shutil
+import signal
+
+import numpy as np
+
+from vector_db_external.vectordb.chroma import ChromaClient
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+from vector_db_external.benchmark.ingest import BulkLoadConfig, BulkLoader, rechunk
+from vector_db_external.benchmark.runner import DBFactory
+
+os.environ["CHROMA_SERVER_HOST"] = "dummy"
+os.environ["CHROMA_SERVER_HTTP_PORT"] = "1"
+
+DATABASE_PATH = "database_ingest.chroma"
+
+
+class KilledVectorDB(NumpyVectorDB):
+    """Worker processes killed by the OOM killer halfway through the load, so the producer finds the queue full."""
+
+    def insert_embeddings(self, ids, embeddings, *args, **kwargs):
+        if int(ids[0][3:]) >= 500:
+            os.kill(os.getpid(), signal.SIGKILL)
+        super().insert_embeddings(ids, embeddings, *args, **kwargs)
+
+
+class TestBulkLoader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    @classmethod
+    def tearDownClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    def test_rechunk(self):
+        batch = dict(ids=[str(i) for i in range(5)], embeddings=np.zeros((5, 2)), documents=None, metadata=None)
+
+        chunks = list(rechunk([batch], 2))
+
+        self.assertEqual([chunk["ids"] for chunk in chunks], [["0", "1"], ["2", "3"], ["4"]])
+        self.assertEqual([len(chunk["embeddings"]) for chunk in chunks], [2, 2, 1])
+        self.assertIsNone(chunks[0]["documents"])
+
+    def test_load_with_threads(self):
+        n = 2500
+        embeddings = np.random.default_rng(0).random((n, 8), dtype=np.float32)
+        ids = [f"doc{i}" for i in range(n)]
+        documents = [f"text {i}" for i in range(n)]
+        factory = DBFactory(ChromaClient, client_mode="local", database_path=DATABASE_PATH, vector_dimension=8)
+        config = BulkLoadConfig(workers=4, chunk_size=100, report_interval=0.1)
+
+        report = BulkLoader(factory, config).load(ids=ids, embeddings=embeddings.tolist(), documents=documents)
+
+        self.assertEqual(report.vectors, n)
+        self.assertEqual(report.errors, 0)
+        self.assertEqual(report.bytes, embeddings.nbytes + sum(len(d) for d in documents))
+        self.assertEqual(sum(sample.vectors for sample in report.timeline), n)
+        self.assertGreater(report.vectors_per_sec, 0)
+
+        client = ChromaClient(client_mode="local", database_path=DATABASE_PATH, vector_dimension=8)
+        self.assertEqual(client.collection.count(), n)
+
+    def test_load_with_processes(self):
+        n = 1000
+        embeddings = np.random.default_rng(0).random((n, 8), dtype=np.float32)
+        ids = [f"doc{i}" for i in range(n)]
+        config = BulkLoadConfig(workers=2, mode="process", chunk_size=100, queue_chunks=1)
+
+        report = BulkLoader(DBFactory(NumpyVectorDB, vector_dimension=8), config).load(ids=ids, embeddings=embeddings)
+        self.assertEqual((report.vectors, report.errors), (n, 0))
+
+        with self.assertRaisesRegex(RuntimeError, "exited with code -9"):
+            BulkLoader(DBFactory(KilledVectorDB, vector_dimension=8), config).load(ids=ids, embeddings=embeddings)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
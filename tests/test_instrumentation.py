@@ -0,0 +1,128 @@
+import unittest
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from vector_db_external.vectordb.chroma import ChromaClient
+from vector_db_external.vectordb.instrumentation import NULL_TIMER, Histogram, Instrumentation, instrumentation
+
+os.environ["CHROMA_SERVER_HOST"] = "dummy"
+os.environ["CHROMA_SERVER_HTTP_PORT"] = "1"
+
+DATABASE_PATH = "database_instrumentation.chroma"
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_buckets_cover_every_value_once(self):
+        histogram = Histogram()
+        for index in range(1000):
+            lower, upper = histogram.bucket_bounds(index)
+            self.assertEqual(histogram._index(lower), index)
+            self.assertEqual(histogram._index(upper - 1), index)
+            self.assertEqual(histogram.bucket_bounds(index + 1)[0], upper)
+
+    def test_percentiles_within_relative_error(self):
+        values = np.random.default_rng(0).lognormal(12, 2, 20000).astype(np.int64)
+        histogram = Histogram()
+        for value in values:
+            histogram.record(int(value))
+
+        self.assertEqual((histogram.count, histogram.min, histogram.max), (len(values), values.min(), values.max()))
+        for q in (50, 90, 99, 99.9):
+            exact = np.percentile(values, q, method="inverted_cdf")
+            self.assertLessEqual(abs(histogram.percentile(q) - exact) / exact, 1 / 32)
+
+    def test_merge_and_dict_round_trip(self):
+        a = Histogram()
+        b = Histogram()
+        for value in (10, 100, 1000):
+            a.record(value)
+        b.record(10 ** 6)
+
+        a.merge(Histogram.from_dict(json.loads(json.dumps(b.to_dict()))))
+
+        self.assertEqual((a.count, a.total, a.min, a.max), (4, 1001110, 10, 10 ** 6))
+        self.assertEqual(sum(count for _, count in a.buckets()), 4)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_disabled_timer_is_a_no_op(self):
+        recorder = Instrumentation()
+        timer = recorder.timer("db.search")
+        timer.lap("round_trip")
+        timer.stop()
+
+        self.assertIs(timer, NULL_TIMER)
+        self.assertEqual(recorder.snapshot(), {})
+
+    def test_phases_from_several_threads(self):
+        recorder = Instrumentation(enabled=True)
+
+        def search():
+            for _ in range(10):
+                timer = recorder.timer("db.search")
+                timer.lap("encode")
+                timer.lap("round_trip")
+                timer.lap("round_trip")
+                timer.stop()
+
+        threads = [threading.Thread(target=search) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = recorder.snapshot()
+        self.assertEqual(sorted(snapshot), ["db.search.encode", "db.search.round_trip", "db.search.total"])
+        self.assertEqual(snapshot["db.search.round_trip"].count, 40)
+        self.assertEqual(set(json.loads(recorder.to_json())), set(snapshot))
+
+        prometheus = recorder.to_prometheus()
+        self.assertIn("# TYPE vectordb_client_phase_seconds histogram", prometheus)
+        self.assertIn('vectordb_client_phase_seconds_bucket{phase="db.search.total",le="+Inf"} 40', prometheus)
+        self.assertIn('vectordb_client_phase_seconds_count{phase="db.search.encode"} 40', prometheus)
+
+        recorder.reset()
+        self.assertEqual(recorder.snapshot(), {})
+
+
+class TestClientInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+        instrumentation.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    def test_chroma_phases(self):
+        client = ChromaClient(client_mode="local", database_path=DATABASE_PATH)
+        client.insert_embeddings(ids=["doc1", "doc2"], embeddings=[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        client.search_embedding(query=[1.0, 2.0, 3.0], k=1)
+        client.search_embeddings_batch([[1.0, 2.0, 3.0]], k=1)
+
+        self.assertLessEqual(
+            {
+                "chroma.insert.round_trip",
+                "chroma.search.round_trip",
+                "chroma.search.result",
+                "chroma.search.total",
+                "chroma.search_batch.encode",
+                "chroma.search_batch.round_trip",
+            },
+            set(instrumentation.snapshot()),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from vector_db_external.vectordb.chroma import ChromaClient
+from vector_db_external.benchmark.runner import DBFactory, LoadTestConfig, LoadTestRunner, split_clients
+from vector_db_external.benchmark.scenarios import SearchScenario, WriteScenario
+
+os.environ["CHROMA_SERVER_HOST"] = "dummy"
+os.environ["CHROMA_SERVER_HTTP_PORT"] = "1"
+
+DATABASE_PATH = "database_runner.chroma"
+
+
+class TestLoadTestRunner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.random((100, 8), dtype=np.float32)
+        client = ChromaClient(client_mode="local", database_path=DATABASE_PATH, vector_dimension=8)
+        client.insert_embeddings(
+            ids=[f"doc{i}" for i in range(100)],
+            embeddings=self.embeddings.tolist(),
+            metadata=[{"a": f"keyword_{i % 10 + 1}"} for i in range(100)],
+        )
+
+    @classmethod
+    def tearDownClass(self):
+        if os.path.exists(DATABASE_PATH):
+            shutil.rmtree(DATABASE_PATH)
+
+    def test_split_clients(self):
+        self.assertEqual(split_clients(10, 4), [3, 3, 2, 2])
+        self.assertEqual(split_clients(2, 16), [1, 1])
+        self.assertEqual(sum(split_clients(8192, 16)), 8192)
+
+    def test_run_ramps_each_scenario(self):
+        factory = DBFactory(ChromaClient, client_mode="local", database_path=DATABASE_PATH, vector_dimension=8)
+        config = LoadTestConfig(
+            concurrency_steps=[1, 4],
+            processes=2,
+            step_duration=0.5,
+            warmup_duration=0.1,
+            start_method="spawn",
+        )
+        scenarios = [
+            SearchScenario(self.embeddings[:10], k=5),
+            SearchScenario(self.embeddings[:10], k=5, filters=[{"a": "keyword_1"}], name="filtered_search"),
+            WriteScenario(vector_dimension=8, batch_size=2),
+        ]
+
+        report = LoadTestRunner(factory, config).run(scenarios)
+
+        self.assertEqual(
+            [(step.scenario, step.concurrency) for step in report.steps],
+            [("search", 1), ("search", 4), ("filtered_search", 1), ("filtered_search", 4), ("write", 1), ("write", 4)],
+        )
+        for step in report.steps:
+            self.assertGreater(step.summary.count, 0)
+            self.assertEqual(step.summary.errors, 0)
+            self.assertLessEqual(step.summary.p50_ms, step.summary.p99_ms)
+        self.assertEqual(report.steps[1].processes, 2)
+        self.assertIn("filtered_search", report.table())
+
+
+if __name__ == '__main__':
+    unittest.main()
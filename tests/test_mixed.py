@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from vector_db_external.benchmark.mixed import MixedWorkloadConfig, MixedWorkloadRunner
+from vector_db_external.benchmark.runner import DBFactory
+from vector_db_external.benchmark.scenarios import SearchScenario, UpsertScenario
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+from vector_db_external.vectordb.simulated import ServiceTime, SimulatedConfig, SimulatedServer, SimulatedVectorDB
+
+
+class TestMixedWorkloadRunner(unittest.TestCase):
+
+    def test_write_slowdown(self):
+        server = SimulatedServer(SimulatedConfig(write_slowdown=4.0))
+
+        self.assertEqual(server.start_service(0.01, write=False), 0.01)
+        server.start_service(0.05, write=True)
+        self.assertAlmostEqual(server.start_service(0.01, write=False), 0.05)
+        server.start_service(0.05, write=True)
+        self.assertAlmostEqual(server.start_service(0.01, write=False), 0.09)
+        server.finish_service(write=True)
+        server.finish_service(write=True)
+        self.assertEqual(server.start_service(0.01, write=False), 0.01)
+
+    def test_search_latency_under_writes(self):
+        config = SimulatedConfig(
+            search_time=ServiceTime(median_ms=10.0, sigma=0),
+            insert_time=ServiceTime(median_ms=50.0, sigma=0),
+            write_slowdown=4.0,
+        )
+        runner = MixedWorkloadRunner(
+            DBFactory(SimulatedVectorDB, database_name="mixed", vector_dimension=4, db_config=config),
+            MixedWorkloadConfig(
+                write_rates=[0, 20], search_concurrency=4, processes=1, step_duration=0.5, warmup_duration=0.1
+            ),
+        )
+
+        report = runner.run(
+            SearchScenario(np.ones((10, 4), dtype=np.float32), k=10),
+            UpsertScenario([f"doc{i}" for i in range(100)], vector_dimension=4),
+        )
+
+        idle, loaded = report.steps
+        self.assertEqual(idle.write.count, 0)
+        self.assertGreater(loaded.write.count, 5)
+        self.assertEqual(loaded.dropped_writes, 0)
+        # 20 writes of 50ms per second keep about one write in service, searches take 50ms instead of 10ms;
+        # sleeps never end early, so lower bounds on the loaded step hold however busy the machine is
+        self.assertGreater(loaded.search.p50_ms, 2 * idle.search.p50_ms)
+        self.assertGreater(loaded.search.p99_ms, 40)
+        self.assertEqual(list(report.search_p99_by_write_rate()), [0, 20])
+        self.assertIn("write rate", report.table())
+
+    def test_upsert_scenario(self):
+        db = NumpyVectorDB(database_name="mixed_upsert", vector_dimension=4, drop_old=True)
+        ids = [f"doc{i}" for i in range(5)]
+        db.insert_embeddings(ids=ids, embeddings=np.ones((5, 4), dtype=np.float32))
+
+        scenario = UpsertScenario(ids, vector_dimension=4, batch_size=3)
+        scenario.setup(db)
+        for seq in range(4):
+            scenario.run(db, worker_id=0, seq=seq)
+
+        self.assertEqual(db.count(), 5)
+        self.assertEqual(scenario._arguments(0, 1)["ids"], ["doc3", "doc4", "doc0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import threading
+
+import numpy as np
+
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+from vector_db_external.vectordb.vectordb_api import MetricType, Projection
+
+
+class TestNumpyVectorDB(unittest.TestCase):
+
+    def setUp(self):
+        self.client = NumpyVectorDB(database_name="test_db", vector_dimension=3, drop_old=True)
+        ids = ["doc1", "doc2", "doc3", "doc4"]
+        embeddings = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [3.0, 5.0, 6.0], [700.0, 800.0, 300.0]]
+        documents = ["text1", "text2", "", None]
+        metadata = [{"key": "value"}, {"key": "value"}, {"key": "val"}, None]
+        self.client.insert_embeddings(ids=ids, embeddings=embeddings, documents=documents, metadata=metadata)
+
+    def test_search_embedding(self):
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=2)
+
+        self.assertEqual(result.ids, ["doc1", "doc3"])
+        self.assertEqual(result.documents, ["text1", ""])
+
+    def test_search_embedding_with_filter(self):
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=2, filters={"key": "value"})
+
+        self.assertEqual(result.ids, ["doc1", "doc2"])
+        self.assertEqual(result.metadatas, [{"key": "value"}, {"key": "value"}])
+
+    def test_search_embedding_filter_with_fewer_matches_than_k(self):
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=3, filters={"key": "val"})
+        self.assertEqual(result.ids, ["doc3"])
+
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=3, filters={"key": "missing"})
+        self.assertEqual(result.ids, [])
+
+    def test_search_embedding_no_docs(self):
+        result = self.client.search_embedding(query=[700.0, 800.0, 300.0], k=1)
+
+        self.assertEqual(result.ids, ["doc4"])
+        self.assertEqual(result.documents, [None])
+
+    def test_search_embedding_projection(self):
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=2, projection=Projection.IDS)
+
+        self.assertEqual(result.ids, ["doc1", "doc3"])
+        self.assertAlmostEqual(result.distances[0], 0.0, places=6)
+        self.assertIsNone(result.documents)
+        self.assertIsNone(result.metadatas)
+        self.assertEqual(self.client.get_documents(result.ids + ["missing"]), ["text1", "", None])
+
+    def test_insert_existing_id_overwrites(self):
+        self.client.insert_embeddings(ids=["doc1"], embeddings=[[700.0, 800.0, 301.0]], metadata=[{"key": "val"}])
+
+        self.assertEqual(self.client.count(), 4)
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=3, filters={"key": "value"})
+        self.assertEqual(result.ids, ["doc2"])
+
+    def test_delete_embeddings(self):
+        self.client.delete_embeddings(["doc1", "missing"])
+
+        self.assertEqual(self.client.count(), 3)
+        self.assertEqual(self.client.get_documents(["doc1", "doc4", "doc2"]), [None, None, "text2"])
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=3, filters={"key": "value"})
+        self.assertEqual(result.ids, ["doc2"])
+        # doc4 moved into the row of doc1
+        result = self.client.search_embedding(query=[700.0, 800.0, 300.0], k=1)
+        self.assertEqual(result.ids, ["doc4"])
+
+        self.client.upsert_embeddings(ids=["doc1"], embeddings=[[1.0, 2.0, 3.0]], metadata=[{"key": "value"}])
+        result = self.client.search_embedding(query=[1.0, 2.0, 3.0], k=3, filters={"key": "value"})
+        self.assertEqual(result.ids, ["doc1", "doc2"])
+
+    def test_search_while_deleting(self):
+        client = NumpyVectorDB(database_name="test_concurrent", vector_dimension=8, drop_old=True)
+        ids = [f"doc{i}" for i in range(2000)]
+        client.insert_embeddings(
+            ids=ids,
+            embeddings=np.random.default_rng(0).random((2000, 8)),
+            documents=ids,
+            metadata=[{"g": f"g{i % 2}"} for i in range(2000)],
+        )
+        queries = np.random.default_rng(1).random((50, 8))
+        done = threading.Event()
+        errors = []
+
+        def search():
+            try:
+                while not done.is_set():
+                    for query in queries:
+                        result = client.search_embedding(query.tolist(), k=10, filters={"g": "g1"}, projection=Projection.DOCUMENTS)
+                        # a moved row would pair an id with the document or metadata of another one
+                        self.assertEqual(result.documents, result.ids)
+                        self.assertTrue(all(int(id[3:]) % 2 == 1 for id in result.ids))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=search) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for start in range(0, 1800, 50):
+            client.delete_embeddings(ids[start:start + 50])
+        done.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(client.count(), 200)
+
+    def test_instances_share_database(self):
+        other = NumpyVectorDB(database_name="test_db", vector_dimension=3)
+
+        self.assertEqual(other.count(), 4)
+
+    def test_exact_neighbours_for_each_metric(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((2000, 16)).astype(np.float32)
+        queries = rng.standard_normal((20, 16)).astype(np.float32)
+        ids = [str(i) for i in range(len(vectors))]
+
+        expected = {
+            MetricType.L2: ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2),
+            MetricType.IP: -queries @ vectors.T,
+            MetricType.COSINE: -(queries @ vectors.T) / np.linalg.norm(vectors, axis=1)[None, :],
+        }
+        for metric_type, distances in expected.items():
+            client = NumpyVectorDB(database_name=f"exact_{metric_type.value}", vector_dimension=16, drop_old=True, metric_type=metric_type, query_chunk_size=7)
+            client.insert_embeddings(ids=ids, embeddings=vectors)
+
+            results = client.search_embeddings_batch(queries, k=10)
+
+            for query_distances, result in zip(distances, results):
+                self.assertEqual(result.ids, [str(i) for i in np.argsort(query_distances)[:10]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import time
+import unittest
+
+import numpy as np
+
+from vector_db_external.vectordb.vectordb_api import VectorDB
+from vector_db_external.vectordb.search_result import EmbeddingSearchResult
+from vector_db_external.benchmark.open_loop import OpenLoopConfig, OpenLoopRunner
+from vector_db_external.benchmark.runner import DBFactory
+from vector_db_external.benchmark.scenarios import SearchScenario
+
+
+class FixedServiceTimeDB(VectorDB):
+    """Answers every search after sleeping `service_time` seconds."""
+
+    def __init__(self, database_name: str = "fixed", vector_dimension: int = 4, db_config=None, service_time: float = 0.001, **kwargs):
+        self.service_time = service_time
+
+    def insert_embeddings(self, ids, embeddings, documents=None, metadata=None, **kwargs):
+        return None
+
+    def search_embedding(self, query, k=10, filters=None, **kwargs):
+        time.sleep(self.service_time)
+        return EmbeddingSearchResult(ids=["doc1"], embeddings=None, documents=None, metadatas=None)
+
+
+class TestOpenLoopRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.queries = np.random.default_rng(0).random((10, 4), dtype=np.float32)
+
+    def test_constant_rate_below_capacity(self):
+        factory = DBFactory(FixedServiceTimeDB, service_time=0.001)
+        config = OpenLoopConfig(rates=[100], processes=1, step_duration=1.0, warmup_duration=0.1, max_in_flight=4)
+
+        report = OpenLoopRunner(factory, config).run([SearchScenario(self.queries)])
+
+        step = report.steps[0]
+        self.assertAlmostEqual(step.summary.count, 100, delta=5)
+        self.assertEqual(step.dropped, 0)
+        self.assertIsNone(step.within_slo)
+
+    def test_latency_is_measured_from_intended_start(self):
+        # 1 in-flight request taking 20ms cannot keep up with 100 requests per second:
+        # service time stays at 20ms but requests queue up behind each other
+        factory = DBFactory(FixedServiceTimeDB, service_time=0.02)
+        config = OpenLoopConfig(
+            rates=[10, 100, 200],
+            processes=1,
+            step_duration=1.0,
+            warmup_duration=0.0,
+            max_in_flight=1,
+            drain_timeout=5.0,
+            slo_p99_ms=100,
+        )
+
+        report = OpenLoopRunner(factory, config).run([SearchScenario(self.queries)])
+
+        self.assertEqual(len(report.steps), 2)  # stopped at the first SLO violation
+        ok, overloaded = report.steps
+        self.assertTrue(ok.within_slo)
+        self.assertFalse(overloaded.within_slo)
+        self.assertLess(overloaded.service_summary.p99_ms, 100)
+        self.assertGreater(overloaded.summary.p99_ms, 400)
+        self.assertEqual(report.max_rate_within_slo("search"), ok.summary.qps)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from vector_db_external.benchmark.datasets import convert_records
+from vector_db_external.benchmark.evaluation import RetrievalEvaluator
+from vector_db_external.benchmark.precision import PrecisionBenchmark
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+from vector_db_external.vectordb.quantization import ScalarQuantizer, exact_order, take, vector_bytes
+from vector_db_external.vectordb.redis import MemoryUsage, RedisConfig, RedisIndexConfig
+from vector_db_external.vectordb.search_result import CompactSearchResult, EmbeddingSearchResult
+from vector_db_external.vectordb.vectordb_api import MetricType
+
+from tests.fakes import FakeRedis, offline_redis
+
+DATASET_PATH = "dataset_precision_test"
+
+
+class TestScalarQuantizer(unittest.TestCase):
+
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((100, 16)).astype(np.float32) * np.arange(1, 17)
+        quantizer = ScalarQuantizer.fit(vectors)
+
+        codes = quantizer.encode(vectors)
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertEqual(np.abs(codes).max(), 127)
+        self.assertTrue(np.all(np.abs(quantizer.decode(codes) - vectors) <= quantizer.scale / 2 + 1e-6))
+
+        restored = ScalarQuantizer.from_json(quantizer.to_json())
+        np.testing.assert_array_equal(restored.scale, quantizer.scale)
+        self.assertEqual(restored.dimension, 16)
+        with self.assertRaises(ValueError):
+            ScalarQuantizer.from_json('{"dimension": 3, "scale": [1.0, 1.0]}')
+
+    def test_vector_bytes(self):
+        self.assertEqual(vector_bytes("FLOAT32", 1536), 6144)
+        self.assertEqual(vector_bytes("FLOAT16", 1536), 3072)
+        self.assertEqual(vector_bytes("INT8", 1536), 1536)
+
+
+class TestRerank(unittest.TestCase):
+
+    def test_exact_order(self):
+        vectors = np.array([[0.0, 1.0], [1.0, 0.1], [np.nan, np.nan], [1.0, 0.0]], dtype=np.float32)
+
+        rows, distances = exact_order([1.0, 0.0], vectors, MetricType.L2, k=3)
+
+        np.testing.assert_array_equal(rows, [3, 1, 0])
+        self.assertAlmostEqual(distances[1], 0.01, places=6)
+
+    def test_take(self):
+        result = EmbeddingSearchResult(
+            ids=["a", "b", "c"], embeddings=None, documents=["ta", "tb", "tc"], metadatas=[{}, {}, {}], distances=[1, 2, 3]
+        )
+        taken = take(result, np.array([2, 0]), np.array([0.5, 0.7]))
+        self.assertEqual(taken.ids, ["c", "a"])
+        self.assertEqual(taken.documents, ["tc", "ta"])
+        self.assertEqual(taken.distances, [0.5, 0.7])
+
+        compact = CompactSearchResult(ids=["a", "b"], documents=[b"ta", b"tb"], decode_document=bytes.decode)
+        taken = take(compact, np.array([1]), np.array([0.1]))
+        self.assertEqual(taken.documents, ["tb"])
+
+
+class TestRedisReducedPrecision(unittest.TestCase):
+
+    def client(self, vector_type, conn, full_precision=False):
+        index_config = RedisIndexConfig(vector_type=vector_type, metric_type=MetricType.L2)
+        return offline_redis(conn, index_config=index_config, full_precision=full_precision)
+
+    def test_int8_vectors(self):
+        conn = FakeRedis(values={"test_db_quantizer": ScalarQuantizer(np.array([0.5, 0.01])).to_json()})
+        client = self.client("INT8", conn)
+
+        rows, row_bytes = client._vector_rows(np.array([[10.0, 1.0], [-1.0, 0.0]], dtype=np.float32))
+        self.assertEqual(row_bytes, 2)
+        self.assertEqual(np.frombuffer(rows, dtype=np.int8).tolist(), [20, 100, -2, 0])
+
+        _, params = client._search_query([10.0, 1.0], k=5)
+        self.assertEqual(np.frombuffer(params["vec"], dtype=np.int8).tolist(), [20, 100])
+
+    def test_quantizer_dimension(self):
+        conn = FakeRedis(values={"test_db_quantizer": ScalarQuantizer(np.array([0.5, 0.01, 1.0])).to_json()})
+        with self.assertRaisesRegex(ValueError, "remove_database"):
+            self.client("INT8", conn).quantizer()
+
+    def test_remove_database(self):
+        values = {
+            "test_db_quantizer": ScalarQuantizer(np.array([0.5, 0.01])).to_json(),
+            "test_db_full:a": np.array([3.0, 0.0], dtype=np.float32).tobytes(),
+            "test_db_full:b": np.array([1.0, 0.0], dtype=np.float32).tobytes(),
+            "other_db_full:a": np.array([1.0, 0.0], dtype=np.float32).tobytes(),
+        }
+        conn = FakeRedis({"FT.DROPINDEX": b"OK"}, values=values)
+        client = self.client("INT8", conn, full_precision=True)
+        client.insert_batch_size = 1
+        client.quantizer()
+
+        client.remove_database()
+
+        self.assertEqual(list(conn.values), ["other_db_full:a"])
+        self.assertEqual([command[0] for command in conn.commands if command[0] == "DEL"], ["DEL", "DEL", "DEL"])
+        # the next insert fits new scales
+        client._vector_rows(np.array([[1.0, 2.0]], dtype=np.float32))
+        np.testing.assert_allclose(client.quantizer().scale, [1 / 127, 2 / 127])
+
+    def test_float16_query(self):
+        client = self.client("FLOAT16", FakeRedis())
+        _, params = client._search_query([1.0, 2.0], k=5)
+        self.assertEqual(np.frombuffer(params["vec"], dtype=np.float16).tolist(), [1.0, 2.0])
+
+    def test_rerank(self):
+        reply = [
+            3,
+            b"test_db:a", [b"text_id", b"a", b"distance", b"0.0", b"document", b"ta"],
+            b"test_db:b", [b"text_id", b"b", b"distance", b"0.1", b"document", b"tb"],
+            b"test_db:c", [b"text_id", b"c", b"distance", b"0.2", b"document", b"tc"],
+        ]
+        values = {
+            "test_db_full:a": np.array([3.0, 0.0], dtype=np.float32).tobytes(),
+            "test_db_full:b": np.array([1.0, 0.0], dtype=np.float32).tobytes(),
+            "test_db_full:c": np.array([2.0, 0.0], dtype=np.float32).tobytes(),
+        }
+        conn = FakeRedis({"FT.SEARCH": reply}, values=values)
+        client = self.client("FLOAT16", conn, full_precision=True)
+
+        result = client.search_embedding([1.0, 0.0], k=2, rerank=2)
+
+        self.assertIn("KNN 4 @vector", conn.commands[0][2])
+        self.assertEqual(result.ids, ["b", "c"])
+        self.assertEqual(result.documents, ["tb", "tc"])
+        self.assertEqual(result.distances, [0.0, 1.0])
+
+        candidates = [result, result]
+        replies = [values["test_db_full:b"], values["test_db_full:c"]] * 2
+        results = client._rerank_batch(np.array([[1.0, 0.0], [3.0, 0.0]]), candidates, 1, replies)
+        self.assertEqual([result.ids for result in results], [["b"], ["c"]])
+
+        with self.assertRaises(ValueError):
+            self.client("FLOAT16", conn).search_embedding([1.0, 0.0], k=2, rerank=2)
+
+
+class MeasuredNumpyVectorDB(NumpyVectorDB):
+    """NumpyVectorDB reporting a fixed memory usage."""
+
+    def __init__(self, usage: MemoryUsage, **kwargs):
+        super().__init__(**kwargs)
+        self.usage = usage
+
+    def memory_usage(self) -> MemoryUsage:
+        return self.usage
+
+
+class TestPrecisionBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATASET_PATH):
+            shutil.rmtree(DATASET_PATH)
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((500, 8)).astype(np.float32)
+        self.dataset = convert_records(
+            [{"id": f"doc{i}", "embedding": embedding} for i, embedding in enumerate(self.vectors)], DATASET_PATH
+        )
+        self.queries = rng.standard_normal((20, 8)).astype(np.float32)
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(DATASET_PATH)
+
+    def test_benchmark(self):
+        exact = NumpyVectorDB(database_name="precision_exact", vector_dimension=8, drop_old=True)
+        exact.load_dataset(self.dataset)
+        coarse = NumpyVectorDB(database_name="precision_int8", vector_dimension=8, drop_old=True)
+        quantizer = ScalarQuantizer.fit(self.vectors)
+        coarse.insert_embeddings(
+            ids=[f"doc{i}" for i in range(len(self.vectors))],
+            embeddings=quantizer.decode(quantizer.encode(self.vectors) // 16 * 16),
+        )
+
+        report = PrecisionBenchmark(RetrievalEvaluator(self.dataset, cache_dir=None), self.queries, k=10).run(
+            {"exact": exact, "int8": coarse}
+        )
+
+        self.assertEqual(report.baseline, "exact")
+        self.assertEqual(report.results[0].recall, 1.0)
+        self.assertGreater(report.results[1].recall_lost, 0)
+        self.assertIsNone(report.results[1].memory_saved)
+        self.assertIn("int8", report.table())
+
+    def test_full_precision_memory(self):
+        usage = MemoryUsage(documents=500, vector_type="FLOAT32", index_bytes=64, hash_bytes=64)
+        int8 = MemoryUsage(documents=500, vector_type="INT8", index_bytes=16, hash_bytes=16, full_precision_bytes=32)
+        dbs = {
+            "float32": MeasuredNumpyVectorDB(usage, database_name="memory_exact", vector_dimension=8, drop_old=True),
+            "int8": MeasuredNumpyVectorDB(int8, database_name="memory_int8", vector_dimension=8, drop_old=True),
+            "int8_remote": MeasuredNumpyVectorDB(
+                int8.model_copy(update={"full_precision_shared": False}), database_name="memory_remote", vector_dimension=8, drop_old=True
+            ),
+        }
+        for db in dbs.values():
+            db.load_dataset(self.dataset)
+
+        report = PrecisionBenchmark(RetrievalEvaluator(self.dataset, cache_dir=None), self.queries, k=10).run(dbs)
+
+        # the float32 copy only counts when it is on the server of the index
+        self.assertEqual([r.bytes_per_vector for r in report.results], [128, 64, 32])
+        self.assertEqual([r.memory_saved for r in report.results], [0.0, 0.5, 0.75])
+        self.assertEqual(report.results[1].full_precision_bytes, 32)
+
+        client = offline_redis(full_precision=True)
+        self.assertTrue(client.full_precision_shared)
+        client = offline_redis(full_precision=True, full_precision_config=RedisConfig(password="", host="other", port="6379"))
+        self.assertFalse(client.full_precision_shared)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import unittest
+import multiprocessing
+import os
+import pickle
+
+import redis
+from pydantic import ValidationError
+from redis.commands.search.document import Document
+
+from vector_db_external.vectordb import redis as redis_client
+from vector_db_external.vectordb.redis import Redis, RedisConfig, RedisIndexConfig, connection_pool, escape_tag
+from vector_db_external.vectordb.vectordb_api import IndexType, MetricType, Projection
+
+from tests.fakes import offline_redis
+
+
+class TestRedisIndexConfig(unittest.TestCase):
+
+    def test_default_index(self):
+        field = RedisIndexConfig().vector_field("vector", 3)
+        self.assertEqual(field.args, ["VECTOR", "HNSW", 6, "TYPE", "FLOAT32", "DIM", 3, "DISTANCE_METRIC", "COSINE"])
+
+    def test_hnsw_params(self):
+        config = RedisIndexConfig(metric_type=MetricType.IP, vector_type="FLOAT64", m=32, ef_construction=400)
+        self.assertEqual(
+            config.vector_field("vector", 3).args,
+            ["VECTOR", "HNSW", 10, "TYPE", "FLOAT64", "DIM", 3, "DISTANCE_METRIC", "IP", "M", 32, "EF_CONSTRUCTION", 400],
+        )
+
+    def test_invalid_params(self):
+        with self.assertRaises(ValidationError):
+            RedisIndexConfig(index_type=IndexType.Flat, ef_runtime=10)
+        with self.assertRaises(ValidationError):
+            RedisIndexConfig(index_type=IndexType.DISKANN)
+        with self.assertRaisesRegex(ValidationError, "metadata_extra"):
+            RedisIndexConfig(metadata_fields={"a": "TAG", "extra": "TAG"})
+
+    def test_ef_runtime_query(self):
+        # query building does not need a connection
+        client = offline_redis()
+        query, params = client._search_query([1.0, 2.0, 3.0], k=5, ef_runtime=50)
+        self.assertEqual(query.query_string(), "(*)=>[KNN 5 @vector $vec EF_RUNTIME $ef_runtime as distance]")
+        self.assertEqual(params["ef_runtime"], 50)
+
+        client.index_config = RedisIndexConfig(index_type=IndexType.Flat)
+        with self.assertRaises(ValueError):
+            client._search_query([1.0, 2.0, 3.0], k=5, ef_runtime=50)
+
+    def test_hybrid_policy_query(self):
+        client = offline_redis()
+        query, params = client._search_query(
+            [1.0, 2.0, 3.0], k=5, filters={"a": "keyword_1"}, hybrid_policy="BATCHES", batch_size=100
+        )
+        self.assertEqual(
+            query.query_string(),
+            "(@metadata:{a\\:keyword_1})=>[KNN 5 @vector $vec HYBRID_POLICY BATCHES BATCH_SIZE $batch_size as distance]",
+        )
+        self.assertEqual(params["batch_size"], 100)
+
+        # hybrid attributes only apply to filtered queries
+        query, _ = client._search_query([1.0, 2.0, 3.0], k=5, hybrid_policy="ADHOC_BF")
+        self.assertEqual(query.query_string(), "(*)=>[KNN 5 @vector $vec as distance]")
+
+        with self.assertRaises(ValueError):
+            client._search_query([1.0, 2.0, 3.0], k=5, filters={"a": "x"}, hybrid_policy="ADHOC_BF", batch_size=100)
+
+    def test_projection_query(self):
+        client = offline_redis()
+
+        query, _ = client._search_query([1.0, 2.0, 3.0], k=5, projection=Projection.IDS)
+        self.assertEqual(query._return_fields, ["id", "text_id", "distance"])
+
+        query, _ = client._search_query([1.0, 2.0, 3.0], k=5)
+        self.assertEqual(query._return_fields, ["id", "text_id", "distance", "metadata", "document"])
+
+        query, _ = client._search_query([1.0, 2.0, 3.0], k=5, projection=Projection.EMBEDDINGS)
+        self.assertEqual(query._return_fields[-1], "vector")
+        self.assertIsNone(query._return_fields_decode_as["vector"])
+
+
+class TestRedisMetadataFields(unittest.TestCase):
+
+    def setUp(self):
+        # hashes, queries and results are built without a connection
+        self.client = offline_redis(index_config=RedisIndexConfig(metadata_fields={"a": "TAG", "b": "TAG", "year": "NUMERIC"}))
+
+    def test_schema(self):
+        self.assertEqual(
+            [field.args for field in self.client.index_config.metadata_schema()],
+            [["TAG", "SEPARATOR", "|", "CASESENSITIVE"], ["TAG", "SEPARATOR", "|", "CASESENSITIVE"], ["NUMERIC"]],
+        )
+        self.assertEqual(RedisIndexConfig().metadata_schema()[0].args, ["TAG", "SEPARATOR", ","])
+
+    def test_hash_mapping(self):
+        metadata = [{"a": "keyword:1,x", "year": 2024, "source": {"page": 3}}]
+        mapping = self.client._hash_mapping(0, ["doc1"], b"vector", None, metadata)
+
+        self.assertEqual(mapping["metadata_a"], "keyword:1,x")
+        self.assertEqual(mapping["metadata_year"], "2024")
+        self.assertEqual(mapping["metadata_extra"], '{"source": {"page": 3}}')
+        self.assertNotIn("metadata", mapping)
+
+        with self.assertRaises(ValueError):
+            self.client._hash_mapping(0, ["doc1"], b"vector", None, [{"a": "x|y"}])
+
+    def test_filters(self):
+        self.assertEqual(escape_tag("keyword_1"), "keyword_1")
+        self.assertEqual(escape_tag("key:word, 1"), "key\\:word\\,\\ 1")
+
+        query, _ = self.client._search_query([1.0, 2.0, 3.0], k=5, filters={"a": "keyword_1", "year": 2024})
+        self.assertEqual(
+            query.query_string(),
+            "(@metadata_a:{keyword_1} @metadata_year:[2024 2024])=>[KNN 5 @vector $vec as distance]",
+        )
+        with self.assertRaises(ValueError):
+            self.client._search_query([1.0, 2.0, 3.0], k=5, filters={"source": "x"})
+
+    def test_typed_results(self):
+        doc = Document(
+            "test_db:doc1", text_id="doc1", distance="0.25", metadata_a="keyword:1,x", metadata_year="2024", metadata_extra='{"page": 3}'
+        )
+        result = self.client._parse_search_result([doc])
+
+        self.assertEqual(result.ids, ["doc1"])
+        self.assertEqual(result.distances, [0.25])
+        self.assertEqual(result.metadatas, [{"a": "keyword:1,x", "year": 2024, "page": 3}])
+
+
+def _child_pool_is_new(config, parent_pool_id, results):
+    results.put(id(connection_pool(config)) != parent_pool_id and not redis_client._pools.get("parent"))
+
+
+class TestRedisConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.config = RedisConfig(password="s1234", host="localhost", port="8002")
+
+    def test_pool_shared_by_equal_configs(self):
+        pool = connection_pool(self.config)
+
+        self.assertIs(connection_pool(RedisConfig(password="s1234", host="localhost", port="8002")), pool)
+        self.assertIsNot(connection_pool(RedisConfig(password="s1234", host="localhost", port="8003")), pool)
+        self.assertIsNot(connection_pool(self.config.model_copy(update={"max_connections": 10})), pool)
+
+    def test_blocking_pool(self):
+        config = self.config.model_copy(update={"blocking_pool": True, "max_connections": 8, "pool_timeout": 1.5})
+        pool = connection_pool(config)
+
+        self.assertIsInstance(pool, redis.BlockingConnectionPool)
+        self.assertEqual(pool.max_connections, 8)
+        self.assertEqual(pool.timeout, 1.5)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_pools_reset_after_fork(self):
+        pool = connection_pool(self.config)
+        redis_client._pools["parent"] = pool
+        try:
+            context = multiprocessing.get_context("fork")
+            results = context.Queue()
+            process = context.Process(target=_child_pool_is_new, args=(self.config, id(pool), results))
+            process.start()
+            self.assertTrue(results.get(timeout=30))
+            process.join()
+        finally:
+            del redis_client._pools["parent"]
+
+    def test_pickled_client_reconnects_through_shared_pool(self):
+        client = Redis.__new__(Redis)
+        client.db_config = self.config
+        client.full_precision_config = self.config
+        client.index_config = RedisIndexConfig()
+        client._connect()
+
+        copy = pickle.loads(pickle.dumps(client))
+
+        self.assertIs(copy.conn.connection_pool, connection_pool(self.config))
+        self.assertEqual(copy.index_config, client.index_config)
+
+
+if __name__ == '__main__':
+    unittest.main()
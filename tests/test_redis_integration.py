@@ -1,6 +1,8 @@
 import unittest
 import os
 import shutil
+
+import numpy as np
 from vector_db_external.vectordb.redis import Redis
 
 os.environ["REDIS_HOST"] = "localhost"
@@ -61,6 +63,18 @@ class TestRedisClient(unittest.TestCase):
         self.assertTrue(True)
     
 
+    def test_insert_embeddings_from_array(self):
+        client = Redis(database_name="test_db", vector_dimension=3)
+
+        # Mock data, a contiguous float32 matrix flushed every 2 rows
+        ids = ["doc5", "doc6", "doc7"]
+        embeddings = np.array([[-1.0, -2.0, 3.0], [-4.0, -5.0, 6.0], [-3.0, -5.0, 6.0]], dtype=np.float32)
+
+        client.insert_embeddings(ids=ids, embeddings=embeddings, batch_size=2)
+
+        result = client.search_embedding(query=[-1.0, -2.0, 3.0], k=1)
+        self.assertEqual(result.ids[0], "doc5")
+
     def test_search_embedding(self):
         # Create an instance of ChromaClient
         client = Redis(database_name="test_db", vector_dimension=3)
@@ -120,6 +134,17 @@ class TestRedisClient(unittest.TestCase):
         self.assertEqual(result.ids[0], "doc4")
         self.assertEqual(result.documents[0], None)
     
+    def test_upsert_and_delete_embeddings(self):
+        client = Redis(database_name="test_db", vector_dimension=3)
+
+        client.insert_embeddings(ids=["doc10"], embeddings=[[-50.0, -50.0, -50.0]], documents=["old"], metadata=[{"key": "old"}])
+        client.upsert_embeddings(ids=["doc10"], embeddings=[[-50.0, -50.0, -51.0]])
+        self.assertEqual(client.get_documents(["doc10"]), [None])
+
+        client.delete_embeddings(["doc10", "missing"])
+        result = client.search_embedding(query=[-50.0, -50.0, -51.0], k=1)
+        self.assertNotEqual(result.ids, ["doc10"])
+
 
 if __name__ == '__main__':
     unittest.main()
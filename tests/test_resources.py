@@ -0,0 +1,134 @@
+import unittest
+import time
+
+import numpy as np
+import redis
+
+from vector_db_external.benchmark.latency import clock
+from vector_db_external.benchmark.resources import (
+    ProcessResources,
+    RedisResources,
+    ResourceSample,
+    ResourceSampler,
+    ResourceTimeline,
+)
+from vector_db_external.benchmark.runner import DBFactory, LoadTestConfig, LoadTestRunner
+from vector_db_external.benchmark.scenarios import SearchScenario
+from vector_db_external.vectordb.simulated import ServiceTime, SimulatedConfig, SimulatedVectorDB
+
+from tests.fakes import FakeRedis, offline_redis
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def fake_redis(documents=None):
+    """INFO and FT.INFO replies of a server using more CPU at every sample, without an index when documents is None."""
+    cpu = [0.0]
+
+    def info(section):
+        if section == "memory":
+            return {"used_memory": 2_000_000_000, "used_memory_rss": 2_100_000_000, "used_memory_peak": 2_200_000_000}
+        cpu[0] += 0.5
+        return {"used_cpu_sys": cpu[0] / 2, "used_cpu_user": cpu[0] / 2}
+
+    def ft_info(index_name):
+        if documents is None:
+            raise redis.ResponseError("Unknown Index name")
+        return [b"num_docs", str(documents).encode(), b"vector_index_sz_mb", b"1024", b"percent_indexed", b"1"]
+
+    return FakeRedis({"INFO": info, "FT.INFO": ft_info})
+
+
+class TestResourceSources(unittest.TestCase):
+
+    def test_redis(self):
+        source = RedisResources(offline_redis(fake_redis(documents=1_000_000)))
+
+        first = source.sample()
+        time.sleep(0.05)
+        second = source.sample()
+
+        self.assertNotIn("cpu_percent", first)
+        self.assertGreater(second["cpu_percent"], 0)
+        self.assertEqual(second["memory_bytes"], 2_000_000_000)
+        self.assertEqual(second["documents"], 1_000_000)
+        self.assertEqual(second["vector_index_bytes"], 1024 * 1024 * 1024)
+        self.assertEqual(second["percent_indexed"], 1.0)
+
+    def test_redis_without_index(self):
+        metrics = RedisResources(offline_redis(fake_redis())).sample()
+        self.assertIn("memory_bytes", metrics)
+        self.assertNotIn("documents", metrics)
+
+    @unittest.skipIf(psutil is None, "psutil is not installed")
+    def test_process(self):
+        source = ProcessResources(documents=lambda: 10)
+        source.sample()
+        np.ones(10_000_000).sum()
+        metrics = source.sample()
+
+        self.assertGreater(metrics["memory_bytes"], 0)
+        self.assertGreaterEqual(metrics["cpu_percent"], 0)
+        self.assertEqual(metrics["documents"], 10)
+
+
+class FailingSource(RedisResources):
+
+    def sample(self):
+        raise ConnectionError("down")
+
+
+class TestResourceSampler(unittest.TestCase):
+
+    def test_timeline(self):
+        timeline = ResourceTimeline(
+            samples=[
+                ResourceSample(timestamp=1.0, source="redis", metrics={"memory_bytes": 1e9, "documents": 5e5}),
+                ResourceSample(timestamp=2.0, source="redis", metrics={"memory_bytes": 3e9, "documents": 1e6, "cpu_percent": 50}),
+                ResourceSample(timestamp=2.5, source="chroma", metrics={"memory_bytes": 4e9}),
+            ]
+        )
+
+        self.assertEqual(timeline.sources(), ["redis", "chroma"])
+        timestamps, values = timeline.series("redis", "cpu_percent")
+        self.assertEqual((timestamps.tolist(), values.tolist()), ([2.0], [50.0]))
+        self.assertEqual(timeline.peak("redis", "memory_bytes"), 3e9)
+        self.assertEqual(timeline.memory_per_million_vectors("redis"), 3e9)
+        self.assertIsNone(timeline.memory_per_million_vectors("chroma"))
+        self.assertEqual(len(timeline.window(1.5, 2.2).samples), 1)
+        self.assertIn("chroma", timeline.table())
+
+    def test_sampler(self):
+        failing = FailingSource(offline_redis(fake_redis()), name="failing")
+        started = clock()
+        with ResourceSampler([RedisResources(offline_redis(fake_redis(documents=10))), failing], interval=0.01) as sampler:
+            time.sleep(0.1)
+        ended = clock()
+
+        timeline = sampler.timeline
+        timestamps, _ = timeline.series("redis", "memory_bytes")
+        self.assertGreater(len(timestamps), 3)
+        self.assertTrue(np.all(np.diff(timestamps) > 0))
+        self.assertTrue(started <= timestamps[0] and timestamps[-1] <= ended)
+        self.assertEqual(timeline.errors, len(timestamps))
+
+    def test_step_alignment(self):
+        config = SimulatedConfig(search_time=ServiceTime(median_ms=1.0))
+        runner = LoadTestRunner(
+            DBFactory(SimulatedVectorDB, db_config=config),
+            LoadTestConfig(concurrency_steps=[2], processes=1, step_duration=0.3, warmup_duration=0.05),
+        )
+        sampler = ResourceSampler([RedisResources(offline_redis(fake_redis(documents=10)))], interval=0.02)
+
+        with sampler:
+            step = runner.run([SearchScenario(np.ones((10, 4), dtype=np.float32), k=10)]).steps[0]
+
+        window = sampler.timeline.window(step.started, step.started + step.summary.duration)
+        self.assertGreater(len(window.samples), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
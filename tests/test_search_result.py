@@ -0,0 +1,124 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from vector_db_external.vectordb.redis import RedisIndexConfig, search_args
+from vector_db_external.vectordb.search_result import CompactSearchResult, EmbeddingSearchResult
+from vector_db_external.vectordb.vectordb_api import Projection
+
+from tests.fakes import FakeRedis, offline_redis
+
+
+class TestCompactSearchResult(unittest.TestCase):
+
+    def test_lazy_decoding(self):
+        decoded = []
+
+        def decode_document(raw):
+            decoded.append(raw)
+            return raw.decode() if raw is not None else None
+
+        result = CompactSearchResult(
+            ids=["doc1", "doc2"],
+            distances=np.array([0.1, 0.2], dtype=np.float32),
+            documents=[b"text1", None],
+            metadatas=[{"key": "value"}, None],
+            decode_document=decode_document,
+            decode_metadata=lambda raw: raw or {},
+        )
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(decoded, [])
+        self.assertEqual(result.documents, ["text1", None])
+        self.assertEqual(result.documents, ["text1", None])
+        self.assertEqual(len(decoded), 2)
+        self.assertEqual(result.metadatas, [{"key": "value"}, {}])
+        self.assertFalse(hasattr(result, "__dict__"))
+
+    def test_shared_decoding(self):
+        # a cached result is read by many threads, each must see the complete decoded list
+        def decode(raw):
+            time.sleep(0)
+            return raw.decode()
+
+        documents = [str(i).encode() for i in range(200)]
+        for _ in range(20):
+            result = CompactSearchResult(ids=[], documents=documents, decode_document=decode)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                seen = list(executor.map(lambda _: result.documents, range(8)))
+            for decoded in seen:
+                self.assertEqual(decoded, [document.decode() for document in documents])
+
+    def test_to_model(self):
+        result = CompactSearchResult(ids=["doc1"], distances=np.array([0.5], dtype=np.float32), documents=["text1"], metadatas=[{}])
+
+        self.assertEqual(
+            result.to_model(),
+            EmbeddingSearchResult(ids=["doc1"], embeddings=None, documents=["text1"], metadatas=[{}], distances=[0.5]),
+        )
+
+    def test_redis_raw_reply(self):
+        # parsing does not need a connection
+        client = offline_redis(index_config=RedisIndexConfig(metadata_fields={"a": "TAG", "year": "NUMERIC"}))
+        response = [
+            2,
+            b"test_db:doc1",
+            [b"text_id", b"doc1", b"distance", b"0.25", b"document", "café".encode(), b"metadata_a", b"x:y", b"metadata_year", b"2024"],
+            b"test_db:doc2",
+            [b"text_id", b"doc2", b"distance", b"0.5"],
+        ]
+
+        result = client._parse_compact_result(response)
+
+        self.assertEqual(result.ids, ["doc1", "doc2"])
+        np.testing.assert_array_equal(result.distances, np.array([0.25, 0.5], dtype=np.float32))
+        self.assertEqual(result.documents, ["café", None])
+        self.assertEqual(result.metadatas, [{"a": "x:y", "year": 2024}, {}])
+
+    def test_redis_raw_reply_projection(self):
+        client = offline_redis()
+        vector = np.array([1.0, 2.0], dtype=np.float32)
+        response = [1, b"test_db:doc1", [b"text_id", b"doc1", b"distance", b"0.25", b"vector", vector.tobytes()]]
+
+        result = client._parse_compact_result(response, Projection.EMBEDDINGS)
+        np.testing.assert_array_equal(result.embeddings, [[1.0, 2.0]])
+        self.assertEqual(result.to_model().embeddings, [[1.0, 2.0]])
+
+        result = client._parse_compact_result(response[:2] + [[b"text_id", b"doc1", b"distance", b"0.25"]], Projection.IDS)
+        self.assertEqual(result.ids, ["doc1"])
+        self.assertIsNone(result.documents)
+        self.assertIsNone(result.metadatas)
+        self.assertIsNone(result.embeddings)
+
+    def test_redis_search_matches_redis_py(self):
+        # the search path builds and parses FT.SEARCH itself, redis-py's Search.search must agree
+        client = offline_redis(index_config=RedisIndexConfig(metadata_fields={"a": "TAG", "year": "NUMERIC"}))
+        vector = np.array([1.0, 2.0], dtype=np.float32)
+        response = [
+            2,
+            b"test_db:doc1",
+            [b"id", b"test_db:doc1", b"text_id", b"doc1", b"distance", b"0.25", b"metadata_a", b"x", b"document", "café".encode(), b"vector", vector.tobytes()],
+            b"test_db:doc2",
+            [b"id", b"test_db:doc2", b"text_id", b"doc2", b"distance", b"0.5", b"metadata_year", b"2024", b"vector", vector.tobytes()],
+        ]
+        query_obj, query_params = client._search_query([1.0, 2.0], k=2, filters={"a": "x"}, projection=Projection.EMBEDDINGS, ef_runtime=20)
+        conn = FakeRedis({"FT.SEARCH": response})
+
+        expected = conn.ft("test_db").search(query_obj, query_params)
+        docs = client._search_documents(response, Projection.EMBEDDINGS)
+
+        def normalized(args):
+            return [arg.upper() if isinstance(arg, str) else arg for arg in args]
+
+        self.assertEqual(normalized(conn.commands[0][1:]), normalized(search_args("test_db", query_obj, query_params)))
+        self.assertEqual([doc.__dict__ for doc in docs], [doc.__dict__ for doc in expected.docs])
+        result = client._parse_response(response, Projection.EMBEDDINGS)
+        self.assertEqual(result.documents, ["café", None])
+        self.assertEqual(result.metadatas, [{"a": "x"}, {"year": 2024}])
+        self.assertEqual(result.embeddings, [[1.0, 2.0], [1.0, 2.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
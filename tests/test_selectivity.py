@@ -0,0 +1,79 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from vector_db_external.benchmark.datasets import convert_records
+from vector_db_external.benchmark.evaluation import RetrievalEvaluator
+from vector_db_external.benchmark.selectivity import SelectivityBenchmark, candidate_filters, filter_levels
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+
+DATASET_PATH = "dataset_selectivity_test"
+
+
+class TestSelectivity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATASET_PATH):
+            shutil.rmtree(DATASET_PATH)
+
+        rng = np.random.default_rng(0)
+        records = [
+            {
+                "id": f"doc{i}",
+                "embedding": embedding,
+                "metadata": {"a": f"keyword_{i % 10 + 1}", "b": f"keyword_{i // 10 % 10 + 1}"},
+            }
+            for i, embedding in enumerate(rng.standard_normal((1000, 8)))
+        ]
+        self.dataset = convert_records(records, DATASET_PATH)
+        self.queries = rng.standard_normal((20, 8)).astype(np.float32)
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(DATASET_PATH)
+
+    def test_candidate_filters(self):
+        candidates = candidate_filters(self.dataset)
+
+        self.assertEqual(len(candidates), 10 + 10 + 100)
+        self.assertIn((0.1, {"a": "keyword_3"}), candidates)
+        self.assertIn((0.01, {"a": "keyword_3", "b": "keyword_7"}), candidates)
+        self.assertEqual(len(candidate_filters(self.dataset, max_keys=1)), 20)
+
+    def test_filter_levels(self):
+        with self.assertLogs("vector_db_external.benchmark.selectivity", "WARNING") as logs:
+            levels = filter_levels(self.dataset, selectivities=[1.0, 0.1, 0.03, 0.01, 0.0001], filters_per_level=5)
+
+        # 3% and 0.01% get the filters of the 1% level
+        self.assertEqual([level.target for level in levels], [1.0, 0.1, 0.01])
+        self.assertEqual([level.selectivity for level in levels], [1.0, 0.1, 0.01])
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("dropping selectivity target 0.01%", logs.output[1])
+        with self.assertLogs("vector_db_external.benchmark.selectivity", "WARNING") as logs:
+            self.assertEqual(len(filter_levels(self.dataset, selectivities=[0.03])), 1)
+        self.assertIn("only reached with 1.00%", logs.output[0])
+        self.assertEqual(levels[0].filters, [])
+        self.assertIsNone(levels[0].query_filters(3))
+        self.assertEqual(len(levels[1].filters), 5)
+        self.assertEqual(len(levels[2].filters[0]), 2)
+        self.assertEqual(levels[1].query_filters(7)[5], levels[1].filters[0])
+
+    def test_benchmark(self):
+        db = NumpyVectorDB(database_name="selectivity", vector_dimension=8, drop_old=True)
+        db.load_dataset(self.dataset)
+        evaluator = RetrievalEvaluator(self.dataset, cache_dir=None)
+        levels = filter_levels(self.dataset, selectivities=[1.0, 0.1, 0.01])
+
+        report = SelectivityBenchmark(evaluator, self.queries, k=5, levels=levels).run(db, search_grid=[{}, {"ignored": 1}])
+
+        self.assertEqual(len(report.results), 6)
+        self.assertEqual([r.recall for r in report.results], [1.0] * 6)
+        self.assertEqual(report.results[0].latency.count, len(self.queries))
+        self.assertEqual(len(report.table().splitlines()), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from vector_db_external.vectordb.instrumentation import instrumentation
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+from vector_db_external.vectordb.search_result import CompactSearchResult, EmbeddingSearchResult
+from vector_db_external.vectordb.sharded import ShardedVectorDB, merge_results, shard_of
+from vector_db_external.vectordb.vectordb_api import MetricType, Projection
+
+
+class TestShardedVectorDB(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((300, 8)).astype(np.float32)
+        self.ids = [f"doc{i}" for i in range(300)]
+        self.documents = [f"text{i}" for i in range(300)]
+        self.metadata = [{"parity": str(i % 2)} for i in range(300)]
+
+        self.single = NumpyVectorDB(database_name="single", vector_dimension=8, metric_type=MetricType.L2, drop_old=True)
+        self.single.insert_embeddings(self.ids, self.vectors, self.documents, self.metadata)
+        self.sharded = ShardedVectorDB(
+            db_class=NumpyVectorDB,
+            shard_kwargs=[{"database_name": f"shard{i}"} for i in range(3)],
+            vector_dimension=8,
+            metric_type=MetricType.L2,
+            drop_old=True,
+        )
+        self.sharded.insert_embeddings(self.ids, self.vectors, self.documents, self.metadata)
+
+    def test_partition(self):
+        counts = [shard.count() for shard in self.sharded.shards]
+        self.assertEqual(sum(counts), 300)
+        self.assertTrue(all(count > 50 for count in counts))
+        self.assertEqual(self.sharded.shards[shard_of("doc7", 3)].get_documents(["doc7"]), ["text7"])
+
+    def test_search_matches_single_database(self):
+        queries = np.random.default_rng(1).standard_normal((5, 8)).astype(np.float32)
+
+        for query in queries:
+            expected = self.single.search_embedding(query, k=10, filters={"parity": "1"})
+            result = self.sharded.search_embedding(query, k=10, filters={"parity": "1"})
+            self.assertEqual(result.ids, expected.ids)
+            self.assertEqual(result.documents, expected.documents)
+            np.testing.assert_allclose(result.distances, expected.distances, rtol=1e-5)
+
+        batch = self.sharded.search_embeddings_batch(queries, k=5, projection=Projection.IDS)
+        self.assertEqual([result.ids for result in batch], [self.single.search_embedding(q, k=5).ids for q in queries])
+        self.assertIsNone(batch[0].documents)
+
+    def test_writes_go_to_owner(self):
+        self.sharded.delete_embeddings(["doc1", "doc2"])
+        self.sharded.upsert_embeddings(["doc3"], np.zeros((1, 8), dtype=np.float32), documents=["new"])
+
+        self.assertEqual(sum(shard.count() for shard in self.sharded.shards), 298)
+        self.assertEqual(self.sharded.get_documents(["doc1", "doc3", "doc4"]), [None, "new", "text4"])
+        self.assertEqual(self.sharded.search_embedding(np.zeros(8), k=1).ids, ["doc3"])
+
+    def test_close(self):
+        self.assertIsNotNone(self.sharded._executor)
+        closed = []
+        for shard in self.sharded.shards:
+            shard.close = lambda shard=shard: closed.append(shard)
+
+        self.sharded.close()
+
+        self.assertIsNone(self.sharded._executor)
+        self.assertEqual(closed, self.sharded.shards)
+        idle = ShardedVectorDB(shards=self.sharded.shards)
+        self.assertIsNone(idle._executor)
+
+    def test_instrumentation(self):
+        instrumentation.reset()
+        instrumentation.enable()
+        try:
+            self.sharded.search_embedding(self.vectors[0], k=3)
+        finally:
+            instrumentation.disable()
+
+        names = set(instrumentation.snapshot())
+        self.assertTrue({"sharded.shard0.search_embedding", "sharded.search.scatter", "sharded.search.merge"} <= names)
+
+    def test_merge_results(self):
+        first = EmbeddingSearchResult(ids=["a", "b"], embeddings=None, documents=["ta", "tb"], metadatas=None, distances=[0.1, 0.5])
+        second = CompactSearchResult(
+            ids=["c", "d"], distances=np.array([0.2, 0.3], dtype=np.float32), documents=[b"tc", b"td"], decode_document=bytes.decode
+        )
+
+        merged = merge_results([first, second], k=3)
+
+        self.assertEqual(merged.ids, ["a", "c", "d"])
+        self.assertEqual(merged.documents, ["ta", "tc", "td"])
+        self.assertIsNone(merged.metadatas)
+        with self.assertRaises(ValueError):
+            merge_results([first.model_copy(update={"distances": None})], k=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from vector_db_external.benchmark.runner import DBFactory, LoadTestConfig, LoadTestRunner
+from vector_db_external.benchmark.scenarios import SearchScenario
+from vector_db_external.vectordb.simulated import (
+    AsyncSimulatedVectorDB,
+    ServerBusyError,
+    ServiceTime,
+    SimulatedConfig,
+    SimulatedVectorDB,
+)
+from vector_db_external.vectordb.vectordb_api import Projection
+
+
+class TestSimulatedVectorDB(unittest.TestCase):
+
+    def test_service_time(self):
+        rng = random.Random(0)
+        samples = sorted(ServiceTime(median_ms=2.0, sigma=0.5).sample(rng) for _ in range(2000))
+        self.assertAlmostEqual(samples[1000], 0.002, delta=0.0002)
+
+        stalls = [ServiceTime(median_ms=0, stall_probability=0.5, stall_ms=100).sample(rng) for _ in range(1000)]
+        self.assertEqual(set(stalls), {0.0, 0.1})
+
+    def test_search_embedding(self):
+        config = SimulatedConfig(search_time=ServiceTime(median_ms=0.1), document_median_bytes=1000, document_pool=50)
+        db = SimulatedVectorDB(database_name="simulated", db_config=config, drop_old=True)
+
+        result = db.search_embedding([0.1, 0.2], k=5, filters={"a": "keyword_1"})
+
+        self.assertEqual(len(result.ids), 5)
+        self.assertEqual(result.distances, sorted(result.distances))
+        self.assertEqual(result.metadatas, [{"a": "keyword_1"}] * 5)
+        self.assertEqual(db.search_embedding([0.1, 0.2], k=5, filters={"a": "keyword_1"}), result)
+        self.assertEqual(db.get_documents(result.ids[:1] + ["missing"]), [result.documents[0], None])
+        self.assertIsNone(db.search_embedding([0.1, 0.2], k=5, projection=Projection.IDS).documents)
+
+        sizes = [len(document) for document in db.server.documents]
+        self.assertLess(abs(np.median(sizes) - 1000), 300)
+
+    def test_bounded_queue(self):
+        config = SimulatedConfig(search_time=ServiceTime(median_ms=50, sigma=0), max_concurrency=2, queue_size=2)
+        db = SimulatedVectorDB(database_name="simulated_queue", db_config=config, drop_old=True)
+
+        def search(i):
+            try:
+                db.search_embedding([float(i)], k=1)
+            except ServerBusyError:
+                return False
+            return True
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(8) as executor:
+            served = list(executor.map(search, range(8)))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(served.count(True), 4)
+        self.assertEqual(db.server.rejected, 4)
+        # two slots serve the four admitted requests in two rounds
+        self.assertGreater(elapsed, 0.09)
+
+    def test_async_concurrency(self):
+        config = SimulatedConfig(search_time=ServiceTime(median_ms=20, sigma=0), max_concurrency=100, queue_size=None)
+        db = AsyncSimulatedVectorDB(db_config=config)
+
+        async def run():
+            return await asyncio.gather(*[db.search_embedding([float(i)], k=3) for i in range(1000)])
+
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(results), 1000)
+        self.assertGreater(elapsed, 0.2)
+        self.assertLess(elapsed, 2.0)
+
+    def test_load_test_runner(self):
+        config = SimulatedConfig(search_time=ServiceTime(median_ms=1.0))
+        runner = LoadTestRunner(
+            DBFactory(SimulatedVectorDB, db_config=config),
+            LoadTestConfig(concurrency_steps=[4], processes=1, step_duration=0.3, warmup_duration=0.05),
+        )
+
+        report = runner.run([SearchScenario(np.ones((10, 4), dtype=np.float32), k=10)])
+
+        self.assertEqual(report.steps[0].summary.errors, 0)
+        self.assertGreater(report.steps[0].summary.qps, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from vector_db_external.benchmark.datasets import convert_records
+from vector_db_external.benchmark.evaluation import RetrievalEvaluator
+from vector_db_external.benchmark.latency import LatencySummary
+from vector_db_external.benchmark.sweep import RecallQPSSweep, SweepPoint, grid, mark_pareto
+from vector_db_external.vectordb.numpy_db import NumpyVectorDB
+
+DATASET_PATH = "dataset_sweep_test"
+
+
+class TruncatingNumpyVectorDB(NumpyVectorDB):
+    """Exact database returning only the first `keep` results, a stand-in for an approximate index."""
+
+    def rebuild_index(self, keep_offset: int = 0):
+        self.keep_offset = keep_offset
+
+    def search_embedding(self, query, k=10, filters=None, keep=None, **kwargs):
+        result = super().search_embedding(query, k=k, filters=filters)
+        keep = k if keep is None else keep + getattr(self, "keep_offset", 0)
+        result.ids = result.ids[:keep]
+        return result
+
+
+def point(recall, qps):
+    latency = LatencySummary(
+        count=1, errors=0, duration=1.0, qps=qps, avg_ms=0.0, p50_ms=0.0, p95_ms=0.0, p99_ms=0.0, max_ms=0.0
+    )
+    return SweepPoint(build_params={}, search_params={}, recall=recall, precision=recall, latency=latency)
+
+
+class TestRecallQPSSweep(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        if os.path.exists(DATASET_PATH):
+            shutil.rmtree(DATASET_PATH)
+
+        rng = np.random.default_rng(0)
+        records = [{"id": f"doc{i}", "embedding": embedding} for i, embedding in enumerate(rng.standard_normal((200, 8)))]
+        self.dataset = convert_records(records, DATASET_PATH)
+        self.queries = rng.standard_normal((10, 8)).astype(np.float32)
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(DATASET_PATH)
+
+    def test_grid(self):
+        self.assertEqual(
+            grid(m=[16, 32], ef_construction=[200]),
+            [{"m": 16, "ef_construction": 200}, {"m": 32, "ef_construction": 200}],
+        )
+        self.assertEqual(grid(), [{}])
+
+    def test_mark_pareto(self):
+        points = [point(0.5, 100), point(0.9, 50), point(0.8, 40), point(0.5, 100), point(0.95, 10)]
+        mark_pareto(points)
+        self.assertEqual([p.pareto for p in points], [True, True, False, True, True])
+
+    def test_sweep(self):
+        db = TruncatingNumpyVectorDB(database_name="sweep", vector_dimension=8, drop_old=True)
+        db.load_dataset(self.dataset)
+        sweep = RecallQPSSweep(RetrievalEvaluator(self.dataset, cache_dir=None), self.queries, k=10)
+
+        report = sweep.run(db, search_grid=grid(keep=[5, 10]), build_grid=grid(keep_offset=[0, -2]))
+
+        self.assertEqual(
+            [(p.build_params["keep_offset"], p.search_params["keep"], round(p.recall, 6)) for p in report.points],
+            [(0, 5, 0.5), (0, 10, 1.0), (-2, 5, 0.3), (-2, 10, 0.8)],
+        )
+        self.assertIn((0, 10), [(p.build_params["keep_offset"], p.search_params["keep"]) for p in report.pareto_front()])
+        self.assertEqual(len(report.table().splitlines()), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
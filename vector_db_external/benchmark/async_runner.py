@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any
+
+from ..vectordb.vectordb_api import AsyncVectorDB
+from .latency import LatencyRecorder, clock
+from .runner import DBFactory, LoadTestRunner
+from .scenarios import Scenario
+
+
+async def _client_loop(
+    db: AsyncVectorDB,
+    scenario: Scenario,
+    worker_id: int,
+    record_from: float,
+    stop_at: float,
+) -> LatencyRecorder:
+    recorder = LatencyRecorder()
+    seq = 0
+    while True:
+        start = clock()
+        if start >= stop_at:
+            break
+        try:
+            await scenario.run_async(db, worker_id, seq)
+        except Exception:
+            if start >= record_from:
+                recorder.record_error()
+        else:
+            if start >= record_from:
+                recorder.record(start, clock())
+        seq += 1
+    return recorder
+
+
+async def _run_clients(
+    db: AsyncVectorDB,
+    scenario: Scenario,
+    first_worker_id: int,
+    clients: int,
+    warmup_duration: float,
+    step_duration: float,
+) -> LatencyRecorder:
+    record_from = clock() + warmup_duration
+    stop_at = record_from + step_duration
+    try:
+        recorders = await asyncio.gather(
+            *[
+                _client_loop(db, scenario, first_worker_id + c, record_from, stop_at)
+                for c in range(clients)
+            ]
+        )
+    finally:
+        await db.close()
+    return LatencyRecorder.merge(recorders)
+
+
+def _async_process_worker(
+    factory: DBFactory,
+    scenario: Scenario,
+    first_worker_id: int,
+    clients: int,
+    warmup_duration: float,
+    step_duration: float,
+    go: Any,
+    results: Any,
+) -> None:
+    try:
+        db = factory()
+        scenario.setup(db)
+    except Exception as e:
+        results.put(("error", repr(e)))
+        return
+
+    results.put(("ready", None))
+    go.wait()
+
+    recorder = asyncio.run(
+        _run_clients(db, scenario, first_worker_id, clients, warmup_duration, step_duration)
+    )
+    results.put(("done", (recorder.starts, recorder.latencies, recorder.errors)))
+
+
+class AsyncLoadTestRunner(LoadTestRunner):
+    """Closed loop load test where clients are asyncio tasks instead of threads.
+
+    Takes a factory of an AsyncVectorDB (e.g. `AsyncRedis`) and the same config as
+    `LoadTestRunner`; each process runs one event loop with its share of the clients,
+    so a few processes are enough to keep thousands of requests in flight.
+
+    Examples:
+        >>> config = LoadTestConfig(concurrency_steps=[1024, 8192], processes=4)
+        >>> report = AsyncLoadTestRunner(DBFactory(AsyncRedis, database_name="random_dataset"), config).run([SearchScenario(queries)])
+    """
+
+    _worker_target = staticmethod(_async_process_worker)
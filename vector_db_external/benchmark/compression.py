@@ -0,0 +1,163 @@
+import logging
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..vectordb.chroma import ChromaClient
+from ..vectordb.search_result import CompactSearchResult, EmbeddingSearchResult
+from ..vectordb.vectordb_api import VectorDB
+from .latency import LatencyRecorder, LatencySummary, clock
+
+
+log = logging.getLogger(__name__)
+
+
+class CompressionResult(BaseModel):
+    """Document bytes sent per query by one database, compared with the baseline database.
+
+    Args:
+        name(str): name of the database in the benchmark
+        algorithm(str): document codec of the database, "none" without one
+        dictionary_bytes(int): size of the codec dictionary
+        raw_bytes_per_query(float): utf-8 size of the documents returned per query
+        document_bytes_per_query(float): size of the documents as sent by the database, compressed or not,
+            base64 text for Chroma
+        compression_ratio(float): raw_bytes_per_query / document_bytes_per_query
+        bytes_saved_per_query(float): baseline document_bytes_per_query minus document_bytes_per_query
+        hash_bytes(float): memory per document (vector, document and metadata), None when the database can not tell
+    """
+
+    name: str
+    algorithm: str
+    dictionary_bytes: int = 0
+    raw_bytes_per_query: float
+    document_bytes_per_query: float
+    compression_ratio: float
+    bytes_saved_per_query: float = 0.0
+    hash_bytes: Optional[float] = None
+    latency: LatencySummary
+
+
+class CompressionReport(BaseModel):
+    k: int
+    baseline: str
+    results: List[CompressionResult] = []
+
+    def table(self) -> str:
+        """Plain text table with one row per database."""
+        header = (
+            f"{'name':<16}{'codec':<8}{'raw B/q':>11}{'sent B/q':>11}{'ratio':>8}{'saved B/q':>11}"
+            f"{'B/doc':>10}{'qps':>10}{'p99':>9}"
+        )
+        rows = [header]
+        for r in self.results:
+            memory = f"{r.hash_bytes:>10.0f}" if r.hash_bytes is not None else f"{'-':>10}"
+            rows.append(
+                f"{r.name:<16}{r.algorithm:<8}{r.raw_bytes_per_query:>11.0f}{r.document_bytes_per_query:>11.0f}"
+                f"{r.compression_ratio:>8.2f}{r.bytes_saved_per_query:>11.0f}{memory}"
+                f"{r.latency.qps:>10.1f}{r.latency.p99_ms:>9.2f}"
+            )
+        return "\n".join(rows)
+
+
+def _hash_bytes(db: VectorDB) -> Optional[float]:
+    memory_usage = getattr(db, "memory_usage", None)
+    return memory_usage().hash_bytes if memory_usage is not None else None
+
+
+def _sent_bytes(db: VectorDB, result: EmbeddingSearchResult | CompactSearchResult) -> int:
+    """Size of the documents of a result as the database sent them.
+
+    Compact results keep the documents as received. The documents of an
+    EmbeddingSearchResult are already decoded, so they are sized like the database
+    stores them with `compressed_size`, which leaves the codec stats alone: the
+    compressed bytes, or the base64 text of them for Chroma.
+    """
+    received = getattr(result, "received_documents", None)
+    if received is not None:
+        return sum(len(document) if isinstance(document, bytes) else len(document.encode()) for document in received if document)
+    codec = getattr(db, "document_codec", None)
+    documents = [document for document in result.documents or [] if document]
+    if codec is None:
+        return sum(len(document.encode()) for document in documents)
+    sizes = [codec.compressed_size(document) for document in documents]
+    if isinstance(db, ChromaClient):
+        return sum(4 * math.ceil(size / 3) for size in sizes)
+    return sum(sizes)
+
+
+class CompressionBenchmark:
+    """Document bytes per query and latency of the same documents stored with different codecs.
+
+    Each database holds the same documents, e.g. one Redis index without a codec and
+    one per `DocumentCodec`. Queries are sent one at a time from a single client and
+    every returned document is read, so the latency includes the decompression and
+    nothing else. The bytes sent per query are counted afterwards on the documents
+    as received, e.g. the base64 text of the compressed documents for Chroma, which
+    adds a third on the wire; create the clients with `compact_results=True` to count
+    the received bytes instead of encoding the decoded documents again. The first
+    database (or `baseline`) is the reference for the bytes saved.
+
+    Examples:
+        >>> codec = DocumentCodec.train(sample_documents, "zstd")
+        >>> report = CompressionBenchmark(queries, k=10).run({"raw": redis_raw, "zstd": redis_zstd})
+        >>> print(report.table())
+    """
+
+    def __init__(self, queries: np.ndarray | List[List[float]], k: int = 10, warmup_queries: int = 10):
+        self.queries = np.asarray(queries, dtype=np.float32)
+        self.k = k
+        self.warmup_queries = warmup_queries
+
+    def _measure(self, name: str, db: VectorDB) -> CompressionResult:
+        codec = getattr(db, "document_codec", None)
+        for query in self.queries[:self.warmup_queries]:
+            db.search_embedding(query.tolist(), k=self.k).documents
+
+        recorder = LatencyRecorder()
+        results = []
+        started = clock()
+        for query in self.queries:
+            query = query.tolist()
+            start = clock()
+            result = db.search_embedding(query, k=self.k)
+            result.documents
+            recorder.record(start, clock())
+            results.append(result)
+        latency = recorder.summary(clock() - started)
+
+        raw_bytes = sum(len(document.encode()) for result in results for document in result.documents or [] if document)
+        sent_bytes = sum(_sent_bytes(db, result) for result in results)
+
+        queries = max(len(self.queries), 1)
+        return CompressionResult(
+            name=name,
+            algorithm=codec.algorithm if codec is not None else "none",
+            dictionary_bytes=len(codec.dictionary) if codec is not None and codec.dictionary else 0,
+            raw_bytes_per_query=raw_bytes / queries,
+            document_bytes_per_query=sent_bytes / queries,
+            compression_ratio=raw_bytes / sent_bytes if sent_bytes else 1.0,
+            hash_bytes=_hash_bytes(db),
+            latency=latency,
+        )
+
+    def run(self, dbs: Dict[str, VectorDB], baseline: Optional[str] = None) -> CompressionReport:
+        """Measure every database.
+
+        Args:
+            dbs(dict[str, VectorDB]): databases holding the same documents, by name
+            baseline(str): name of the reference database, the first one by default
+        """
+        baseline = baseline if baseline is not None else next(iter(dbs))
+        report = CompressionReport(k=self.k, baseline=baseline)
+        for name, db in dbs.items():
+            result = self._measure(name, db)
+            log.info(f"{name}: {result.document_bytes_per_query:.0f} document bytes per query, ratio {result.compression_ratio:.2f}")
+            report.results.append(result)
+
+        reference = next(r for r in report.results if r.name == baseline)
+        for r in report.results:
+            r.bytes_saved_per_query = reference.document_bytes_per_query - r.document_bytes_per_query
+        return report
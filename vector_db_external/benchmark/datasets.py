@@ -0,0 +1,302 @@
+import csv
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+MANIFEST = "manifest.json"
+EMBEDDINGS = "embeddings.npy"
+
+
+class _StringColumnWriter:
+    """Appends utf-8 strings to `<name>.bin`, their boundaries go to `<name>_offsets.npy` on close."""
+
+    def __init__(self, output_dir: str, name: str):
+        self.output_dir = output_dir
+        self.name = name
+        self.file = open(os.path.join(output_dir, f"{name}.bin"), "wb")
+        self.offsets = [0]
+
+    def append(self, value: str) -> None:
+        data = value.encode("utf-8")
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self) -> None:
+        self.file.close()
+        np.save(os.path.join(self.output_dir, f"{self.name}_offsets.npy"), np.asarray(self.offsets, dtype=np.int64))
+
+
+class _StringColumn:
+    """Memory-mapped column of strings written by `_StringColumnWriter`."""
+
+    def __init__(self, path: str, name: str):
+        self.offsets = np.load(os.path.join(path, f"{name}_offsets.npy"), mmap_mode="r")
+        size = int(self.offsets[-1])
+        # np.memmap can not map empty files
+        self.data = np.memmap(os.path.join(path, f"{name}.bin"), dtype=np.uint8, mode="r") if size else np.zeros(0, np.uint8)
+
+    def slice(self, start: int, stop: int) -> List[str]:
+        offsets = self.offsets[start:stop + 1]
+        chunk = self.data[offsets[0]:offsets[-1]].tobytes()
+        base = offsets[0]
+        return [chunk[a - base:b - base].decode("utf-8") for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def convert_records(
+    records: Iterable[dict],
+    output_dir: str,
+    vector_dimension: Optional[int] = None,
+) -> "MemmapDataset":
+    """Convert a stream of records into the on-disk layout read by `MemmapDataset`.
+
+    Each record is a dict with "id", "embedding" and optionally "document" and
+    "metadata" (dict of key and value). Records are written as they are read, so the
+    source never has to fit in memory.
+
+    Layout of `output_dir`:
+        embeddings.npy: (n, dim) float32 matrix
+        ids.bin, ids_offsets.npy: ids as concatenated utf-8 plus row boundaries
+        documents.bin, documents_offsets.npy: same for documents, when any record has one
+        metadata_<key>.npy: int32 dictionary codes of each metadata key, -1 when absent
+        manifest.json: row count, dimension and the values behind the metadata codes
+
+    Args:
+        records(Iterable[dict]): dataset rows
+        output_dir(str): directory to write to, created if needed
+        vector_dimension(int): expected dimension, taken from the first record when not given
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    raw_path = os.path.join(output_dir, EMBEDDINGS + ".tmp")
+
+    ids = _StringColumnWriter(output_dir, "ids")
+    documents = _StringColumnWriter(output_dir, "documents")
+    has_documents = False
+    metadata_values: Dict[str, Dict[Any, int]] = {}
+    metadata_codes: Dict[str, List[int]] = {}
+
+    n = 0
+    with open(raw_path, "wb") as raw:
+        for record in records:
+            embedding = np.asarray(record["embedding"], dtype=np.float32)
+            if vector_dimension is None:
+                vector_dimension = embedding.shape[0]
+            if embedding.shape != (vector_dimension,):
+                raise ValueError(f"record {record['id']} has dimension {embedding.shape}, expected {vector_dimension}")
+            raw.write(embedding.tobytes())
+
+            ids.append(str(record["id"]))
+
+            document = record.get("document")
+            if document is not None:
+                has_documents = True
+            documents.append(document or "")
+
+            for key, value in (record.get("metadata") or {}).items():
+                if key not in metadata_values:
+                    metadata_values[key] = {}
+                    metadata_codes[key] = [-1] * n
+                metadata_codes[key].append(metadata_values[key].setdefault(value, len(metadata_values[key])))
+            for key, codes in metadata_codes.items():
+                if len(codes) == n:
+                    codes.append(-1)
+            n += 1
+
+    ids.close()
+    documents.close()
+    if not has_documents:
+        for name in ("documents.bin", "documents_offsets.npy"):
+            os.remove(os.path.join(output_dir, name))
+
+    embeddings = np.lib.format.open_memmap(
+        os.path.join(output_dir, EMBEDDINGS), mode="w+", dtype=np.float32, shape=(n, vector_dimension or 0)
+    )
+    if n:
+        raw = np.memmap(raw_path, dtype=np.float32, mode="r", shape=(n, vector_dimension))
+        chunk_rows = max(1, (64 * 1024 * 1024) // (vector_dimension * 4))
+        for start in range(0, n, chunk_rows):
+            embeddings[start:start + chunk_rows] = raw[start:start + chunk_rows]
+        del raw
+    embeddings.flush()
+    del embeddings
+    os.remove(raw_path)
+
+    for key, codes in metadata_codes.items():
+        np.save(os.path.join(output_dir, f"metadata_{key}.npy"), np.asarray(codes, dtype=np.int32))
+
+    with open(os.path.join(output_dir, MANIFEST), "w") as f:
+        json.dump(
+            {
+                "size": n,
+                "vector_dimension": vector_dimension,
+                "has_documents": has_documents,
+                "metadata": {key: list(values) for key, values in metadata_values.items()},
+            },
+            f,
+        )
+
+    return MemmapDataset(output_dir)
+
+
+def _parse_json_field(value: Any) -> Any:
+    if isinstance(value, str) and value[:1] in ("[", "{"):
+        return json.loads(value)
+    return value
+
+
+def read_csv(
+    path: str,
+    id_field: str = "id",
+    embedding_field: str = "embedding",
+    document_field: Optional[str] = None,
+    metadata_field: Optional[str] = None,
+    metadata_fields: Optional[List[str]] = None,
+) -> Iterator[dict]:
+    """Stream records for `convert_records` out of a CSV file.
+
+    Embeddings (and a metadata column) may be stored as JSON strings, as in the
+    OpenAI Wikipedia dataset where `content_vector` is "[0.1, ...]".
+
+    Args:
+        path(str): csv file
+        id_field(str): column with the document id
+        embedding_field(str): column with the embedding
+        document_field(str): column with the document text
+        metadata_field(str): column holding a JSON dict of metadata
+        metadata_fields(list[str]): columns stored as metadata, one key per column
+    """
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield _record(row, id_field, embedding_field, document_field, metadata_field, metadata_fields)
+
+
+def read_jsonl(
+    path: str,
+    id_field: str = "id",
+    embedding_field: str = "embedding",
+    document_field: Optional[str] = None,
+    metadata_field: Optional[str] = None,
+    metadata_fields: Optional[List[str]] = None,
+) -> Iterator[dict]:
+    """Stream records for `convert_records` out of a JSON lines file, see `read_csv`."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield _record(json.loads(line), id_field, embedding_field, document_field, metadata_field, metadata_fields)
+
+
+def _record(
+    row: dict,
+    id_field: str,
+    embedding_field: str,
+    document_field: Optional[str],
+    metadata_field: Optional[str],
+    metadata_fields: Optional[List[str]],
+) -> dict:
+    metadata = {}
+    if metadata_field:
+        metadata.update(_parse_json_field(row[metadata_field]) or {})
+    for field in metadata_fields or []:
+        metadata[field] = row[field]
+
+    return {
+        "id": row[id_field],
+        "embedding": _parse_json_field(row[embedding_field]),
+        "document": row[document_field] if document_field else None,
+        "metadata": metadata or None,
+    }
+
+
+class MemmapDataset:
+    """Dataset converted by `convert_records`, read through memory maps.
+
+    Embeddings are never loaded as a whole: batches hold zero-copy slices of the
+    memory-mapped float32 matrix, so every process reading the same dataset shares
+    the same page cache. Ids, documents and metadata are decoded one batch at a time.
+    Pickling a MemmapDataset only sends its path, the receiving process maps the files again.
+
+    Examples:
+        >>> dataset = MemmapDataset("data/random_dataset")
+        >>> for batch in dataset.batches(1000):
+        >>>     redis.insert_embeddings(**batch)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+
+        self.embeddings = np.load(os.path.join(path, EMBEDDINGS), mmap_mode="r")
+        self.ids = _StringColumn(path, "ids")
+        self.documents = _StringColumn(path, "documents") if self.manifest["has_documents"] else None
+        self.metadata_values: Dict[str, list] = self.manifest["metadata"]
+        self.metadata_codes: Dict[str, np.ndarray] = {
+            key: np.load(os.path.join(path, f"metadata_{key}.npy"), mmap_mode="r")
+            for key in self.metadata_values
+        }
+
+    def __len__(self) -> int:
+        return self.manifest["size"]
+
+    @property
+    def vector_dimension(self) -> int:
+        return self.manifest["vector_dimension"]
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"])
+
+    def metadata_column(self, key: str) -> Tuple[np.ndarray, list]:
+        """Dictionary codes of `key` for every row (-1 when absent) and the values they stand for."""
+        return self.metadata_codes[key], self.metadata_values[key]
+
+    def filter_mask(self, filters: dict | None) -> Optional[np.ndarray]:
+        """Boolean mask of the rows whose metadata matches every key and value of `filters`, None when unfiltered."""
+        if not filters:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        for key, value in filters.items():
+            if key not in self.metadata_codes or value not in self.metadata_values[key]:
+                return np.zeros(len(self), dtype=bool)
+            mask &= np.asarray(self.metadata_codes[key]) == self.metadata_values[key].index(value)
+        return mask
+
+    def batch(self, start: int, stop: int) -> dict:
+        """Rows [start, stop) as insert_embeddings keyword arguments."""
+        stop = min(stop, len(self))
+
+        metadata = None
+        if self.metadata_codes:
+            columns = [
+                (key, self.metadata_codes[key][start:stop], self.metadata_values[key])
+                for key in self.metadata_codes
+            ]
+            metadata = [
+                {key: values[codes[i]] for key, codes, values in columns if codes[i] >= 0}
+                for i in range(stop - start)
+            ]
+
+        return {
+            "ids": self.ids.slice(start, stop),
+            "embeddings": self.embeddings[start:stop],
+            "documents": self.documents.slice(start, stop) if self.documents is not None else None,
+            "metadata": metadata,
+        }
+
+    def batches(self, batch_size: int = 1000, start: int = 0, stop: Optional[int] = None) -> Iterator[dict]:
+        """Lazily yield rows [start, stop) in batches of insert_embeddings keyword arguments."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for batch_start in range(start, stop, batch_size):
+            yield self.batch(batch_start, min(batch_start + batch_size, stop))
+
+    def sample_queries(self, n: int, seed: int = 0) -> np.ndarray:
+        """Copy of n randomly chosen embeddings, e.g. to use as benchmark queries."""
+        rng = np.random.default_rng(seed)
+        indexes = np.sort(rng.choice(len(self), size=min(n, len(self)), replace=False))
+        return np.array(self.embeddings[indexes])
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..vectordb.numpy_db import metric_distances, normalize
+from ..vectordb.vectordb_api import MetricType, VectorDB, batch_filters, group_by_filter
+from .datasets import EMBEDDINGS, MemmapDataset
+
+
+log = logging.getLogger(__name__)
+
+
+class QualityReport(BaseModel):
+    """Retrieval quality of one query set against the exact top-k neighbours.
+
+    recall, precision and f1 are averaged over the queries. A query whose filter
+    matches fewer than k rows only expects those rows.
+    """
+
+    name: str
+    k: int
+    queries: int
+    recall: float
+    precision: float
+    f1: float
+
+
+def quality_table(reports: List[QualityReport]) -> str:
+    """Plain text table with one row per report."""
+    header = f"{'scenario':<20}{'k':>6}{'queries':>9}{'recall':>10}{'precision':>11}{'f1':>10}"
+    rows = [header]
+    for r in reports:
+        rows.append(f"{r.name:<20}{r.k:>6}{r.queries:>9}{r.recall:>10.4f}{r.precision:>11.4f}{r.f1:>10.4f}")
+    return "\n".join(rows)
+
+
+def score(retrieved: List[List[str]], relevant: List[List[str]], k: int, name: str = "search") -> QualityReport:
+    """recall@k, precision and F1 of the retrieved ids given the relevant (exact) ids of each query."""
+    recalls = []
+    precisions = []
+    f1s = []
+    for retrieved_ids, relevant_ids in zip(retrieved, relevant):
+        retrieved_ids = set(retrieved_ids[:k])
+        relevant_ids = set(relevant_ids)
+        hits = len(retrieved_ids & relevant_ids)
+        # nothing to find and nothing returned is a perfect answer
+        recall = hits / len(relevant_ids) if relevant_ids else float(not retrieved_ids)
+        precision = hits / len(retrieved_ids) if retrieved_ids else float(not relevant_ids)
+        recalls.append(recall)
+        precisions.append(precision)
+        f1s.append(2 * recall * precision / (recall + precision) if recall + precision else 0.0)
+
+    return QualityReport(
+        name=name,
+        k=k,
+        queries=len(recalls),
+        recall=float(np.mean(recalls)) if recalls else 0.0,
+        precision=float(np.mean(precisions)) if precisions else 0.0,
+        f1=float(np.mean(f1s)) if f1s else 0.0,
+    )
+
+
+class RetrievalEvaluator:
+    """Measures recall@k, precision and F1 of any VectorDB against exact search on a `MemmapDataset`.
+
+    The exact neighbours are computed by streaming the memory-mapped embeddings in
+    chunks of `chunk_rows`, keeping a running top-k per query, so the dataset never has
+    to fit in memory. They are cached in `cache_dir` as .npz files keyed by the
+    dataset, metric, k, filters and queries: later runs with the same inputs only
+    pay for the searches.
+
+    Examples:
+        >>> evaluator = RetrievalEvaluator(MemmapDataset("data/random_dataset"))
+        >>> queries = evaluator.dataset.sample_queries(1000)
+        >>> reports = evaluator.evaluate_all(redis, queries, k=10, filter_sets={"filtered_search": {"a": "keyword_1"}})
+        >>> print(quality_table(reports))
+    """
+
+    def __init__(
+        self,
+        dataset: MemmapDataset,
+        metric_type: MetricType = MetricType.COSINE,
+        cache_dir: Optional[str] = ".ground_truth",
+        chunk_rows: int = 8192,
+        query_chunk_size: int = 256,
+    ):
+        self.dataset = dataset
+        self.metric_type = MetricType(metric_type)
+        self.cache_dir = cache_dir
+        self.chunk_rows = chunk_rows
+        self.query_chunk_size = query_chunk_size
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        if self.metric_type == MetricType.COSINE:
+            return normalize(vectors)
+        return np.array(vectors, dtype=np.float32, ndmin=2)
+
+    def cache_key(self, queries: np.ndarray, k: int, filters: dict | List[dict] | None) -> str:
+        embeddings = os.path.join(self.dataset.path, EMBEDDINGS)
+        stat = os.stat(embeddings)
+        key = {
+            "dataset": os.path.abspath(self.dataset.path),
+            "size": len(self.dataset),
+            "modified": stat.st_mtime_ns,
+            "metric": self.metric_type.value,
+            "k": k,
+            "filters": filters,
+            "queries": hashlib.sha256(np.ascontiguousarray(queries, dtype=np.float32).tobytes()).hexdigest(),
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+    def ground_truth(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict | List[dict] | None = None,
+    ) -> List[List[str]]:
+        """Ids of the exact k nearest rows of each query, read from the cache when possible."""
+        queries = np.asarray(queries, dtype=np.float32)
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f"ground_truth_{self.cache_key(queries, k, filters)}.npz")
+            if os.path.exists(path):
+                log.info(f"ground truth read from {path}")
+                rows = np.load(path)["rows"]
+                return self._ids(rows)
+
+        rows, _ = self.exact_neighbours(queries, k, filters)
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + ".tmp.npz"
+            np.savez(tmp_path, rows=rows)
+            os.replace(tmp_path, path)
+            log.info(f"ground truth written to {path}")
+        return self._ids(rows)
+
+    def _ids(self, rows: np.ndarray) -> List[List[str]]:
+        ids = self.dataset.ids
+        return [[ids.slice(row, row + 1)[0] for row in query_rows if row >= 0] for query_rows in rows]
+
+    def exact_neighbours(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        filters: dict | List[dict] | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(n_queries, k) row numbers and distances of the exact neighbours, padded with -1 and inf.
+
+        Each chunk of `chunk_rows` dataset rows is read and prepared once and compared
+        with every query, the best k of the chunk are merged into the running top-k.
+        """
+        queries = self._prepare(queries)
+        n = len(queries)
+        best_rows = np.full((n, k), -1, dtype=np.int64)
+        best_distances = np.full((n, k), np.inf, dtype=np.float32)
+        groups = [(indexes, self.dataset.filter_mask(query_filters)) for query_filters, indexes in group_by_filter(filters, n)]
+
+        for start in range(0, len(self.dataset), self.chunk_rows):
+            stop = min(start + self.chunk_rows, len(self.dataset))
+            vectors = self._prepare(self.dataset.embeddings[start:stop])
+            chunk_rows = np.arange(start, stop)
+            for indexes, mask in groups:
+                group_vectors, group_rows = vectors, chunk_rows
+                if mask is not None:
+                    selected = np.flatnonzero(mask[start:stop])
+                    if not len(selected):
+                        continue
+                    group_vectors, group_rows = vectors[selected], chunk_rows[selected]
+
+                for q_start in range(0, len(indexes), self.query_chunk_size):
+                    chunk = indexes[q_start:q_start + self.query_chunk_size]
+                    distances = metric_distances(queries[chunk], group_vectors, self.metric_type)
+                    candidates = np.hstack([best_distances[chunk], distances])
+                    candidate_rows = np.hstack([best_rows[chunk], np.broadcast_to(group_rows, distances.shape)])
+                    top = np.argpartition(candidates, k - 1, axis=1)[:, :k] if candidates.shape[1] > k else None
+                    if top is not None:
+                        candidates = np.take_along_axis(candidates, top, axis=1)
+                        candidate_rows = np.take_along_axis(candidate_rows, top, axis=1)
+                    best_distances[chunk] = candidates
+                    best_rows[chunk] = candidate_rows
+
+        # closest first, ties broken by row number; padding (inf) goes last
+        for i in range(n):
+            order = np.lexsort((best_rows[i], best_distances[i]))
+            best_rows[i] = best_rows[i][order]
+            best_distances[i] = best_distances[i][order]
+        best_rows[np.isinf(best_distances)] = -1
+        return best_rows, best_distances
+
+    def evaluate(
+        self,
+        db: VectorDB,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict | List[dict] | None = None,
+        name: str = "search",
+        batch: bool = False,
+        **search_kwargs,
+    ) -> QualityReport:
+        """Run the queries through `db` and score the returned ids against the exact neighbours.
+
+        Args:
+            db(VectorDB): database loaded with the same dataset
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results per query
+            filters(dict | list[dict]): filter applied to every query, or one filter per query
+            name(str): name of the report
+            batch(bool): use search_embeddings_batch instead of one search_embedding per query
+            search_kwargs: other arguments passed to the search
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        relevant = self.ground_truth(queries, k, filters)
+
+        if batch:
+            results = db.search_embeddings_batch(queries, k=k, filters=filters, **search_kwargs)
+        else:
+            results = [
+                db.search_embedding(query.tolist(), k=k, filters=query_filters, **search_kwargs)
+                for query, query_filters in zip(queries, batch_filters(filters, len(queries)))
+            ]
+        return score([result.ids for result in results], relevant, k, name=name)
+
+    def evaluate_all(
+        self,
+        db: VectorDB,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filter_sets: Optional[Dict[str, dict | List[dict]]] = None,
+        **kwargs,
+    ) -> List[QualityReport]:
+        """Unfiltered report named "search" followed by one report per named filter set."""
+        reports = [self.evaluate(db, queries, k=k, **kwargs)]
+        for name, filters in (filter_sets or {}).items():
+            reports.append(self.evaluate(db, queries, k=k, filters=filters, name=name, **kwargs))
+        return reports
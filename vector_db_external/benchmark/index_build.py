@@ -0,0 +1,148 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from .ingest import BulkLoadConfig, BulkLoader, IngestReport
+from .latency import clock
+from .runner import DBFactory
+
+
+log = logging.getLogger(__name__)
+
+
+class IndexBuildResult(BaseModel):
+    """Time until a freshly loaded dataset is searchable.
+
+    Args:
+        name(str): name of the database in the benchmark
+        vectors(int): vectors inserted
+        insert_seconds(float): until every insert call returned, see `ingest`
+        indexing_seconds(float): waiting for the index after the inserts (`wait_for_indexed`)
+        searchable_seconds(float): insert_seconds + indexing_seconds
+        insert_rate(float): vectors per second acknowledged by the inserts
+        build_rate(float): vectors per second until searchable
+        probe_found(bool): whether a search for the last inserted vector returned it, None without probe
+        ingest(IngestReport): bulk load report of the insert phase
+    """
+
+    name: str
+    vectors: int
+    insert_seconds: float
+    indexing_seconds: float
+    searchable_seconds: float
+    insert_rate: float
+    build_rate: float
+    probe_found: Optional[bool] = None
+    ingest: IngestReport
+
+
+class IndexBuildReport(BaseModel):
+    results: List[IndexBuildResult] = []
+
+    def table(self) -> str:
+        """Plain text table with one row per database."""
+        header = (
+            f"{'name':<20}{'vectors':>10}{'insert s':>10}{'indexing s':>12}{'searchable s':>14}"
+            f"{'insert/s':>12}{'build/s':>12}{'probe':>7}"
+        )
+        rows = [header]
+        for r in self.results:
+            probe = "-" if r.probe_found is None else ("ok" if r.probe_found else "miss")
+            rows.append(
+                f"{r.name:<20}{r.vectors:>10}{r.insert_seconds:>10.2f}{r.indexing_seconds:>12.2f}"
+                f"{r.searchable_seconds:>14.2f}{r.insert_rate:>12.1f}{r.build_rate:>12.1f}{probe:>7}"
+            )
+        return "\n".join(rows)
+
+
+class IndexBuildBenchmark:
+    """End to end time from the first insert until the data is searchable, and the index build rate.
+
+    Each database is loaded with `BulkLoader`, then one client waits in
+    `wait_for_indexed` until the database reports every document indexed: RediSearch
+    acknowledges HSETs before indexing them, so the insert throughput alone overstates
+    the build rate. With `probe` the last inserted vector is then searched, as a check
+    that the data really is searchable. Every factory must start from an empty
+    collection (e.g. create one client with `drop_old=True` before running), and must
+    not drop it itself since the loader creates one client per worker.
+
+    Examples:
+        >>> benchmark = IndexBuildBenchmark(BulkLoadConfig(workers=16))
+        >>> report = benchmark.run({"m16": redis_m16_factory, "m32": redis_m32_factory}, ids, embeddings)
+        >>> print(report.table())
+
+    Args:
+        config(BulkLoadConfig): bulk load parameters of the insert phase
+        timeout(float): seconds to wait for the index before raising TimeoutError
+        probe(bool): search the last inserted vector once the database reports it indexed
+    """
+
+    def __init__(self, config: Optional[BulkLoadConfig] = None, timeout: float = 3600, probe: bool = True):
+        self.config = config if config is not None else BulkLoadConfig()
+        self.timeout = timeout
+        self.probe = probe
+
+    def measure(
+        self,
+        name: str,
+        factory: DBFactory,
+        ids: List[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+    ) -> IndexBuildResult:
+        ingest = BulkLoader(factory, self.config).load(ids=ids, embeddings=embeddings, documents=documents, metadata=metadata)
+        db = factory()
+        try:
+            started = clock()
+            db.wait_for_indexed(self.timeout, min_documents=ingest.vectors)
+            indexing_seconds = clock() - started
+
+            probe_found = None
+            if self.probe and len(ids):
+                query = np.asarray(embeddings[-1], dtype=np.float32).tolist()
+                probe_found = ids[-1] in db.search_embedding(query, k=10).ids
+        finally:
+            db.close()
+
+        searchable_seconds = ingest.duration + indexing_seconds
+        return IndexBuildResult(
+            name=name,
+            vectors=ingest.vectors,
+            insert_seconds=ingest.duration,
+            indexing_seconds=indexing_seconds,
+            searchable_seconds=searchable_seconds,
+            insert_rate=ingest.vectors_per_sec,
+            build_rate=ingest.vectors / searchable_seconds if searchable_seconds > 0 else 0.0,
+            probe_found=probe_found,
+            ingest=ingest,
+        )
+
+    def run(
+        self,
+        factories: Dict[str, DBFactory],
+        ids: List[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+    ) -> IndexBuildReport:
+        """Load the same dataset into every database and measure each build.
+
+        Args:
+            factories(dict[str, DBFactory]): factories of empty databases, by name
+            ids(list[str]): ids of the dataset
+            embeddings(np.ndarray): (n, dim) embeddings of the dataset
+            documents(list[str]): documents of the dataset
+            metadata(list[dict]): metadata of the dataset
+        """
+        report = IndexBuildReport()
+        for name, factory in factories.items():
+            result = self.measure(name, factory, ids, embeddings, documents, metadata)
+            log.info(
+                f"{name}: {result.vectors} vectors searchable after {result.searchable_seconds:.2f}s "
+                f"({result.indexing_seconds:.2f}s indexing), {result.build_rate:.1f} vectors/s"
+            )
+            report.results.append(result)
+        return report
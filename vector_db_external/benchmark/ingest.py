@@ -0,0 +1,306 @@
+import logging
+import multiprocessing
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..vectordb.vectordb_api import VectorDB
+from .latency import clock
+from .runner import DBFactory
+
+
+log = logging.getLogger(__name__)
+
+# seconds between two checks of the worker processes while waiting on a queue
+_POLL_INTERVAL = 0.5
+
+
+class BulkLoadConfig(BaseModel):
+    """Bulk load parameters.
+
+    Args:
+        workers(int): number of connections inserting in parallel
+        mode(str): "thread" runs the workers as threads, "process" as processes
+        chunk_size(int): rows per insert_embeddings call, capped by the database's max_insert_batch_size
+        queue_chunks(int): chunks buffered per worker before the producer blocks
+        report_interval(float): seconds between throughput samples
+        start_method(str): multiprocessing start method when mode is "process"
+        start_timeout(float): seconds to wait for the workers to connect
+    """
+
+    workers: int = 8
+    mode: Literal["thread", "process"] = "thread"
+    chunk_size: int = 1000
+    queue_chunks: int = 2
+    report_interval: float = 1.0
+    start_method: Optional[str] = None
+    start_timeout: float = 120.0
+
+
+class IngestSample(BaseModel):
+    """Throughput during one `report_interval`, `elapsed` is measured from the start of the load."""
+
+    elapsed: float
+    vectors: int
+    vectors_per_sec: float
+    mb_per_sec: float
+
+
+class IngestReport(BaseModel):
+    vectors: int
+    bytes: int
+    errors: int
+    duration: float
+    vectors_per_sec: float
+    mb_per_sec: float
+    timeline: List[IngestSample] = []
+
+
+def chunk_bytes(chunk: dict) -> int:
+    """Approximate payload size of an insert_embeddings call: vectors plus documents."""
+    nbytes = np.asarray(chunk["embeddings"], dtype=np.float32).nbytes
+    if chunk.get("documents"):
+        nbytes += sum(len(document) for document in chunk["documents"] if document)
+    return nbytes
+
+
+def rechunk(batches: Iterable[dict], chunk_size: int) -> Iterator[dict]:
+    """Split insert_embeddings keyword arguments into chunks of at most `chunk_size` rows."""
+    for batch in batches:
+        n = len(batch["ids"])
+        if n <= chunk_size:
+            yield batch
+            continue
+        for start in range(0, n, chunk_size):
+            end = start + chunk_size
+            yield {
+                key: value[start:end] if value is not None else None
+                for key, value in batch.items()
+            }
+
+
+def _ingest_worker(connect: Callable[[], VectorDB], tasks: Any, progress: Any) -> None:
+    try:
+        db = connect()
+    except Exception as e:
+        progress.put(("error", repr(e)))
+        return
+
+    progress.put(("ready", db.max_insert_batch_size()))
+    while True:
+        chunk = tasks.get()
+        if chunk is None:
+            break
+        try:
+            db.insert_embeddings(**chunk)
+        except Exception as e:
+            progress.put(("failed", (clock(), len(chunk["ids"]), repr(e))))
+        else:
+            progress.put(("inserted", (clock(), len(chunk["ids"]), chunk_bytes(chunk))))
+    db.close()
+    progress.put(("done", None))
+
+
+def _check_alive(workers: List[Any]) -> None:
+    """Raise if a worker process died, e.g. killed by the OOM killer, it will never report again."""
+    for worker in workers:
+        exitcode = getattr(worker, "exitcode", None)
+        if exitcode not in (None, 0):
+            raise RuntimeError(f"bulk load worker process {worker.pid} exited with code {exitcode}")
+
+
+class BulkLoader:
+    """Loads a dataset through `config.workers` parallel connections.
+
+    Chunks are handed to the workers through a bounded queue: when every worker is
+    busy and the queue is full the producer blocks, so memory stays bounded however
+    fast the dataset is read. Vectors/sec and MB/sec are sampled every
+    `config.report_interval` seconds. A worker process that dies, e.g. killed by the
+    OOM killer, fails the load with a RuntimeError instead of blocking it forever.
+
+    Examples:
+        >>> loader = BulkLoader(DBFactory(Redis, database_name="random_dataset"), BulkLoadConfig(workers=16))
+        >>> report = loader.load(ids=ids, embeddings=embeddings, metadata=metadata)
+        >>> report.vectors_per_sec
+    """
+
+    def __init__(self, factory: DBFactory, config: Optional[BulkLoadConfig] = None):
+        self.factory = factory
+        self.config = config if config is not None else BulkLoadConfig()
+
+    def load(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+    ) -> IngestReport:
+        """Load a whole dataset given as insert_embeddings arguments."""
+        return self.load_batches([dict(ids=ids, embeddings=embeddings, documents=documents, metadata=metadata)])
+
+    def load_batches(self, batches: Iterable[dict]) -> IngestReport:
+        """Load batches of insert_embeddings keyword arguments, e.g. read lazily from disk."""
+        if self.config.mode == "process":
+            context = multiprocessing.get_context(self.config.start_method)
+            tasks = context.Queue(maxsize=self.config.workers * self.config.queue_chunks)
+            progress = context.Queue()
+            workers = [
+                context.Process(target=_ingest_worker, args=(self.factory, tasks, progress), daemon=True)
+                for _ in range(self.config.workers)
+            ]
+        else:
+            tasks = queue.Queue(maxsize=self.config.workers * self.config.queue_chunks)
+            progress = queue.Queue()
+            # clients are created one at a time, some (e.g. Chroma's PersistentClient) can not be created concurrently
+            dbs = [self.factory() for _ in range(self.config.workers)]
+            workers = [
+                threading.Thread(target=_ingest_worker, args=(lambda db=db: db, tasks, progress), daemon=True)
+                for db in dbs
+            ]
+
+        for worker in workers:
+            worker.start()
+
+        try:
+            limits = self._wait_ready(progress, workers)
+        except BaseException:
+            self._stop(workers, tasks)
+            raise
+        chunk_size = min([self.config.chunk_size] + [limit for limit in limits if limit])
+
+        events = []
+        failures = []
+        collector = threading.Thread(target=self._collect, args=(progress, workers, events, failures), daemon=True)
+        started = clock()
+        collector.start()
+
+        try:
+            for chunk in rechunk(batches, chunk_size):
+                self._put(tasks, chunk, workers, failures)
+            for _ in workers:
+                self._put(tasks, None, workers, failures)
+            collector.join()
+        except BaseException:
+            self._stop(workers, tasks)
+            raise
+        for worker in workers:
+            worker.join()
+        if failures:
+            raise RuntimeError(failures[0])
+
+        return self._report(events, started, clock())
+
+    def _wait_ready(self, progress: Any, workers: List[Any]) -> List[Optional[int]]:
+        """Max insert batch size of every worker, once all of them are connected."""
+        deadline = clock() + self.config.start_timeout
+        limits = []
+        while len(limits) < len(workers):
+            remaining = deadline - clock()
+            if remaining <= 0:
+                raise TimeoutError(f"only {len(limits)} of {len(workers)} bulk load workers connected")
+            try:
+                status, payload = progress.get(timeout=min(remaining, _POLL_INTERVAL))
+            except queue.Empty:
+                _check_alive(workers)
+                continue
+            if status == "error":
+                raise RuntimeError(f"bulk load worker failed to connect: {payload}")
+            limits.append(payload)
+        return limits
+
+    def _put(self, tasks: Any, chunk: Optional[dict], workers: List[Any], failures: List[str]) -> None:
+        """Queue a chunk, failing instead of blocking forever when the workers died."""
+        while True:
+            if failures:
+                raise RuntimeError(failures[0])
+            try:
+                tasks.put(chunk, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                _check_alive(workers)
+
+    def _stop(self, workers: List[Any], tasks: Any) -> None:
+        """Stop the workers after a failure: processes are terminated, threads get their end marker."""
+        for worker in workers:
+            if isinstance(worker, threading.Thread):
+                tasks.put(None)
+            elif worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join(timeout=5)
+
+    def _collect(self, progress: Any, workers: List[Any], events: List[tuple], failures: List[str]) -> None:
+        done = 0
+        last_log = clock()
+        logged_vectors = 0
+        vectors = 0
+        while done < len(workers):
+            try:
+                status, payload = progress.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                try:
+                    _check_alive(workers)
+                except RuntimeError as e:
+                    failures.append(str(e))
+                    return
+                continue
+            if status == "done":
+                done += 1
+                continue
+            events.append((status, payload))
+            if status == "inserted":
+                vectors += payload[1]
+            else:
+                log.warning(f"bulk load chunk of {payload[1]} vectors failed: {payload[2]}")
+
+            now = clock()
+            if now - last_log >= self.config.report_interval:
+                log.info(f"bulk load: {vectors} vectors, {(vectors - logged_vectors) / (now - last_log):.1f} vectors/s")
+                last_log = now
+                logged_vectors = vectors
+
+    def _report(self, events: List[tuple], started: float, finished: float) -> IngestReport:
+        duration = finished - started
+        interval = self.config.report_interval
+        buckets = int(np.ceil(duration / interval)) if duration > 0 else 0
+        bucket_vectors = np.zeros(buckets, dtype=np.int64)
+        bucket_bytes = np.zeros(buckets, dtype=np.int64)
+
+        vectors = 0
+        nbytes = 0
+        errors = 0
+        for status, payload in events:
+            if status != "inserted":
+                errors += payload[1]
+                continue
+            timestamp, rows, chunk_nbytes = payload
+            vectors += rows
+            nbytes += chunk_nbytes
+            bucket = min(buckets - 1, int((timestamp - started) / interval))
+            bucket_vectors[bucket] += rows
+            bucket_bytes[bucket] += chunk_nbytes
+
+        timeline = []
+        for bucket in range(buckets):
+            width = min(interval, duration - bucket * interval)
+            timeline.append(
+                IngestSample(
+                    elapsed=bucket * interval + width,
+                    vectors=int(bucket_vectors[bucket]),
+                    vectors_per_sec=bucket_vectors[bucket] / width,
+                    mb_per_sec=bucket_bytes[bucket] / width / 1e6,
+                )
+            )
+
+        return IngestReport(
+            vectors=vectors,
+            bytes=nbytes,
+            errors=errors,
+            duration=duration,
+            vectors_per_sec=vectors / duration if duration > 0 else 0.0,
+            mb_per_sec=nbytes / duration / 1e6 if duration > 0 else 0.0,
+            timeline=timeline,
+        )
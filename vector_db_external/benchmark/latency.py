@@ -0,0 +1,93 @@
+import time
+from typing import Iterable, List
+
+import numpy as np
+from pydantic import BaseModel
+
+
+# Every timestamp taken by the benchmark (latencies, ramp steps, resource samples)
+# comes from this clock so timelines recorded in different threads or processes line up.
+clock = time.perf_counter
+
+
+class LatencySummary(BaseModel):
+    """Throughput and latency percentiles of a set of timed operations.
+
+    Latencies are reported in milliseconds, duration in seconds.
+    """
+
+    count: int
+    errors: int
+    duration: float
+    qps: float
+    avg_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class LatencyRecorder:
+    """Collects (start, latency) pairs for one thread of a benchmark.
+
+    Recorders are not thread safe, each worker thread should own one and they can be
+    combined afterwards with `LatencyRecorder.merge`.
+    """
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def record(self, start: float, end: float) -> None:
+        self.starts.append(start)
+        self.latencies.append(end - start)
+
+    def record_error(self) -> None:
+        self.errors += 1
+
+    def __len__(self) -> int:
+        return len(self.latencies)
+
+    @classmethod
+    def merge(cls, recorders: Iterable["LatencyRecorder"]) -> "LatencyRecorder":
+        merged = cls()
+        for recorder in recorders:
+            merged.starts.extend(recorder.starts)
+            merged.latencies.extend(recorder.latencies)
+            merged.errors += recorder.errors
+        return merged
+
+    def summary(self, duration: float) -> LatencySummary:
+        return summarize(np.asarray(self.latencies, dtype=np.float64), self.errors, duration)
+
+
+def summarize(latencies: np.ndarray, errors: int, duration: float) -> LatencySummary:
+    """Summarize latencies (in seconds) measured over a window of `duration` seconds."""
+    count = int(latencies.size)
+    if count == 0:
+        return LatencySummary(
+            count=0,
+            errors=errors,
+            duration=duration,
+            qps=0.0,
+            avg_ms=0.0,
+            p50_ms=0.0,
+            p95_ms=0.0,
+            p99_ms=0.0,
+            max_ms=0.0,
+        )
+
+    latencies_ms = latencies * 1000.0
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return LatencySummary(
+        count=count,
+        errors=errors,
+        duration=duration,
+        qps=count / duration if duration > 0 else 0.0,
+        avg_ms=float(latencies_ms.mean()),
+        p50_ms=float(p50),
+        p95_ms=float(p95),
+        p99_ms=float(p99),
+        max_ms=float(latencies_ms.max()),
+    )
@@ -0,0 +1,258 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .latency import LatencyRecorder, LatencySummary, clock
+from .runner import DBFactory, ProcessRunner, RunnerConfig, _client_loop, split_clients
+from .scenarios import Scenario
+
+
+log = logging.getLogger(__name__)
+
+
+class MixedWorkloadConfig(RunnerConfig):
+    """Search load under concurrent writes.
+
+    Args:
+        write_rates(list[float]): write calls per second of each step, across all processes; 0 measures searches alone
+        search_concurrency(int): closed loop search clients, split between the processes
+        max_writes_in_flight(int): threads per process executing writes, writes beyond it wait in a queue
+        drain_timeout(float): seconds to wait for outstanding writes after the step ends, the rest are dropped
+    """
+
+    write_rates: List[float] = [0, 10, 100, 500, 1000]
+    search_concurrency: int = 64
+    max_writes_in_flight: int = 16
+    drain_timeout: float = 10.0
+
+
+class MixedStepResult(BaseModel):
+    """Result of one write rate step.
+
+    `write` measures latency from the time each write was scheduled to start, like
+    the open loop runner, so writes falling behind show up in its tail. `started` is
+    the `clock` time the measured window began, as in `StepResult`.
+    """
+
+    search_scenario: str
+    write_scenario: str
+    write_rate: float
+    processes: int
+    search: LatencySummary
+    write: LatencySummary
+    dropped_writes: int
+    started: Optional[float] = None
+
+
+class MixedWorkloadReport(BaseModel):
+    steps: List[MixedStepResult] = []
+
+    def search_p99_by_write_rate(self) -> Dict[float, float]:
+        """Search p99 in milliseconds of each target write rate."""
+        return {step.write_rate: step.search.p99_ms for step in self.steps}
+
+    def table(self) -> str:
+        """Plain text table with one row per write rate."""
+        header = (
+            f"{'write rate':>12}{'writes/s':>10}{'write p99':>11}{'dropped':>9}"
+            f"{'search qps':>12}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>9}"
+        )
+        rows = [header]
+        for step in self.steps:
+            s = step.search
+            rows.append(
+                f"{step.write_rate:>12.1f}{step.write.qps:>10.1f}{step.write.p99_ms:>11.2f}{step.dropped_writes:>9}"
+                f"{s.qps:>12.1f}{s.p50_ms:>10.2f}{s.p95_ms:>10.2f}{s.p99_ms:>10.2f}{s.errors + step.write.errors:>9}"
+            )
+        return "\n".join(rows)
+
+
+def _write_loop(
+    db: Any,
+    scenario: Scenario,
+    worker_id: int,
+    rate: float,
+    max_in_flight: int,
+    record_from: float,
+    stop_at: float,
+    drain_timeout: float,
+) -> tuple:
+    """Issue writes at a constant rate until `stop_at`, return the recorder and the number of dropped writes."""
+    recorder = LatencyRecorder()
+    lock = threading.Lock()
+    state = {"outstanding": 0, "scheduled": 0, "closed": False}
+
+    def issue(intended: float, seq: int) -> None:
+        try:
+            scenario.run(db, worker_id, seq)
+            failed = False
+        except Exception:
+            failed = True
+        end = clock()
+        with lock:
+            state["outstanding"] -= 1
+            if state["closed"] or intended < record_from:
+                return
+            if failed:
+                recorder.record_error()
+            else:
+                recorder.record(intended, end)
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    interval = 1.0 / rate
+    intended = clock()
+    seq = 0
+    while intended < stop_at:
+        now = clock()
+        if intended > now:
+            time.sleep(intended - now)
+        with lock:
+            state["outstanding"] += 1
+            if intended >= record_from:
+                state["scheduled"] += 1
+        executor.submit(issue, intended, seq)
+        seq += 1
+        intended += interval
+
+    drain_until = clock() + drain_timeout
+    while clock() < drain_until:
+        with lock:
+            if state["outstanding"] == 0:
+                break
+        time.sleep(0.01)
+
+    with lock:
+        state["closed"] = True
+        dropped = state["scheduled"] - len(recorder) - recorder.errors
+    executor.shutdown(wait=False, cancel_futures=True)
+    return recorder, dropped
+
+
+def _mixed_worker(
+    factory: DBFactory,
+    search_scenario: Scenario,
+    write_scenario: Scenario,
+    first_worker_id: int,
+    threads: int,
+    write_rate: float,
+    max_writes_in_flight: int,
+    warmup_duration: float,
+    step_duration: float,
+    drain_timeout: float,
+    go: Any,
+    results: Any,
+) -> None:
+    try:
+        db = factory()
+        search_scenario.setup(db)
+        write_scenario.setup(db)
+    except Exception as e:
+        results.put(("error", repr(e)))
+        return
+
+    results.put(("ready", None))
+    go.wait()
+
+    record_from = clock() + warmup_duration
+    stop_at = record_from + step_duration
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(_client_loop, db, search_scenario, first_worker_id + t, record_from, stop_at)
+            for t in range(threads)
+        ]
+        writes, dropped = LatencyRecorder(), 0
+        if write_rate > 0:
+            writes, dropped = _write_loop(
+                db, write_scenario, first_worker_id, write_rate, max_writes_in_flight, record_from, stop_at, drain_timeout
+            )
+        searches = LatencyRecorder.merge(f.result() for f in futures)
+
+    results.put(
+        (
+            "done",
+            (searches.starts, searches.latencies, searches.errors, writes.starts, writes.latencies, writes.errors, dropped),
+        )
+    )
+
+
+class MixedWorkloadRunner(ProcessRunner):
+    """Search latency while the database is being written to, as a function of the write rate.
+
+    Every step runs `config.search_concurrency` closed loop search clients, like
+    `LoadTestRunner`, and issues the write scenario at a constant rate, like
+    `OpenLoopRunner`, from the same processes. The first step usually has a write
+    rate of 0 so the report starts with the search latency of an idle index.
+
+    Examples:
+        >>> runner = MixedWorkloadRunner(DBFactory(Redis, database_name="random_dataset"), MixedWorkloadConfig(write_rates=[0, 100, 1000]))
+        >>> report = runner.run(SearchScenario(queries), UpsertScenario(ids, vector_dimension=1536, batch_size=10))
+        >>> print(report.table())
+    """
+
+    def __init__(self, factory: DBFactory, config: Optional[MixedWorkloadConfig] = None):
+        super().__init__(factory, config if config is not None else MixedWorkloadConfig())
+
+    def run(self, search_scenario: Scenario, write_scenario: Scenario) -> MixedWorkloadReport:
+        report = MixedWorkloadReport()
+        for write_rate in self.config.write_rates:
+            step = self.run_step(search_scenario, write_scenario, write_rate)
+            log.info(
+                f"{write_scenario.name} rate={write_rate} writes/s={step.write.qps:.1f} "
+                f"{search_scenario.name} qps={step.search.qps:.1f} p99={step.search.p99_ms:.2f}ms"
+            )
+            report.steps.append(step)
+        return report
+
+    def run_step(self, search_scenario: Scenario, write_scenario: Scenario, write_rate: float) -> MixedStepResult:
+        clients = split_clients(self.config.search_concurrency, self.config.processes)
+        worker_args = []
+        first_worker_id = 0
+        for threads in clients:
+            worker_args.append(
+                (
+                    self.factory,
+                    search_scenario,
+                    write_scenario,
+                    first_worker_id,
+                    threads,
+                    write_rate / len(clients),
+                    self.config.max_writes_in_flight,
+                    self.config.warmup_duration,
+                    self.config.step_duration,
+                    self.config.drain_timeout,
+                )
+            )
+            first_worker_id += threads
+
+        outputs = self._run_workers(
+            _mixed_worker,
+            worker_args,
+            self.config.warmup_duration + self.config.step_duration + self.config.drain_timeout,
+        )
+
+        searches = LatencyRecorder()
+        writes = LatencyRecorder()
+        dropped = 0
+        for starts, latencies, errors, write_starts, write_latencies, write_errors, worker_dropped in outputs:
+            searches.starts.extend(starts)
+            searches.latencies.extend(latencies)
+            searches.errors += errors
+            writes.starts.extend(write_starts)
+            writes.latencies.extend(write_latencies)
+            writes.errors += write_errors
+            dropped += worker_dropped
+
+        return MixedStepResult(
+            search_scenario=search_scenario.name,
+            write_scenario=write_scenario.name,
+            write_rate=write_rate,
+            processes=len(worker_args),
+            search=searches.summary(self.config.step_duration),
+            write=writes.summary(self.config.step_duration),
+            dropped_writes=dropped,
+            started=self.started,
+        )
@@ -0,0 +1,257 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from .latency import LatencyRecorder, LatencySummary, clock
+from .runner import DBFactory, ProcessRunner, RunnerConfig
+from .scenarios import Scenario
+
+
+log = logging.getLogger(__name__)
+
+
+class OpenLoopConfig(RunnerConfig):
+    """Open loop (constant arrival rate) load test parameters.
+
+    Args:
+        rates(list[float]): target requests per second of each step, across all processes
+        arrival(str): "uniform" for evenly spaced requests or "poisson" for exponential inter-arrival times
+        max_in_flight(int): threads per process executing requests, requests beyond it wait in a queue
+        drain_timeout(float): seconds to wait for outstanding requests after the step ends, the rest are dropped
+        slo_p99_ms(float): p99 latency objective, steps above it are marked as violating the SLO
+        stop_on_slo_violation(bool): stop ramping a scenario after the first step violating the SLO
+    """
+
+    rates: List[float] = [100, 500, 1000, 2000, 4000, 8000]
+    arrival: Literal["uniform", "poisson"] = "uniform"
+    max_in_flight: int = 512
+    drain_timeout: float = 10.0
+    slo_p99_ms: Optional[float] = None
+    stop_on_slo_violation: bool = True
+
+
+class OpenLoopStepResult(BaseModel):
+    """Result of one open loop step.
+
+    `summary` measures latency from the time each request was scheduled to start,
+    which includes the time it waited behind a stalled backend (coordinated omission
+    correction). `service_summary` measures it from the time the request was actually
+    sent, which is what a closed loop client would report. `started` is the `clock`
+    time the measured window began, as in `StepResult`.
+    """
+
+    scenario: str
+    target_rate: float
+    processes: int
+    summary: LatencySummary
+    service_summary: LatencySummary
+    dropped: int
+    within_slo: Optional[bool] = None
+    started: Optional[float] = None
+
+
+class OpenLoopReport(BaseModel):
+    steps: List[OpenLoopStepResult] = []
+
+    def max_rate_within_slo(self, scenario: str) -> Optional[float]:
+        """Highest achieved QPS of a step of `scenario` whose p99 was within the SLO."""
+        rates = [
+            step.summary.qps
+            for step in self.steps
+            if step.scenario == scenario and step.within_slo
+        ]
+        return max(rates) if rates else None
+
+    def table(self) -> str:
+        header = (
+            f"{'scenario':<20}{'target':>10}{'qps':>12}{'p50':>10}{'p99':>10}"
+            f"{'svc p99':>10}{'dropped':>9}{'errors':>9}{'slo':>6}"
+        )
+        rows = [header]
+        for step in self.steps:
+            s = step.summary
+            slo = "-" if step.within_slo is None else ("ok" if step.within_slo else "fail")
+            rows.append(
+                f"{step.scenario:<20}{step.target_rate:>10.1f}{s.qps:>12.1f}{s.p50_ms:>10.2f}{s.p99_ms:>10.2f}"
+                f"{step.service_summary.p99_ms:>10.2f}{step.dropped:>9}{s.errors:>9}{slo:>6}"
+            )
+        return "\n".join(rows)
+
+
+def _open_loop_worker(
+    factory: DBFactory,
+    scenario: Scenario,
+    worker_id: int,
+    rate: float,
+    arrival: str,
+    max_in_flight: int,
+    warmup_duration: float,
+    step_duration: float,
+    drain_timeout: float,
+    go: Any,
+    results: Any,
+) -> None:
+    try:
+        db = factory()
+        scenario.setup(db)
+    except Exception as e:
+        results.put(("error", repr(e)))
+        return
+
+    results.put(("ready", None))
+    go.wait()
+
+    rng = np.random.default_rng(worker_id)
+    interval = 1.0 / rate
+    corrected = LatencyRecorder()
+    service = LatencyRecorder()
+    lock = threading.Lock()
+    state = {"outstanding": 0, "scheduled": 0, "closed": False}
+
+    begin = clock()
+    record_from = begin + warmup_duration
+    stop_at = record_from + step_duration
+
+    def issue(intended: float, seq: int) -> None:
+        started = clock()
+        try:
+            scenario.run(db, worker_id, seq)
+            failed = False
+        except Exception:
+            failed = True
+        end = clock()
+        with lock:
+            state["outstanding"] -= 1
+            if state["closed"] or intended < record_from:
+                return
+            if failed:
+                corrected.record_error()
+            else:
+                corrected.record(intended, end)
+                service.record(started, end)
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    intended = begin
+    seq = 0
+    while intended < stop_at:
+        now = clock()
+        if intended > now:
+            time.sleep(intended - now)
+        with lock:
+            state["outstanding"] += 1
+            if intended >= record_from:
+                state["scheduled"] += 1
+        # the request is queued even if all threads are busy: its latency keeps
+        # growing from `intended` instead of the schedule slipping
+        executor.submit(issue, intended, seq)
+        seq += 1
+        intended += rng.exponential(interval) if arrival == "poisson" else interval
+
+    drain_until = clock() + drain_timeout
+    while clock() < drain_until:
+        with lock:
+            if state["outstanding"] == 0:
+                break
+        time.sleep(0.01)
+
+    with lock:
+        state["closed"] = True
+        completed = len(corrected) + corrected.errors
+        dropped = state["scheduled"] - completed
+        payload = (
+            corrected.starts,
+            corrected.latencies,
+            corrected.errors,
+            service.starts,
+            service.latencies,
+            dropped,
+        )
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results.put(("done", payload))
+
+
+class OpenLoopRunner(ProcessRunner):
+    """Open loop load test: requests are issued at a fixed arrival rate, whether or not earlier ones returned.
+
+    Latency is measured from the intended start time of each request, so a stalled
+    backend shows up in the tail instead of silently lowering the request rate. The
+    rate is stepped through `config.rates`, and when `config.slo_p99_ms` is set the
+    report gives the highest throughput that kept p99 under it.
+
+    Examples:
+        >>> config = OpenLoopConfig(rates=[500, 1000, 2000, 4000], slo_p99_ms=50)
+        >>> report = OpenLoopRunner(DBFactory(Redis, database_name="random_dataset"), config).run([SearchScenario(queries)])
+        >>> report.max_rate_within_slo("search")
+    """
+
+    def __init__(self, factory: DBFactory, config: Optional[OpenLoopConfig] = None):
+        super().__init__(factory, config if config is not None else OpenLoopConfig())
+
+    def run(self, scenarios: List[Scenario]) -> OpenLoopReport:
+        report = OpenLoopReport()
+        for scenario in scenarios:
+            for rate in self.config.rates:
+                step = self.run_step(scenario, rate)
+                log.info(
+                    f"{scenario.name} rate={rate} qps={step.summary.qps:.1f} p99={step.summary.p99_ms:.2f}ms "
+                    f"service_p99={step.service_summary.p99_ms:.2f}ms dropped={step.dropped}"
+                )
+                report.steps.append(step)
+                if step.within_slo is False and self.config.stop_on_slo_violation:
+                    break
+        return report
+
+    def run_step(self, scenario: Scenario, rate: float) -> OpenLoopStepResult:
+        processes = max(1, self.config.processes)
+        worker_args = [
+            (
+                self.factory,
+                scenario,
+                worker_id,
+                rate / processes,
+                self.config.arrival,
+                self.config.max_in_flight,
+                self.config.warmup_duration,
+                self.config.step_duration,
+                self.config.drain_timeout,
+            )
+            for worker_id in range(processes)
+        ]
+        outputs = self._run_workers(
+            _open_loop_worker,
+            worker_args,
+            self.config.warmup_duration + self.config.step_duration + self.config.drain_timeout,
+        )
+
+        corrected = LatencyRecorder()
+        service = LatencyRecorder()
+        dropped = 0
+        for starts, latencies, errors, service_starts, service_latencies, worker_dropped in outputs:
+            corrected.starts.extend(starts)
+            corrected.latencies.extend(latencies)
+            corrected.errors += errors
+            service.starts.extend(service_starts)
+            service.latencies.extend(service_latencies)
+            dropped += worker_dropped
+
+        summary = corrected.summary(self.config.step_duration)
+        within_slo = None
+        if self.config.slo_p99_ms is not None:
+            within_slo = dropped == 0 and summary.count > 0 and summary.p99_ms <= self.config.slo_p99_ms
+
+        return OpenLoopStepResult(
+            scenario=scenario.name,
+            target_rate=rate,
+            processes=processes,
+            summary=summary,
+            service_summary=service.summary(self.config.step_duration),
+            dropped=dropped,
+            within_slo=within_slo,
+            started=self.started,
+        )
@@ -0,0 +1,146 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..vectordb.vectordb_api import VectorDB
+from .evaluation import RetrievalEvaluator, score
+from .latency import LatencySummary
+from .sweep import timed_search
+
+
+log = logging.getLogger(__name__)
+
+
+class PrecisionResult(BaseModel):
+    """Memory and recall of one vector storage, compared with the baseline storage.
+
+    Args:
+        name(str): name of the database in the benchmark
+        search_params(dict): keyword arguments of search_embedding, e.g. {"rerank": 4}
+        bytes_per_vector(float): memory of the index node per document, including the full precision
+            vectors kept for re-ranking when they are on the same server; None when the database can not tell
+        full_precision_bytes(float): memory of the full precision vectors per document, wherever they are kept
+        memory_saved(float): fraction of the baseline bytes_per_vector saved
+        recall(float): recall@k against the exact neighbours
+        recall_lost(float): baseline recall minus recall
+    """
+
+    name: str
+    search_params: Dict[str, Any]
+    bytes_per_vector: Optional[float] = None
+    full_precision_bytes: Optional[float] = None
+    memory_saved: Optional[float] = None
+    recall: float
+    recall_lost: float = 0.0
+    latency: LatencySummary
+
+
+class PrecisionReport(BaseModel):
+    k: int
+    baseline: str
+    results: List[PrecisionResult] = []
+
+    def table(self) -> str:
+        """Plain text table with one row per database and search parameters."""
+        header = (
+            f"{'name':<16}{'search':<20}{'bytes/vec':>11}{'full/vec':>10}{'saved':>9}{'recall':>9}{'lost':>9}"
+            f"{'qps':>10}{'p99':>9}"
+        )
+        rows = [header]
+        for r in self.results:
+            search = ",".join(f"{key}={value}" for key, value in r.search_params.items()) or "-"
+            size = f"{r.bytes_per_vector:>11.0f}" if r.bytes_per_vector is not None else f"{'-':>11}"
+            full = f"{r.full_precision_bytes:>10.0f}" if r.full_precision_bytes else f"{'-':>10}"
+            saved = f"{r.memory_saved:>9.1%}" if r.memory_saved is not None else f"{'-':>9}"
+            rows.append(
+                f"{r.name:<16}{search:<20}{size}{full}{saved}{r.recall:>9.4f}{r.recall_lost:>9.4f}"
+                f"{r.latency.qps:>10.1f}{r.latency.p99_ms:>9.2f}"
+            )
+        return "\n".join(rows)
+
+
+def _memory(db: VectorDB) -> Tuple[Optional[float], Optional[float]]:
+    """Bytes per vector of the index node, and of the full precision vectors, None when the database can not tell."""
+    memory_usage = getattr(db, "memory_usage", None)
+    if memory_usage is None:
+        return None, None
+    usage = memory_usage()
+    return usage.node_bytes_per_vector, usage.full_precision_bytes
+
+
+class PrecisionBenchmark:
+    """Memory saved against recall lost by reduced precision vector storage.
+
+    Each database holds the evaluator's dataset with another vector type, e.g. one
+    Redis index per FLOAT32, FLOAT16 and INT8. Every search parameter set of a
+    database is run once, queries are sent one at a time from a single client. The
+    first database (or `baseline`) without search parameters is the reference for
+    memory and recall. The float32 copy kept for `rerank` counts in the memory of
+    a database when it is on the same server as the index.
+
+    Examples:
+        >>> benchmark = PrecisionBenchmark(RetrievalEvaluator(dataset), queries, k=10)
+        >>> report = benchmark.run(
+        >>>     {"float32": redis_float32, "float16": redis_float16, "int8": redis_int8},
+        >>>     search_grid={"int8": [{}, {"rerank": 2}, {"rerank": 4}]},
+        >>> )
+        >>> print(report.table())
+    """
+
+    def __init__(
+        self,
+        evaluator: RetrievalEvaluator,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        warmup_queries: int = 10,
+    ):
+        self.evaluator = evaluator
+        self.queries = np.asarray(queries, dtype=np.float32)
+        self.k = k
+        self.warmup_queries = warmup_queries
+
+    def run(
+        self,
+        dbs: Dict[str, VectorDB],
+        search_grid: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        baseline: Optional[str] = None,
+    ) -> PrecisionReport:
+        """Measure every database with each of its search parameter sets.
+
+        Args:
+            dbs(dict[str, VectorDB]): databases loaded with the evaluator's dataset, by name
+            search_grid(dict[str, list[dict]]): search_embedding keyword arguments to try per database name
+            baseline(str): name of the reference database, the first one by default
+        """
+        search_grid = search_grid or {}
+        baseline = baseline if baseline is not None else next(iter(dbs))
+        relevant = self.evaluator.ground_truth(self.queries, self.k)
+        report = PrecisionReport(k=self.k, baseline=baseline)
+
+        for name, db in dbs.items():
+            bytes_per_vector, full_precision_bytes = _memory(db)
+            for search_params in search_grid.get(name) or [{}]:
+                retrieved, latency = timed_search(db, self.queries, self.k, None, search_params, self.warmup_queries)
+                recall = score(retrieved, relevant, self.k).recall
+                report.results.append(
+                    PrecisionResult(
+                        name=name,
+                        search_params=search_params,
+                        bytes_per_vector=bytes_per_vector,
+                        full_precision_bytes=full_precision_bytes,
+                        recall=recall,
+                        latency=latency,
+                    )
+                )
+                log.info(f"{name} {search_params}: {bytes_per_vector} bytes per vector, recall {recall:.4f}")
+
+        reference = next((r for r in report.results if r.name == baseline and not r.search_params), None)
+        if reference is None:
+            raise ValueError(f"baseline {baseline} was not run without search parameters")
+        for r in report.results:
+            r.recall_lost = reference.recall - r.recall
+            if r.bytes_per_vector is not None and reference.bytes_per_vector:
+                r.memory_saved = 1 - r.bytes_per_vector / reference.bytes_per_vector
+        return report
@@ -0,0 +1,281 @@
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+from redis.exceptions import ResponseError
+
+from ..vectordb.redis import Redis
+from .latency import clock
+
+
+log = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def _psutil():
+    try:
+        import psutil
+    except ImportError as e:
+        raise ImportError("process resource sampling needs the psutil package: pip install psutil") from e
+    return psutil
+
+
+class ResourceSample(BaseModel):
+    """Metrics of one source at one point in time.
+
+    Args:
+        timestamp(float): `clock` time of the sample, the clock of the latency recorders
+        source(str): name of the source
+        metrics(dict[str, float]): values by metric name, see the sources for the names
+    """
+
+    timestamp: float
+    source: str
+    metrics: Dict[str, float]
+
+
+class ResourceSource(ABC):
+    """Something whose resource usage can be sampled, e.g. a Redis server or a process.
+
+    Every source reports "memory_bytes" and, from its second sample on, "cpu_percent"
+    (100 per fully used core), plus "documents" when it knows how many vectors it
+    holds, so the numbers of different vendors can be compared.
+    """
+
+    name: str = "source"
+
+    @abstractmethod
+    def sample(self) -> Dict[str, float]:
+        """Current metrics of the source, by metric name."""
+
+
+class RedisResources(ResourceSource):
+    """Redis server usage from `INFO memory`, `INFO cpu` and `FT.INFO` of the client index.
+
+    Metrics: memory_bytes (used_memory), rss_bytes, peak_memory_bytes, cpu_percent
+    (used_cpu_sys + used_cpu_user between two samples), and when the index exists
+    documents (num_docs), vector_index_bytes (vectors and HNSW graph),
+    inverted_index_bytes and percent_indexed.
+
+    Args:
+        db(Redis): client of the server and index to sample
+        name(str): name of the source in the timeline
+    """
+
+    def __init__(self, db: Redis, name: str = "redis"):
+        self.db = db
+        self.name = name
+        self._last_cpu: Optional[Tuple[float, float]] = None
+
+    def sample(self) -> Dict[str, float]:
+        memory = self.db.conn.info("memory")
+        metrics = {
+            "memory_bytes": float(memory["used_memory"]),
+            "rss_bytes": float(memory["used_memory_rss"]),
+            "peak_memory_bytes": float(memory["used_memory_peak"]),
+        }
+
+        cpu = self.db.conn.info("cpu")
+        now = clock()
+        used = float(cpu["used_cpu_sys"]) + float(cpu["used_cpu_user"])
+        if self._last_cpu is not None and now > self._last_cpu[0]:
+            metrics["cpu_percent"] = 100 * (used - self._last_cpu[1]) / (now - self._last_cpu[0])
+        self._last_cpu = (now, used)
+
+        try:
+            info = self.db.conn.ft(self.db.index_name).info()
+        except ResponseError:
+            # no index yet, e.g. sampling started before the first insert
+            return metrics
+        metrics["documents"] = float(info.get("num_docs", 0))
+        metrics["vector_index_bytes"] = float(info.get("vector_index_sz_mb", 0)) * MB
+        metrics["inverted_index_bytes"] = float(info.get("inverted_sz_mb", 0)) * MB
+        metrics["percent_indexed"] = float(info.get("percent_indexed", 1))
+        return metrics
+
+
+class ProcessResources(ResourceSource):
+    """CPU and memory of a local process, with psutil.
+
+    Use the current process for an embedded database, e.g. Chroma's `PersistentClient`,
+    or the pid of a database server running on the same machine (see `find`).
+
+    Metrics: memory_bytes (resident set size), virtual_memory_bytes, threads,
+    cpu_percent and documents when `documents` is given.
+
+    Args:
+        pid(int): process to sample, the current process by default
+        documents(Callable[[], int]): number of vectors held, e.g. `lambda: client.collection.count()`
+        name(str): name of the source in the timeline
+    """
+
+    def __init__(self, pid: Optional[int] = None, documents: Optional[Callable[[], int]] = None, name: str = "process"):
+        self.process = _psutil().Process(pid if pid is not None else os.getpid())
+        self.documents = documents
+        self.name = name
+        # the first call only starts the measurement
+        self.process.cpu_percent(interval=None)
+        self._first = True
+
+    @classmethod
+    def find(cls, pattern: str, **kwargs) -> "ProcessResources":
+        """Source of the first other process whose command line contains `pattern`, e.g. "chroma run"."""
+        psutil = _psutil()
+        for process in psutil.process_iter(["pid", "cmdline"]):
+            cmdline = " ".join(process.info["cmdline"] or [])
+            if pattern in cmdline and process.info["pid"] != os.getpid():
+                return cls(process.info["pid"], **kwargs)
+        raise ValueError(f"no process matching {pattern}")
+
+    def sample(self) -> Dict[str, float]:
+        with self.process.oneshot():
+            memory = self.process.memory_info()
+            metrics = {
+                "memory_bytes": float(memory.rss),
+                "virtual_memory_bytes": float(memory.vms),
+                "threads": float(self.process.num_threads()),
+            }
+            cpu_percent = self.process.cpu_percent(interval=None)
+        if not self._first:
+            metrics["cpu_percent"] = cpu_percent
+        self._first = False
+        if self.documents is not None:
+            metrics["documents"] = float(self.documents())
+        return metrics
+
+
+class ResourceTimeline(BaseModel):
+    """Samples of every source, in time order.
+
+    Args:
+        samples(list[ResourceSample]): samples of all sources
+        errors(int): samples that failed, e.g. while the server was unreachable
+    """
+
+    samples: List[ResourceSample] = []
+    errors: int = 0
+
+    def sources(self) -> List[str]:
+        return list(dict.fromkeys(sample.source for sample in self.samples))
+
+    def series(self, source: str, metric: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and values of one metric, samples without it are skipped."""
+        points = [(s.timestamp, s.metrics[metric]) for s in self.samples if s.source == source and metric in s.metrics]
+        timestamps = np.asarray([t for t, _ in points], dtype=np.float64)
+        return timestamps, np.asarray([v for _, v in points], dtype=np.float64)
+
+    def window(self, start: float, end: float) -> "ResourceTimeline":
+        """Samples taken between two `clock` times, e.g. `step.started` and `step.started + step.summary.duration`."""
+        return ResourceTimeline(samples=[s for s in self.samples if start <= s.timestamp <= end])
+
+    def peak(self, source: str, metric: str) -> Optional[float]:
+        _, values = self.series(source, metric)
+        return float(values.max()) if values.size else None
+
+    def mean(self, source: str, metric: str) -> Optional[float]:
+        _, values = self.series(source, metric)
+        return float(values.mean()) if values.size else None
+
+    def memory_per_million_vectors(self, source: str) -> Optional[float]:
+        """memory_bytes per million documents at the last sample of `source` holding documents."""
+        for sample in reversed(self.samples):
+            if sample.source == source and sample.metrics.get("documents"):
+                return sample.metrics["memory_bytes"] / sample.metrics["documents"] * 1_000_000
+        return None
+
+    def table(self) -> str:
+        """Plain text table with one row per source."""
+        header = f"{'source':<16}{'samples':>9}{'avg cpu%':>10}{'max cpu%':>10}{'max MB':>10}{'documents':>12}{'MB/1M vec':>11}"
+        rows = [header]
+
+        def fmt(value: Optional[float], width: int, precision: int = 1) -> str:
+            return f"{value:>{width}.{precision}f}" if value is not None else f"{'-':>{width}}"
+
+        for source in self.sources():
+            peak_memory = self.peak(source, "memory_bytes")
+            per_million = self.memory_per_million_vectors(source)
+            rows.append(
+                f"{source:<16}{sum(s.source == source for s in self.samples):>9}"
+                f"{fmt(self.mean(source, 'cpu_percent'), 10)}{fmt(self.peak(source, 'cpu_percent'), 10)}"
+                f"{fmt(peak_memory / MB if peak_memory is not None else None, 10)}"
+                f"{fmt(self.peak(source, 'documents'), 12, 0)}"
+                f"{fmt(per_million / MB if per_million is not None else None, 11)}"
+            )
+        return "\n".join(rows)
+
+
+class ResourceSampler:
+    """Background thread sampling resource sources at a fixed interval.
+
+    Samples are timestamped with the benchmark `clock`, the clock of the latency
+    recorders and of `StepResult.started`, so spikes in the timeline can be matched
+    with latency spikes. A failing sample is counted in `timeline.errors` and does
+    not stop the sampler.
+
+    Examples:
+        >>> sources = [RedisResources(redis), ProcessResources.find("redis-server", name="redis-server")]
+        >>> with ResourceSampler(sources, interval=1.0) as sampler:
+        >>>     report = runner.run([SearchScenario(queries)])
+        >>> print(sampler.timeline.table())
+
+    Args:
+        sources(list[ResourceSource]): sources to sample, once per interval each
+        interval(float): seconds between two samples of a source
+    """
+
+    def __init__(self, sources: List[ResourceSource], interval: float = 1.0):
+        self.sources = sources
+        self.interval = interval
+        self.timeline = ResourceTimeline()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> None:
+        """Take one sample of every source."""
+        for source in self.sources:
+            try:
+                metrics = source.sample()
+            except Exception as e:
+                log.warning(f"sampling {source.name} failed: {e!r}")
+                with self._lock:
+                    self.timeline.errors += 1
+                continue
+            with self._lock:
+                self.timeline.samples.append(ResourceSample(timestamp=clock(), source=source.name, metrics=metrics))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "ResourceSampler":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> ResourceTimeline:
+        """Stop sampling after one last sample and return the timeline."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.sample()
+        return self.snapshot()
+
+    def snapshot(self) -> ResourceTimeline:
+        """Copy of the samples taken so far."""
+        with self._lock:
+            return self.timeline.model_copy(update={"samples": list(self.timeline.samples)})
+
+    def __enter__(self) -> "ResourceSampler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
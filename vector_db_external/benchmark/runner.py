@@ -0,0 +1,277 @@
+import logging
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from ..vectordb.vectordb_api import VectorDB
+from .latency import LatencyRecorder, LatencySummary, clock
+from .scenarios import Scenario
+
+
+log = logging.getLogger(__name__)
+
+
+class DBFactory:
+    """Picklable recipe to create a VectorDB inside a worker process.
+
+    Connections can not be shared between processes, so instead of pickling a client
+    the runner sends the class and its arguments and every process builds its own.
+
+    Examples:
+        >>> factory = DBFactory(Redis, database_name="random_dataset", vector_dimension=1536)
+        >>> db = factory()
+    """
+
+    def __init__(self, db_class: Type[VectorDB], **db_kwargs: Any):
+        self.db_class = db_class
+        self.db_kwargs = db_kwargs
+
+    def __call__(self) -> VectorDB:
+        return self.db_class(**self.db_kwargs)
+
+
+class RunnerConfig(BaseModel):
+    """Parameters shared by all load test runners.
+
+    Args:
+        processes(int): maximum number of worker processes, load is split evenly between them
+        step_duration(float): seconds each step is measured for
+        warmup_duration(float): seconds executed before measuring each step, not reported
+        start_method(str): multiprocessing start method, defaults to the platform default
+        start_timeout(float): seconds to wait for the worker processes to connect
+    """
+
+    processes: int = os.cpu_count() or 1
+    step_duration: float = 30.0
+    warmup_duration: float = 5.0
+    start_method: Optional[str] = None
+    start_timeout: float = 120.0
+
+
+class LoadTestConfig(RunnerConfig):
+    """Closed loop load test parameters.
+
+    Args:
+        concurrency_steps(list[int]): number of concurrent clients of each ramp step
+    """
+
+    concurrency_steps: List[int] = [1, 8, 64, 512, 1024, 2048, 4096, 8192]
+
+
+class StepResult(BaseModel):
+    """Result of one concurrency step.
+
+    `started` is the `clock` time the measured window began, after the warmup, so
+    resource samples can be matched with `ResourceTimeline.window`.
+    """
+
+    scenario: str
+    concurrency: int
+    processes: int
+    summary: LatencySummary
+    started: Optional[float] = None
+
+
+class LoadTestReport(BaseModel):
+    steps: List[StepResult] = []
+
+    def table(self) -> str:
+        """Plain text table with one row per scenario and concurrency step."""
+        header = f"{'scenario':<20}{'clients':>9}{'qps':>12}{'avg':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>9}"
+        rows = [header]
+        for step in self.steps:
+            s = step.summary
+            rows.append(
+                f"{step.scenario:<20}{step.concurrency:>9}{s.qps:>12.1f}{s.avg_ms:>10.2f}"
+                f"{s.p50_ms:>10.2f}{s.p95_ms:>10.2f}{s.p99_ms:>10.2f}{s.errors:>9}"
+            )
+        return "\n".join(rows)
+
+
+def _client_loop(
+    db: VectorDB,
+    scenario: Scenario,
+    worker_id: int,
+    record_from: float,
+    stop_at: float,
+) -> LatencyRecorder:
+    recorder = LatencyRecorder()
+    seq = 0
+    while True:
+        start = clock()
+        if start >= stop_at:
+            break
+        try:
+            scenario.run(db, worker_id, seq)
+        except Exception:
+            if start >= record_from:
+                recorder.record_error()
+        else:
+            if start >= record_from:
+                recorder.record(start, clock())
+        seq += 1
+    return recorder
+
+
+def _process_worker(
+    factory: DBFactory,
+    scenario: Scenario,
+    first_worker_id: int,
+    threads: int,
+    warmup_duration: float,
+    step_duration: float,
+    go: Any,
+    results: Any,
+) -> None:
+    try:
+        db = factory()
+        scenario.setup(db)
+    except Exception as e:
+        results.put(("error", repr(e)))
+        return
+
+    results.put(("ready", None))
+    go.wait()
+
+    record_from = clock() + warmup_duration
+    stop_at = record_from + step_duration
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(_client_loop, db, scenario, first_worker_id + t, record_from, stop_at)
+            for t in range(threads)
+        ]
+        recorder = LatencyRecorder.merge(f.result() for f in futures)
+
+    results.put(("done", (recorder.starts, recorder.latencies, recorder.errors)))
+
+
+def split_clients(concurrency: int, processes: int) -> List[int]:
+    """Split `concurrency` clients as evenly as possible between at most `processes` processes."""
+    processes = max(1, min(processes, concurrency))
+    base, extra = divmod(concurrency, processes)
+    return [base + 1 if i < extra else base for i in range(processes)]
+
+
+class ProcessRunner:
+    """Base class of the runners, starts one worker process per set of arguments.
+
+    Worker targets are called as `target(*args, go, results)`; they must put
+    `("ready", None)` on `results` once connected, wait for `go` and finally put
+    `("done", payload)` (or `("error", message)` if they could not start).
+    """
+
+    def __init__(self, factory: DBFactory, config: RunnerConfig):
+        self.factory = factory
+        self.config = config
+        self._context = multiprocessing.get_context(self.config.start_method)
+        # start of the measured window of the last step, on the benchmark clock
+        self.started: Optional[float] = None
+
+    def _run_workers(self, target: Callable, worker_args: List[tuple], timeout: float) -> List[Any]:
+        go = self._context.Event()
+        results = self._context.Queue()
+
+        processes = []
+        for args in worker_args:
+            process = self._context.Process(target=target, args=(*args, go, results), daemon=True)
+            process.start()
+            processes.append(process)
+
+        try:
+            _wait_for(results, "ready", len(processes), self.config.start_timeout)
+            self.started = clock() + self.config.warmup_duration
+            go.set()
+            return _wait_for(results, "done", len(processes), timeout + self.config.start_timeout)
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+
+class LoadTestRunner(ProcessRunner):
+    """Closed loop load test: every client issues its next request as soon as the previous one returns.
+
+    For each scenario the number of clients is ramped through `config.concurrency_steps`.
+    Clients are threads, spread over up to `config.processes` processes, each process
+    building its own VectorDB through the given factory.
+
+    Examples:
+        >>> runner = LoadTestRunner(DBFactory(Redis, database_name="random_dataset"))
+        >>> report = runner.run([SearchScenario(queries, k=10)])
+        >>> print(report.table())
+    """
+
+    _worker_target = staticmethod(_process_worker)
+
+    def __init__(self, factory: DBFactory, config: Optional[LoadTestConfig] = None):
+        super().__init__(factory, config if config is not None else LoadTestConfig())
+
+    def run(self, scenarios: List[Scenario]) -> LoadTestReport:
+        report = LoadTestReport()
+        for scenario in scenarios:
+            for concurrency in self.config.concurrency_steps:
+                step = self.run_step(scenario, concurrency)
+                log.info(
+                    f"{scenario.name} clients={concurrency} qps={step.summary.qps:.1f} "
+                    f"p99={step.summary.p99_ms:.2f}ms errors={step.summary.errors}"
+                )
+                report.steps.append(step)
+        return report
+
+    def run_step(self, scenario: Scenario, concurrency: int) -> StepResult:
+        worker_args = []
+        first_worker_id = 0
+        for threads in split_clients(concurrency, self.config.processes):
+            worker_args.append(
+                (
+                    self.factory,
+                    scenario,
+                    first_worker_id,
+                    threads,
+                    self.config.warmup_duration,
+                    self.config.step_duration,
+                )
+            )
+            first_worker_id += threads
+
+        outputs = self._run_workers(
+            self._worker_target,
+            worker_args,
+            self.config.warmup_duration + self.config.step_duration,
+        )
+
+        recorder = LatencyRecorder()
+        for starts, latencies, errors in outputs:
+            recorder.starts.extend(starts)
+            recorder.latencies.extend(latencies)
+            recorder.errors += errors
+
+        return StepResult(
+            scenario=scenario.name,
+            concurrency=concurrency,
+            processes=len(worker_args),
+            summary=recorder.summary(self.config.step_duration),
+            started=self.started,
+        )
+
+
+def _wait_for(results: Any, kind: str, expected: int, timeout: float) -> List[Any]:
+    deadline = clock() + timeout
+    payloads = []
+    while len(payloads) < expected:
+        remaining = deadline - clock()
+        if remaining <= 0:
+            raise TimeoutError(f"only {len(payloads)} of {expected} worker processes reported '{kind}'")
+        try:
+            status, payload = results.get(timeout=remaining)
+        except queue.Empty:
+            continue
+        if status == "error":
+            raise RuntimeError(f"worker process failed to start: {payload}")
+        payloads.append(payload)
+    return payloads
@@ -0,0 +1,183 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+
+import numpy as np
+
+from ..vectordb.vectordb_api import AsyncVectorDB, VectorDB
+
+
+class Scenario(ABC):
+    """A single benchmark operation that is executed over and over by each client.
+
+    Scenarios are pickled into the worker processes, `setup` is called once per
+    process after the VectorDB has been created and before any call to `run`.
+    """
+
+    name: str = "scenario"
+
+    def setup(self, db: VectorDB) -> None:
+        """Prepare per-process state (e.g. convert query vectors)."""
+
+    @abstractmethod
+    def run(self, db: VectorDB, worker_id: int, seq: int) -> Any:
+        """Execute the operation once.
+
+        Args:
+            db(VectorDB): vector database of the current process
+            worker_id(int): global index of the client (thread) executing the operation
+            seq(int): number of operations already executed by this client
+        """
+
+    async def run_async(self, db: AsyncVectorDB, worker_id: int, seq: int) -> Any:
+        """Execute the operation once against an AsyncVectorDB, see `run`."""
+        raise NotImplementedError(f"{type(self).__name__} has no asyncio implementation")
+
+
+class SearchScenario(Scenario):
+    """Embedding search, one query vector per call.
+
+    Used for the "embedding search", "filtered search" (when `filters` is given) and
+    "large documents" (when pointed at the Wikipedia collection) scenarios.
+    """
+
+    def __init__(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        filters: Optional[List[dict]] = None,
+        name: str = "search",
+        **search_kwargs: Any,
+    ):
+        self.queries = np.asarray(queries, dtype=np.float32)
+        self.k = k
+        self.filters = filters
+        self.name = name
+        self.search_kwargs = search_kwargs
+        self._queries = None
+
+    def setup(self, db: VectorDB) -> None:
+        self._queries = self.queries.tolist()
+
+    def _arguments(self, worker_id: int, seq: int) -> dict:
+        i = worker_id * 7919 + seq
+        query = self._queries[i % len(self._queries)]
+        filters = self.filters[i % len(self.filters)] if self.filters else None
+        return dict(query=query, k=self.k, filters=filters, **self.search_kwargs)
+
+    def run(self, db: VectorDB, worker_id: int, seq: int) -> Any:
+        return db.search_embedding(**self._arguments(worker_id, seq))
+
+    async def run_async(self, db: AsyncVectorDB, worker_id: int, seq: int) -> Any:
+        return await db.search_embedding(**self._arguments(worker_id, seq))
+
+
+class BatchSearchScenario(SearchScenario):
+    """`batch_size` queries per call through `search_embeddings_batch`.
+
+    Latency is reported per batch, multiply the reported QPS by `batch_size` to get queries per second.
+    """
+
+    def __init__(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        batch_size: int = 32,
+        filters: Optional[List[dict]] = None,
+        name: str = "batch_search",
+        **search_kwargs: Any,
+    ):
+        super().__init__(queries, k=k, filters=filters, name=name, **search_kwargs)
+        self.batch_size = batch_size
+
+    def setup(self, db: VectorDB) -> None:
+        self._queries = self.queries
+
+    def _arguments(self, worker_id: int, seq: int) -> dict:
+        start = ((worker_id * 7919 + seq) * self.batch_size) % len(self._queries)
+        indexes = np.arange(start, start + self.batch_size) % len(self._queries)
+        filters = [self.filters[i % len(self.filters)] for i in indexes] if self.filters else None
+        return dict(queries=self._queries[indexes], k=self.k, filters=filters, **self.search_kwargs)
+
+    def run(self, db: VectorDB, worker_id: int, seq: int) -> Any:
+        return db.search_embeddings_batch(**self._arguments(worker_id, seq))
+
+    async def run_async(self, db: AsyncVectorDB, worker_id: int, seq: int) -> Any:
+        return await db.search_embeddings_batch(**self._arguments(worker_id, seq))
+
+
+class WriteScenario(Scenario):
+    """Insertion of `batch_size` random vectors per call."""
+
+    def __init__(
+        self,
+        vector_dimension: int,
+        batch_size: int = 1,
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        name: str = "write",
+        seed: int = 0,
+    ):
+        self.vector_dimension = vector_dimension
+        self.batch_size = batch_size
+        self.documents = documents
+        self.metadata = metadata
+        self.name = name
+        self.seed = seed
+        self._embeddings = None
+
+    def setup(self, db: VectorDB) -> None:
+        rng = np.random.default_rng(self.seed + os.getpid())
+        # a pool of pre-generated vectors so the timed section only measures the insert
+        pool_size = max(1024, self.batch_size)
+        self._embeddings = rng.random((pool_size, self.vector_dimension), dtype=np.float32).tolist()
+
+    def _arguments(self, worker_id: int, seq: int) -> dict:
+        start = (seq * self.batch_size) % (len(self._embeddings) - self.batch_size + 1)
+        embeddings = self._embeddings[start:start + self.batch_size]
+        ids = [f"{self.name}-{os.getpid()}-{worker_id}-{seq}-{j}" for j in range(self.batch_size)]
+
+        documents = None
+        if self.documents:
+            documents = [self.documents[(seq + j) % len(self.documents)] for j in range(self.batch_size)]
+
+        metadata = None
+        if self.metadata:
+            metadata = [self.metadata[(seq + j) % len(self.metadata)] for j in range(self.batch_size)]
+
+        return dict(ids=ids, embeddings=embeddings, documents=documents, metadata=metadata)
+
+    def run(self, db: VectorDB, worker_id: int, seq: int) -> Any:
+        return db.insert_embeddings(**self._arguments(worker_id, seq))
+
+    async def run_async(self, db: AsyncVectorDB, worker_id: int, seq: int) -> Any:
+        return await db.insert_embeddings(**self._arguments(worker_id, seq))
+
+
+class UpsertScenario(WriteScenario):
+    """Upsert of `batch_size` random vectors per call over existing `ids`, e.g. catalogue updates."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        vector_dimension: int,
+        batch_size: int = 1,
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        name: str = "upsert",
+        seed: int = 0,
+    ):
+        super().__init__(vector_dimension, batch_size, documents=documents, metadata=metadata, name=name, seed=seed)
+        self.ids = ids
+
+    def _arguments(self, worker_id: int, seq: int) -> dict:
+        arguments = super()._arguments(worker_id, seq)
+        first = (worker_id * 7919 + seq) * self.batch_size
+        arguments["ids"] = [self.ids[(first + j) % len(self.ids)] for j in range(self.batch_size)]
+        return arguments
+
+    def run(self, db: VectorDB, worker_id: int, seq: int) -> Any:
+        return db.upsert_embeddings(**self._arguments(worker_id, seq))
+
+    async def run_async(self, db: AsyncVectorDB, worker_id: int, seq: int) -> Any:
+        return await db.upsert_embeddings(**self._arguments(worker_id, seq))
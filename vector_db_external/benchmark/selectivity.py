@@ -0,0 +1,193 @@
+import itertools
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..vectordb.vectordb_api import VectorDB
+from .datasets import MemmapDataset
+from .evaluation import RetrievalEvaluator, score
+from .latency import LatencySummary
+from .sweep import timed_search
+
+
+log = logging.getLogger(__name__)
+
+
+DEFAULT_SELECTIVITIES = [1.0, 0.5, 0.2, 0.1, 0.05, 0.02, 0.01, 0.005, 0.001]
+MAX_SELECTIVITY_ERROR = 2.0
+
+
+class FilterLevel(BaseModel):
+    """Filters matching about `target` of the dataset rows.
+
+    Args:
+        target(float): requested fraction of matching rows
+        selectivity(float): mean fraction of rows matched by the chosen filters
+        filters(list[dict]): equality filters, assigned to the queries round robin; empty means unfiltered
+    """
+
+    target: float
+    selectivity: float
+    filters: List[Dict[str, Any]] = []
+
+    def query_filters(self, n: int) -> List[dict] | None:
+        """One filter per query for n queries."""
+        if not self.filters:
+            return None
+        return [self.filters[i % len(self.filters)] for i in range(n)]
+
+
+def candidate_filters(dataset: MemmapDataset, max_keys: int = 2) -> List[tuple]:
+    """Every equality filter over up to `max_keys` metadata keys of the dataset, with its selectivity.
+
+    Returns (selectivity, filters) pairs for the filters matching at least one row.
+    """
+    keys = list(dataset.metadata_values)
+    masks = {
+        (key, value): dataset.filter_mask({key: value})
+        for key in keys
+        for value in dataset.metadata_values[key]
+    }
+
+    candidates = []
+    for n_keys in range(1, min(max_keys, len(keys)) + 1):
+        for combination in itertools.combinations(keys, n_keys):
+            for values in itertools.product(*[dataset.metadata_values[key] for key in combination]):
+                mask = np.logical_and.reduce([masks[(key, value)] for key, value in zip(combination, values)])
+                selectivity = float(mask.mean()) if len(mask) else 0.0
+                if selectivity > 0:
+                    candidates.append((selectivity, dict(zip(combination, values))))
+    return candidates
+
+
+def filter_levels(
+    dataset: MemmapDataset,
+    selectivities: Optional[List[float]] = None,
+    filters_per_level: int = 10,
+    max_keys: int = 2,
+) -> List[FilterLevel]:
+    """Choose, for every target selectivity, the filters whose selectivity is closest to it.
+
+    Closeness is measured on a log scale. A target of 1.0 is served without any filter.
+    What can be reached depends on the data: with "a" and "b" uniform over
+    keyword_1..keyword_10, single key filters match ~10% and two key filters ~1% of the
+    rows, the other targets get the nearest of those. Targets ending up with the same
+    filters are run once, for the closest of them, and a warning is logged for every
+    dropped target and every level more than `MAX_SELECTIVITY_ERROR` times off its target.
+
+    Args:
+        dataset(MemmapDataset): dataset the filters are computed for
+        selectivities(list[float]): target fractions of matching rows
+        filters_per_level(int): number of distinct filters kept per level
+        max_keys(int): maximum number of metadata keys combined in one filter
+    """
+    candidates = candidate_filters(dataset, max_keys=max_keys)
+    levels = []
+    for target in selectivities or DEFAULT_SELECTIVITIES:
+        if target >= 1 or not candidates:
+            levels.append(FilterLevel(target=target, selectivity=1.0))
+            continue
+
+        distance = [abs(np.log(selectivity) - np.log(target)) for selectivity, _ in candidates]
+        chosen = [candidates[i] for i in np.argsort(distance, kind="stable")[:filters_per_level]]
+        levels.append(
+            FilterLevel(
+                target=target,
+                selectivity=float(np.mean([selectivity for selectivity, _ in chosen])),
+                filters=[filters for _, filters in chosen],
+            )
+        )
+
+    def error(level: FilterLevel) -> float:
+        return abs(np.log(level.selectivity) - np.log(level.target))
+
+    reachable = []
+    for level in levels:
+        closest = min((other for other in levels if other.filters == level.filters), key=error)
+        if level is not closest:
+            log.warning(f"dropping selectivity target {level.target:.2%}, its filters are those of target {closest.target:.2%}")
+            continue
+        if error(level) > np.log(MAX_SELECTIVITY_ERROR):
+            log.warning(f"selectivity target {level.target:.2%} is only reached with {level.selectivity:.2%}")
+        reachable.append(level)
+    return reachable
+
+
+class SelectivityResult(BaseModel):
+    level: FilterLevel
+    search_params: Dict[str, Any]
+    recall: float
+    latency: LatencySummary
+
+
+class SelectivityReport(BaseModel):
+    k: int
+    results: List[SelectivityResult] = []
+
+    def table(self) -> str:
+        """Plain text table with one row per selectivity level and search parameters."""
+        header = f"{'target':>9}{'actual':>9}  {'search':<32}{'recall':>9}{'qps':>10}{'p50':>9}{'p95':>9}{'p99':>9}"
+        rows = [header]
+        for r in self.results:
+            search = ",".join(f"{key}={value}" for key, value in r.search_params.items()) or "-"
+            rows.append(
+                f"{r.level.target:>9.2%}{r.level.selectivity:>9.2%}  {search:<32}{r.recall:>9.4f}"
+                f"{r.latency.qps:>10.1f}{r.latency.p50_ms:>9.2f}{r.latency.p95_ms:>9.2f}{r.latency.p99_ms:>9.2f}"
+            )
+        return "\n".join(rows)
+
+
+class SelectivityBenchmark:
+    """Latency and recall of filtered search as the filters get more selective.
+
+    Every query of a level gets one of the level's filters and is sent one at a time
+    from a single client. Recall is measured against the exact filtered neighbours of
+    the evaluator's dataset. Each entry of `search_grid` is run at every level, e.g.
+    the Redis hybrid policies:
+
+    Examples:
+        >>> benchmark = SelectivityBenchmark(RetrievalEvaluator(dataset), queries, k=10)
+        >>> report = benchmark.run(redis, search_grid=[
+        >>>     {"hybrid_policy": "ADHOC_BF"},
+        >>>     {"hybrid_policy": "BATCHES", "batch_size": 100},
+        >>> ])
+        >>> print(report.table())
+    """
+
+    def __init__(
+        self,
+        evaluator: RetrievalEvaluator,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        levels: Optional[List[FilterLevel]] = None,
+        warmup_queries: int = 10,
+    ):
+        self.evaluator = evaluator
+        self.queries = np.asarray(queries, dtype=np.float32)
+        self.k = k
+        self.levels = levels if levels is not None else filter_levels(evaluator.dataset)
+        self.warmup_queries = warmup_queries
+
+    def run(self, db: VectorDB, search_grid: Optional[List[Dict[str, Any]]] = None) -> SelectivityReport:
+        """Run every level with every search parameter set.
+
+        Args:
+            db(VectorDB): database loaded with the evaluator's dataset
+            search_grid(list[dict]): keyword arguments of search_embedding to try
+        """
+        report = SelectivityReport(k=self.k)
+        for level in self.levels:
+            filters = level.query_filters(len(self.queries))
+            relevant = self.evaluator.ground_truth(self.queries, self.k, filters)
+            for search_params in search_grid or [{}]:
+                retrieved, latency = timed_search(db, self.queries, self.k, filters, search_params, self.warmup_queries)
+                recall = score(retrieved, relevant, self.k).recall
+                report.results.append(
+                    SelectivityResult(level=level, search_params=search_params, recall=recall, latency=latency)
+                )
+                log.info(
+                    f"selectivity {level.selectivity:.2%} {search_params}: recall {recall:.4f}, p99 {latency.p99_ms:.2f}ms"
+                )
+        return report
@@ -0,0 +1,180 @@
+import itertools
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..vectordb.vectordb_api import VectorDB, batch_filters
+from .evaluation import RetrievalEvaluator, score
+from .latency import LatencyRecorder, LatencySummary, clock
+
+
+log = logging.getLogger(__name__)
+
+
+def grid(**values: List[Any]) -> List[Dict[str, Any]]:
+    """Every combination of the given parameter values.
+
+    Examples:
+        >>> grid(m=[16, 32], ef_construction=[200])
+        [{'m': 16, 'ef_construction': 200}, {'m': 32, 'ef_construction': 200}]
+    """
+    keys = list(values)
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values.values())]
+
+
+class SweepPoint(BaseModel):
+    """Recall and single client throughput of one combination of build and search parameters."""
+
+    build_params: Dict[str, Any]
+    search_params: Dict[str, Any]
+    recall: float
+    precision: float
+    latency: LatencySummary
+    pareto: bool = False
+
+
+class SweepReport(BaseModel):
+    k: int
+    points: List[SweepPoint] = []
+
+    def pareto_front(self) -> List[SweepPoint]:
+        """Points no other point beats on both recall and QPS, by increasing recall."""
+        return sorted([p for p in self.points if p.pareto], key=lambda p: (p.recall, -p.latency.qps))
+
+    def table(self, pareto_only: bool = False) -> str:
+        """Plain text table by increasing recall, Pareto optimal points are marked with *."""
+        points = self.pareto_front() if pareto_only else sorted(self.points, key=lambda p: (p.recall, -p.latency.qps))
+        header = f"{'':<2}{'build':<40}{'search':<24}{'recall':>9}{'qps':>10}{'p50':>9}{'p99':>9}"
+        rows = [header]
+        for p in points:
+            build = ",".join(f"{key}={value}" for key, value in p.build_params.items()) or "-"
+            search = ",".join(f"{key}={value}" for key, value in p.search_params.items()) or "-"
+            rows.append(
+                f"{'*' if p.pareto else '':<2}{build:<40}{search:<24}{p.recall:>9.4f}"
+                f"{p.latency.qps:>10.1f}{p.latency.p50_ms:>9.2f}{p.latency.p99_ms:>9.2f}"
+            )
+        return "\n".join(rows)
+
+
+def mark_pareto(points: List[SweepPoint]) -> None:
+    """Flag the points that are not dominated, i.e. no other point has higher (or equal) recall and QPS."""
+    for p in points:
+        p.pareto = not any(
+            other is not p
+            and other.recall >= p.recall
+            and other.latency.qps >= p.latency.qps
+            and (other.recall > p.recall or other.latency.qps > p.latency.qps)
+            for other in points
+        )
+
+
+def timed_search(
+    db: VectorDB,
+    queries: np.ndarray,
+    k: int,
+    filters: dict | List[dict] | None = None,
+    search_params: Optional[Dict[str, Any]] = None,
+    warmup_queries: int = 10,
+) -> Tuple[List[List[str]], LatencySummary]:
+    """Send the queries one at a time from a single client, returning the ids found and the latencies.
+
+    The first `warmup_queries` queries are sent once before timing starts.
+    """
+    search_params = search_params or {}
+    filters = batch_filters(filters, len(queries))
+    for query, query_filters in list(zip(queries, filters))[:warmup_queries]:
+        db.search_embedding(query.tolist(), k=k, filters=query_filters, **search_params)
+
+    recorder = LatencyRecorder()
+    retrieved = []
+    started = clock()
+    for query, query_filters in zip(queries, filters):
+        query = query.tolist()
+        start = clock()
+        result = db.search_embedding(query, k=k, filters=query_filters, **search_params)
+        recorder.record(start, clock())
+        retrieved.append(result.ids)
+    return retrieved, recorder.summary(clock() - started)
+
+
+def _rebuild_index(db: VectorDB, params: Dict[str, Any]) -> None:
+    db.rebuild_index(**params)
+
+
+class RecallQPSSweep:
+    """Measures recall against QPS over a grid of index build and search parameters.
+
+    For every build configuration the index is rebuilt in place with
+    `rebuild(db, params)` (by default `db.rebuild_index(**params)`, as on `Redis`),
+    then the query set is run once per search configuration: the search parameters
+    are passed as keyword arguments to `search_embedding`, e.g. `ef_runtime` for Redis.
+    Queries are sent one at a time from a single client, so QPS is the inverse of
+    the average latency and is comparable across configurations.
+
+    Examples:
+        >>> sweep = RecallQPSSweep(RetrievalEvaluator(dataset), queries, k=10)
+        >>> report = sweep.run(
+        >>>     redis,
+        >>>     build_grid=grid(m=[8, 16, 32], ef_construction=[100, 200]),
+        >>>     search_grid=grid(ef_runtime=[10, 20, 50, 100, 200]),
+        >>> )
+        >>> print(report.table(pareto_only=True))
+    """
+
+    def __init__(
+        self,
+        evaluator: RetrievalEvaluator,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict | List[dict] | None = None,
+        warmup_queries: int = 10,
+    ):
+        self.evaluator = evaluator
+        self.queries = np.asarray(queries, dtype=np.float32)
+        self.k = k
+        self.filters = filters
+        self.warmup_queries = warmup_queries
+
+    def run(
+        self,
+        db: VectorDB,
+        search_grid: Optional[List[Dict[str, Any]]] = None,
+        build_grid: Optional[List[Dict[str, Any]]] = None,
+        rebuild: Callable[[VectorDB, Dict[str, Any]], None] = _rebuild_index,
+    ) -> SweepReport:
+        """Run the sweep, an empty or missing grid means the current index and default search parameters.
+
+        Args:
+            db(VectorDB): database loaded with the evaluator's dataset
+            search_grid(list[dict]): keyword arguments of search_embedding to try
+            build_grid(list[dict]): index parameters to try, passed to `rebuild`
+            rebuild(callable): rebuilds the index of db with the given parameters
+        """
+        relevant = self.evaluator.ground_truth(self.queries, self.k, self.filters)
+        report = SweepReport(k=self.k)
+
+        for build_params in build_grid or [{}]:
+            if build_params:
+                log.info(f"rebuilding index with {build_params}")
+                started = clock()
+                rebuild(db, build_params)
+                log.info(f"index rebuilt in {clock() - started:.1f}s")
+
+            for search_params in search_grid or [{}]:
+                retrieved, latency = timed_search(db, self.queries, self.k, self.filters, search_params, self.warmup_queries)
+                quality = score(retrieved, relevant, self.k)
+                report.points.append(
+                    SweepPoint(
+                        build_params=build_params,
+                        search_params=search_params,
+                        recall=quality.recall,
+                        precision=quality.precision,
+                        latency=latency,
+                    )
+                )
+                log.info(f"{build_params} {search_params}: recall {quality.recall:.4f}, {latency.qps:.1f} qps")
+
+        mark_pareto(report.points)
+        return report
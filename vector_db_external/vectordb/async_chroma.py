@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, List, Optional
+
+import aiohttp
+import numpy as np
+
+from .vectordb_api import DBConfig, AsyncVectorDB, Projection, group_by_filter
+from .chroma import ChromaClient, include_fields
+from .search_result import EmbeddingSearchResult
+
+
+log = logging.getLogger(__name__)
+
+
+class AsyncChromaClient(AsyncVectorDB):
+    """Chroma client for AsyncVectorDB, talking to the Chroma server REST API with aiohttp.
+
+    The collection is created (or fetched) with the synchronous `ChromaClient`, after
+    that every insert and query goes through a single aiohttp session whose connection
+    pool is limited to `max_connections`. Only the "server" client mode is supported.
+    """
+
+    def __init__(
+        self,
+        database_name: str = "vector_store_benchmark",
+        vector_dimension: int = 1536,
+        db_config: DBConfig | None = None,
+        drop_old: bool = False,
+        max_connections: int = 1000,
+        **kwargs,
+    ):
+        self.sync_client = ChromaClient(
+            database_name=database_name,
+            vector_dimension=vector_dimension,
+            db_config=db_config,
+            drop_old=drop_old,
+            client_mode="server",
+            **kwargs,
+        )
+        self.db_config = self.sync_client.db_config
+        self.collection_name = self.sync_client.collection_name
+        self.collection_id = str(self.sync_client.collection.id)
+        self.max_connections = max_connections
+        self._url = f"http://{self.db_config.host}:{self.db_config.port}/api/v1/collections/{self.collection_id}"
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # aiohttp sessions belong to the running event loop, so they are created on first use
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                headers={"Content-Type": "application/json"},
+            )
+        return self._session
+
+    async def _post(self, path: str, body: dict) -> Any:
+        return await self._request("POST", path, json.dumps(body))
+
+    async def _request(self, method: str, path: str, data: Optional[str] = None) -> Any:
+        async with self._get_session().request(method, self._url + path, data=data) as resp:
+            text = await resp.text()
+            if resp.status >= 400:
+                raise RuntimeError(f"Chroma request {path} failed with status {resp.status}: {text}")
+            return json.loads(text)
+
+    async def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings into the database, one /add request per chunk.
+
+        Args:
+            embeddings(list[list[float]]): list of documents' embeddings
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+            batch_size(int): rows per request, defaults to the sync client's `insert_batch_size`
+            workers(int): requests in flight, defaults to the sync client's `insert_workers`
+        """
+        await self._write_chunks("/add", ids, embeddings, documents, metadata, batch_size, workers)
+
+    async def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings, replacing the ids that already exist, one /upsert request per chunk, see `insert_embeddings`."""
+        await self._write_chunks("/upsert", ids, embeddings, documents, metadata, batch_size, workers)
+
+    async def _write_chunks(
+        self,
+        path: str,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]],
+        metadata: Optional[List[dict]],
+        batch_size: Optional[int],
+        workers: Optional[int],
+    ) -> None:
+        batch_size = self.sync_client._batch_size(batch_size)
+        documents = self.sync_client._encode_documents(documents)
+        semaphore = asyncio.Semaphore(workers or self.sync_client.insert_workers)
+
+        async def write_chunk(start: int) -> None:
+            end = start + batch_size
+            chunk = embeddings[start:end]
+            async with semaphore:
+                await self._post(
+                    path,
+                    {
+                        "ids": ids[start:end],
+                        "embeddings": chunk.tolist() if isinstance(chunk, np.ndarray) else chunk,
+                        "metadatas": metadata[start:end] if metadata else None,
+                        "documents": documents[start:end] if documents else None,
+                        "uris": None,
+                    },
+                )
+
+        await asyncio.gather(*[write_chunk(start) for start in range(0, len(ids), batch_size)])
+
+    async def delete_embeddings(self, ids: List[str], batch_size: Optional[int] = None, **kwargs: Any) -> None:
+        """Delete the documents of the given ids, one /delete request per chunk.
+
+        Args:
+            ids(list[str]): document ids
+            batch_size(int): ids per request, see `insert_embeddings`
+        """
+        batch_size = self.sync_client._batch_size(batch_size)
+        for start in range(0, len(ids), batch_size):
+            await self._post("/delete", {"ids": ids[start:start + batch_size]})
+
+    async def search_embedding(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Search embeddings from the database.
+
+        Args:
+            query(list[float]): embedding to use as a search query
+            k(int): number of results to return
+            filters(dict[str, str]): dict of key and value for filtering on metadata
+            projection(Projection): fields to return
+            kwargs: other arguments
+        """
+        if isinstance(query, np.ndarray):
+            query = query.tolist()
+
+        results = await self._query([query], k, filters, projection)
+        return self.sync_client._result(results)
+
+    async def _query(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        filters: dict | None,
+        projection: Projection = Projection.DOCUMENTS,
+    ) -> dict:
+        body = await self._post(
+            "/query",
+            {
+                "query_embeddings": query_embeddings,
+                "n_results": k,
+                "where": filters or {},
+                "where_document": {},
+                "include": include_fields(projection),
+            },
+        )
+        return {
+            "ids": body["ids"],
+            "embeddings": body.get("embeddings"),
+            "documents": body.get("documents"),
+            "metadatas": body.get("metadatas"),
+            "distances": body.get("distances"),
+        }
+
+    async def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Search the embeddings of several queries, one request per distinct filter.
+
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results to return per query
+            filters(dict[str, str] | list[dict]): filter applied to every query, or one filter per query
+            projection(Projection): fields to return
+            kwargs: other arguments
+        """
+        queries = np.asarray(queries, dtype=np.float32).tolist()
+
+        async def query_group(query_filters: dict | None, indexes: List[int]) -> None:
+            results = await self._query([queries[i] for i in indexes], k, query_filters, projection)
+            for j, i in enumerate(indexes):
+                parsed[i] = self.sync_client._result(results, j)
+
+        parsed = [None] * len(queries)
+        await asyncio.gather(*[query_group(f, indexes) for f, indexes in group_by_filter(filters, len(queries))])
+        return parsed
+
+    async def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, fetched with one request.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        body = await self._post("/get", {"ids": ids, "include": ["documents"]})
+        return self.sync_client._documents_by_id(ids, body)
+
+    async def wait_for_indexed(
+        self, timeout: float = 3600, min_documents: Optional[int] = None, poll_interval: float = 0.1, **kwargs: Any
+    ) -> None:
+        """Wait until the collection holds `min_documents` documents, polling /count, see `ChromaClient.wait_for_indexed`.
+
+        Args:
+            timeout(float): seconds to wait before raising TimeoutError
+            min_documents(int): number of documents to wait for
+            poll_interval(float): seconds between two counts
+        """
+        if min_documents is None:
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            count = await self._request("GET", "/count")
+            if count >= min_documents:
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"collection {self.collection_name} holds {count} of {min_documents} documents after {timeout}s")
+            await asyncio.sleep(poll_interval)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
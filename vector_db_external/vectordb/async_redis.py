@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import time
+from typing import Any, Optional, List
+
+import numpy as np
+import redis.asyncio
+from redis.client import NEVER_DECODE
+from redis.commands.search.commands import SEARCH_CMD
+
+from .vectordb_api import DBConfig, AsyncVectorDB, Projection, batch_filters
+from .quantization import ScalarQuantizer
+from .redis import Redis, RedisConfig, search_args
+from .search_result import EmbeddingSearchResult
+
+
+log = logging.getLogger(__name__)
+
+
+class AsyncRedis(AsyncVectorDB):
+    """Redis client for AsyncVectorDB, backed by `redis.asyncio`.
+
+    Index creation, the hash layout, the query syntax and the result type (see
+    `compact_results`) are shared with the synchronous `Redis` client, which is
+    created once to set up the index.
+    """
+
+    def __init__(
+        self,
+        database_name: str = "vector_store_benchmark",
+        vector_dimension: int = 1536,
+        db_config: DBConfig | None = None,
+        drop_old: bool = False,
+        max_connections: Optional[int] = None,
+        **kwargs,
+    ):
+        self.sync_client = Redis(
+            database_name=database_name,
+            vector_dimension=vector_dimension,
+            db_config=db_config,
+            drop_old=drop_old,
+            **kwargs,
+        )
+        self.db_config = self.sync_client.db_config
+        self.index_name = self.sync_client.index_name
+        self.doc_prefix = self.sync_client.doc_prefix
+        self.vector_dimension = vector_dimension
+
+        self.conn = self._connect(self.db_config, max_connections)
+        self.full_precision_conn = None
+        if self.sync_client.full_precision:
+            self.full_precision_conn = self._connect(self.sync_client.full_precision_config, max_connections)
+
+    @staticmethod
+    def _connect(config: RedisConfig, max_connections: Optional[int]) -> redis.asyncio.Redis:
+        # the asyncio pools belong to the event loop, so they are not shared like `connection_pool`
+        max_connections = max_connections if max_connections is not None else config.max_connections
+        connection_kwargs = dict(
+            host=config.host.get_secret_value(),
+            port=config.port.get_secret_value(),
+            password=config.password.get_secret_value(),
+            db=0,
+            socket_timeout=config.socket_timeout,
+            socket_connect_timeout=config.socket_connect_timeout,
+        )
+        if config.blocking_pool:
+            pool = redis.asyncio.BlockingConnectionPool(
+                max_connections=max_connections or 50,
+                timeout=config.pool_timeout,
+                **connection_kwargs,
+            )
+            # from_pool hands the pool over to the client, so aclose disconnects it
+            return redis.asyncio.Redis.from_pool(pool)
+        return redis.asyncio.Redis(max_connections=max_connections, **connection_kwargs)
+
+    async def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        batch_bytes: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings into the database, see `Redis.insert_embeddings`.
+
+        Args:
+            embeddings(np.ndarray | list[list[float]] | bytes): (n, dim) float32 array, list of documents' embeddings or float32 buffer
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+            batch_size(int): flush the pipeline every `batch_size` rows
+            batch_bytes(int): flush the pipeline once the pending payload reaches `batch_bytes`
+        """
+        await self._write_hashes(ids, embeddings, documents, metadata, batch_size, batch_bytes)
+
+    async def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        batch_bytes: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings, replacing the hashes of ids that already exist, see `Redis.upsert_embeddings`."""
+        await self._write_hashes(ids, embeddings, documents, metadata, batch_size, batch_bytes, replace=True)
+
+    async def _write_hashes(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        documents: Optional[List[str]],
+        metadata: Optional[List[dict]],
+        batch_size: Optional[int],
+        batch_bytes: Optional[int],
+        replace: bool = False,
+    ) -> None:
+        batch_size = batch_size or self.sync_client.insert_batch_size
+        batch_bytes = batch_bytes or self.sync_client.insert_batch_bytes
+
+        await self._resolve_quantizer(embeddings)
+        # like the sync client, the full precision vectors exist before the documents are indexed
+        if self.full_precision_conn is not None:
+            await self._insert_full_precision(ids, embeddings, batch_size)
+
+        pending_rows = 0
+        pending_bytes = 0
+        async with self.conn.pipeline(transaction=replace) as pipe:
+            for key, mapping, nbytes in self.sync_client._hashes(ids, embeddings, documents, metadata):
+                if replace:
+                    pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pending_rows += 1
+                pending_bytes += nbytes
+                if pending_rows >= batch_size or pending_bytes >= batch_bytes:
+                    await pipe.execute()
+                    pending_rows = 0
+                    pending_bytes = 0
+
+            if pending_rows:
+                await pipe.execute()
+
+    async def _resolve_quantizer(self, embeddings: Optional[np.ndarray | List[List[float]] | bytes | memoryview] = None) -> None:
+        """Load the INT8 scales with the asyncio connection, fitting them on `embeddings` when no client did yet.
+
+        Once loaded they are cached by the sync client, which then never reads them with its blocking connection.
+        """
+        sync_client = self.sync_client
+        if sync_client.index_config.vector_type != "INT8" or sync_client._quantizer is not None:
+            return
+        stored = await self.conn.get(sync_client.quantizer_key)
+        if stored is None and embeddings is not None:
+            scales = ScalarQuantizer.fit(sync_client._float_matrix(embeddings)).to_json()
+            await self.conn.set(sync_client.quantizer_key, scales, nx=True)
+            stored = await self.conn.get(sync_client.quantizer_key)
+        sync_client._load_quantizer(stored)
+
+    async def delete_embeddings(self, ids: List[str], batch_size: Optional[int] = None, **kwargs: Any) -> None:
+        """Delete the hashes of the given ids, see `Redis.delete_embeddings`."""
+        batch_size = batch_size or self.sync_client.insert_batch_size
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            await self.conn.delete(*[f"{self.doc_prefix}{id}" for id in batch])
+            if self.full_precision_conn is not None:
+                await self.full_precision_conn.delete(*[self.sync_client.full_precision_key(id) for id in batch])
+
+    async def _insert_full_precision(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        batch_size: int,
+    ) -> None:
+        matrix = self.sync_client._float_matrix(embeddings)
+        async with self.full_precision_conn.pipeline(transaction=False) as pipe:
+            for start in range(0, len(matrix), batch_size):
+                for i in range(start, min(start + batch_size, len(matrix))):
+                    pipe.set(self.sync_client.full_precision_key(ids[i]), memoryview(matrix[i]).cast("B"))
+                await pipe.execute()
+
+    async def _read_full_precision(self, results: list) -> List[bytes | None]:
+        keys = self.sync_client._full_precision_keys(results)
+        return await self.full_precision_conn.mget(keys) if keys else []
+
+    async def search_embedding(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        rerank: Optional[int] = None,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Search embeddings from the database.
+
+        Args:
+            query(list[float]): embedding to use as a search query
+            k(int): number of results to return
+            filters(dict[str, str]): dict of key and value for filtering on metadata
+            projection(Projection): fields to return
+            rerank(int): re-rank k * rerank candidates against the full precision vectors
+            kwargs: other arguments, see `Redis.search_embedding`
+        """
+        projection = Projection(projection)
+        candidates = self.sync_client._candidates(k, rerank)
+        await self._resolve_quantizer()
+        query_obj, query_params = self.sync_client._search_query(
+            query, candidates, filters, projection=projection, **kwargs
+        )
+        args = search_args(self.index_name, query_obj, query_params)
+        response = await self.conn.execute_command(SEARCH_CMD, *args, **{NEVER_DECODE: True})
+        result = self.sync_client._parse_response(response, projection)
+        if rerank:
+            result = self.sync_client._rerank(query, result, k, await self._read_full_precision([result]))
+        return result
+
+    async def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        rerank: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Search the embeddings of several queries, sending all FT.SEARCH commands in one pipeline.
+
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results to return per query
+            filters(dict[str, str] | list[dict]): filter applied to every query, or one filter per query
+            projection(Projection): fields to return
+            rerank(int): re-rank k * rerank candidates against the full precision vectors
+            kwargs: other arguments, see `search_embedding`
+        """
+        projection = Projection(projection)
+        candidates = self.sync_client._candidates(k, rerank)
+        queries = np.asarray(queries, dtype=np.float32)
+        await self._resolve_quantizer()
+        async with self.conn.pipeline(transaction=False) as pipe:
+            for query, query_filters in zip(queries, batch_filters(filters, len(queries))):
+                query_obj, query_params = self.sync_client._search_query(
+                    query, candidates, query_filters, projection=projection, **kwargs
+                )
+                # AsyncSearch.search does not recognize asyncio pipelines, so FT.SEARCH is queued directly
+                pipe.execute_command(SEARCH_CMD, *search_args(self.index_name, query_obj, query_params), **{NEVER_DECODE: True})
+            responses = await pipe.execute()
+
+        results = self.sync_client._parse_pipeline_results(responses, projection)
+        if rerank:
+            results = self.sync_client._rerank_batch(queries, results, k, await self._read_full_precision(results))
+        return results
+
+    async def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, read with one pipelined HGET per id.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        async with self.conn.pipeline(transaction=False) as pipe:
+            for id in ids:
+                pipe.hget(f"{self.doc_prefix}{id}", "document")
+            documents = await pipe.execute()
+        return [self.sync_client._decode_document(document) for document in documents]
+
+    async def wait_for_indexed(self, timeout: float = 3600, min_documents: Optional[int] = None, poll_interval: float = 0.1) -> None:
+        """Wait until RediSearch has indexed every document, see `Redis.wait_for_indexed`."""
+        deadline = time.monotonic() + timeout
+        while True:
+            info = await self.conn.ft(self.index_name).info()
+            if self.sync_client._indexed(info, min_documents):
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"index {self.index_name} still indexing after {timeout}s")
+            await asyncio.sleep(poll_interval)
+
+    async def close(self) -> None:
+        await self.conn.aclose()
+        if self.full_precision_conn is not None:
+            await self.full_precision_conn.aclose()
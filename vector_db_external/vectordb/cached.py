@@ -0,0 +1,282 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from .vectordb_api import VectorDB, batch_filters
+from .search_result import CompactSearchResult, EmbeddingSearchResult
+
+
+log = logging.getLogger(__name__)
+
+
+# rough per entry bookkeeping cost: key, OrderedDict node, result object and its lists
+ENTRY_OVERHEAD_BYTES = 512
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _received_size(value: Any) -> int:
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(key) + _received_size(field) for key, field in value.items())
+    return len(json.dumps(value, default=str))
+
+
+def result_size(result: EmbeddingSearchResult | CompactSearchResult) -> int:
+    """Approximate memory held by a cached search result, in bytes.
+
+    Compact results are sized from the documents and metadata as received, e.g.
+    compressed bytes or raw Redis rows, so caching them does not decode them.
+    """
+    size = ENTRY_OVERHEAD_BYTES + sum(len(id) for id in result.ids)
+    if isinstance(result, CompactSearchResult):
+        documents, metadatas = result.received_documents, result.received_metadatas
+    else:
+        documents, metadatas = result.documents, result.metadatas
+    if documents:
+        size += sum(len(document) for document in documents if document)
+    if metadatas:
+        size += sum(_received_size(metadata) for metadata in metadatas if metadata)
+    if result.embeddings is not None:
+        size += 8 * int(np.size(result.embeddings))
+    if result.distances is not None:
+        size += 8 * len(result.distances)
+    return size
+
+
+def query_key(query: np.ndarray | List[float], k: int, filters: dict | None, **kwargs: Any) -> str:
+    """Cache key of a search: hash of the float32 query bytes, k, the filters and other search arguments."""
+    digest = hashlib.blake2b(np.ascontiguousarray(query, dtype=np.float32).tobytes(), digest_size=16)
+    digest.update(json.dumps([k, filters, kwargs], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class CachedVectorDB(VectorDB):
+    """Search result cache in front of any VectorDB.
+
+    Results are kept in an LRU keyed by `query_key`. An entry expires `ttl` seconds
+    after it was stored, and the least recently used entries are evicted once the
+    cache holds more than `max_entries` entries or `max_bytes` bytes (see `result_size`).
+    Every `insert_embeddings` call clears the cache, since any insert can change the
+    results of any query. Cached results are shared between callers and must not be
+    modified.
+
+    The wrapped database is either given as `db` or created from `db_class` and the
+    remaining keyword arguments, so the wrapper also works with `DBFactory`.
+
+    Examples:
+        >>> cached = CachedVectorDB(Redis(database_name="random_dataset"), max_bytes=256 * 1024 * 1024, ttl=60)
+        >>> cached.search_embedding(query, k=10)
+        >>> cached.stats().hit_ratio
+    """
+
+    def __init__(
+        self,
+        db: Optional[VectorDB] = None,
+        db_class: Optional[Type[VectorDB]] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        **db_kwargs: Any,
+    ):
+        if db is None:
+            if db_class is None:
+                raise ValueError("either db or db_class is required")
+            db = db_class(**db_kwargs)
+        self.db = db
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[EmbeddingSearchResult, int, float]]" = OrderedDict()
+        self._stats = CacheStats()
+        # bumped by every insert, results of searches started before an insert are not stored
+        self._generation = 0
+
+    def stats(self) -> CacheStats:
+        """Copy of the counters."""
+        with self._lock:
+            return self._stats.model_copy(update={"entries": len(self._entries)})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.bytes = 0
+
+    def _get(self, key: str) -> Optional[EmbeddingSearchResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, size, stored = entry
+                if self.ttl is not None and self.clock() - stored > self.ttl:
+                    del self._entries[key]
+                    self._stats.bytes -= size
+                    self._stats.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return result
+            self._stats.misses += 1
+            return None
+
+    def _put(self, key: str, result: EmbeddingSearchResult, generation: int) -> None:
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._stats.bytes -= previous[1]
+            self._entries[key] = (result, size, self.clock())
+            self._stats.bytes += size
+            while self._stats.bytes > self.max_bytes or (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._stats.bytes -= evicted_size
+                self._stats.evictions += 1
+
+    def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings into the wrapped database and invalidate the cache.
+
+        Args:
+            embeddings(np.ndarray | list[list[float]]): list of documents' embeddings
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+        """
+        try:
+            self.db.insert_embeddings(ids=ids, embeddings=embeddings, documents=documents, metadata=metadata, **kwargs)
+        finally:
+            self._invalidate()
+
+    def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Upsert embeddings into the wrapped database and invalidate the cache, see `insert_embeddings`."""
+        try:
+            self.db.upsert_embeddings(ids=ids, embeddings=embeddings, documents=documents, metadata=metadata, **kwargs)
+        finally:
+            self._invalidate()
+
+    def delete_embeddings(self, ids: List[str], **kwargs: Any) -> None:
+        """Delete the given ids from the wrapped database and invalidate the cache."""
+        try:
+            self.db.delete_embeddings(ids, **kwargs)
+        finally:
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._stats.bytes = 0
+            self._stats.invalidations += 1
+
+    def max_insert_batch_size(self) -> Optional[int]:
+        return self.db.max_insert_batch_size()
+
+    def close(self) -> None:
+        self.clear()
+        self.db.close()
+
+    def wait_for_indexed(self, timeout: float = 3600, min_documents: Optional[int] = None, **kwargs: Any) -> None:
+        """Wait for the wrapped database, then drop the results cached from the partial index."""
+        self.db.wait_for_indexed(timeout, min_documents, **kwargs)
+        self._invalidate()
+
+    def search_embedding(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Search embeddings, answering from the cache when the same search was done before.
+
+        Args:
+            query(list[float]): embedding to use as a search query
+            k(int): number of results to return
+            filters(dict[str, str]): dict of key and value for filtering on metadata
+            kwargs: other arguments, passed to the wrapped database and part of the cache key
+        """
+        key = query_key(query, k, filters, **kwargs)
+        generation = self._generation
+        result = self._get(key)
+        if result is None:
+            result = self.db.search_embedding(query, k=k, filters=filters, **kwargs)
+            self._put(key, result, generation)
+        return result
+
+    def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Search the embeddings of several queries, only the cache misses are sent to the wrapped database.
+
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results to return per query
+            filters(dict[str, str] | list[dict]): filter applied to every query, or one filter per query
+            kwargs: other arguments, see `search_embedding`
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        query_filters = batch_filters(filters, len(queries))
+        keys = [query_key(query, k, f, **kwargs) for query, f in zip(queries, query_filters)]
+        generation = self._generation
+        results = [self._get(key) for key in keys]
+
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            found = self.db.search_embeddings_batch(
+                queries[misses], k=k, filters=[query_filters[i] for i in misses], **kwargs
+            )
+            for i, result in zip(misses, found):
+                results[i] = result
+                self._put(keys[i], result, generation)
+        return results
+
+    def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, always read from the wrapped database."""
+        return self.db.get_documents(ids)
@@ -1,22 +1,92 @@
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import chromadb
-from typing import Any, List, Optional
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
 
-from pydantic import SecretStr
+from pydantic import BaseModel, SecretStr
 
 
-from .vectordb_api import DBConfig, VectorDB
-from .search_result import EmbeddingSearchResult
+from .vectordb_api import DBConfig, MetricType, Projection, VectorDB, group_by_filter
+from .codec import DocumentCodec
+from .instrumentation import Timer, instrumentation
+from .search_result import CompactSearchResult, EmbeddingSearchResult
 
 
 log = logging.getLogger(__name__)
 
 
+_CHROMA_SPACES = {MetricType.L2: "l2", MetricType.COSINE: "cosine", MetricType.IP: "ip"}
+
+
+class ChromaIndexConfig(BaseModel):
+    """HNSW parameters of a Chroma collection, stored as its "hnsw:*" metadata. None leaves the Chroma default.
+
+    They are read when the collection is created, an existing collection keeps its
+    own: create the client with `drop_old` to re-create it with other parameters.
+
+    Args:
+        metric_type(MetricType): hnsw:space, L2 (the Chroma default), COSINE or IP
+        m(int): hnsw:M, maximum number of outgoing edges per node
+        construction_ef(int): hnsw:construction_ef, candidate list size while building the graph
+        search_ef(int): hnsw:search_ef, candidate list size while searching
+        num_threads(int): hnsw:num_threads, threads used to build the index
+        batch_size(int): hnsw:batch_size, vectors buffered in memory before they are added to the index
+        sync_threshold(int): hnsw:sync_threshold, vectors added before the index is persisted
+        resize_factor(float): hnsw:resize_factor, growth factor of the index capacity
+    """
+
+    metric_type: Optional[MetricType] = None
+    m: Optional[int] = None
+    construction_ef: Optional[int] = None
+    search_ef: Optional[int] = None
+    num_threads: Optional[int] = None
+    batch_size: Optional[int] = None
+    sync_threshold: Optional[int] = None
+    resize_factor: Optional[float] = None
+
+    def collection_metadata(self) -> Dict[str, Any]:
+        metadata = {
+            "hnsw:space": _CHROMA_SPACES[self.metric_type] if self.metric_type is not None else None,
+            "hnsw:M": self.m,
+            "hnsw:construction_ef": self.construction_ef,
+            "hnsw:search_ef": self.search_ef,
+            "hnsw:num_threads": self.num_threads,
+            "hnsw:batch_size": self.batch_size,
+            "hnsw:sync_threshold": self.sync_threshold,
+            "hnsw:resize_factor": self.resize_factor,
+        }
+        return {key: value for key, value in metadata.items() if value is not None}
+
+
 class ChromaConfig(DBConfig):
+    """Chroma connection settings.
+
+    Args:
+        index_config(ChromaIndexConfig): HNSW parameters of the collection, overridden by
+            the `index_config` argument of the client
+    """
+
     password: SecretStr
     host: str
     port: str
+    index_config: Optional[ChromaIndexConfig] = None
+
+
+def include_fields(projection: Projection) -> List[str]:
+    """Chroma `include` list of a projection, ids are always returned."""
+    projection = Projection(projection)
+    include = ["distances"]
+    if projection.includes(Projection.METADATA):
+        include.append("metadatas")
+    if projection.includes(Projection.DOCUMENTS):
+        include.append("documents")
+    if projection.includes(Projection.EMBEDDINGS):
+        include.append("embeddings")
+    return include
 
 
 def default_config():
@@ -28,7 +98,19 @@ def default_config():
 
 
 class ChromaClient(VectorDB):
-    """Chroma client for VectorDB."""
+    """Chroma client for VectorDB.
+
+    With `compact_results` searches return `CompactSearchResult` instead of the
+    pydantic EmbeddingSearchResult, skipping its validation.
+
+    Inserts are split into chunks of `insert_batch_size` rows, capped by the client's
+    max batch size, and sent from `insert_workers` threads, in "server" as well as in
+    "local" (PersistentClient) mode.
+
+    With a `document_codec` documents are stored as base64 text of the compressed
+    documents, Chroma only stores strings, and decompressed by the client, lazily
+    with `compact_results`. `where_document` filters do not work on them.
+    """
 
     def __init__(
         self,
@@ -38,10 +120,20 @@ class ChromaClient(VectorDB):
         drop_old: bool = False,
         client_mode: str = "server",
         database_path: str = None,
+        compact_results: bool = False,
+        index_config: ChromaIndexConfig | None = None,
+        insert_batch_size: int = 1000,
+        insert_workers: int = 1,
+        document_codec: DocumentCodec | None = None,
         **kwargs,
     ):
         self.db_config = db_config if db_config is not None else default_config()
         self.collection_name = database_name
+        self.compact_results = compact_results
+        self.index_config = index_config or getattr(self.db_config, "index_config", None) or ChromaIndexConfig()
+        self.insert_batch_size = insert_batch_size
+        self.insert_workers = insert_workers
+        self.document_codec = document_codec
         if client_mode == "server":
             self.client = chromadb.HttpClient(
                 host=self.db_config.host, port=self.db_config.port
@@ -49,18 +141,33 @@ class ChromaClient(VectorDB):
         else:
             self.client = chromadb.PersistentClient(path=database_path)
 
-
-        self.collection = self.client.get_or_create_collection(self.collection_name)
-
         if self.client.heartbeat() is None:
             raise ConnectionError
 
         if drop_old:
             try:
-                self.client.reset()  # Reset the database
-            except:
-                drop_old = False
+                self.client.delete_collection(self.collection_name)
                 log.info(f"Chroma client drop_old collection: {self.collection_name}")
+            except Exception:
+                log.info(f"collection {self.collection_name} does not exist")
+
+        self.collection = self._get_or_create_collection()
+
+    def _get_or_create_collection(self) -> chromadb.Collection:
+        metadata = self.index_config.collection_metadata()
+        try:
+            collection = self.client.get_collection(self.collection_name)
+        except Exception:
+            # get_or_create_collection would overwrite the metadata of an existing collection
+            return self.client.get_or_create_collection(self.collection_name, metadata=metadata or None)
+
+        ignored = {key: value for key, value in metadata.items() if (collection.metadata or {}).get(key) != value}
+        if ignored:
+            log.warning(
+                f"collection {self.collection_name} already exists, index parameters {ignored} are ignored, "
+                f"use drop_old to re-create it"
+            )
+        return collection
 
     def insert_embeddings(
         self,
@@ -68,29 +175,142 @@ class ChromaClient(VectorDB):
         embeddings: List[List[float]],
         documents: Optional[List[str]] = None,
         metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
-        """Insert embeddings into the database.
+        """Insert embeddings into the database, one `collection.add` call per chunk.
 
         Args:
-            embeddings(list[list[float]]): list of documents' embeddings
+            embeddings(np.ndarray | list[list[float]]): list of documents' embeddings
             documents(list[str]): list of textual documents
             ids(list[str]): list of ids for each given document
             metadata(dict[str, str]): dict of key and value for metadata
+            batch_size(int): rows per chunk, defaults to `self.insert_batch_size`, capped by the client's max batch size
+            workers(int): chunks added in parallel, defaults to `self.insert_workers`
         """
-        return self.collection.add(
-            embeddings=embeddings,
-            ids=ids,
-            metadatas=metadata,
-            documents=documents,
-            **kwargs,
-        )
+        timer = instrumentation.timer("chroma.insert")
+        self._write_chunks(self.collection.add, timer, ids, embeddings, documents, metadata, batch_size, workers, **kwargs)
+
+    def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings, replacing the ids that already exist, one `collection.upsert` call per chunk.
+
+        Args:
+            embeddings(np.ndarray | list[list[float]]): list of documents' embeddings
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+            batch_size(int): rows per chunk, see `insert_embeddings`
+            workers(int): chunks upserted in parallel, see `insert_embeddings`
+        """
+        timer = instrumentation.timer("chroma.upsert")
+        self._write_chunks(self.collection.upsert, timer, ids, embeddings, documents, metadata, batch_size, workers, **kwargs)
+
+    def _write_chunks(
+        self,
+        write: Callable[..., None],
+        timer: Timer,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]],
+        metadata: Optional[List[dict]],
+        batch_size: Optional[int],
+        workers: Optional[int],
+        **kwargs: Any,
+    ) -> None:
+        batch_size = self._batch_size(batch_size)
+        workers = workers or self.insert_workers
+        documents = self._encode_documents(documents)
+
+        def write_chunk(start: int) -> None:
+            end = start + batch_size
+            chunk = embeddings[start:end]
+            write(
+                embeddings=chunk.tolist() if isinstance(chunk, np.ndarray) else chunk,
+                ids=ids[start:end],
+                metadatas=metadata[start:end] if metadata else None,
+                documents=documents[start:end] if documents else None,
+                **kwargs,
+            )
+
+        starts = range(0, len(ids), batch_size)
+        if workers > 1 and len(starts) > 1:
+            with ThreadPoolExecutor(min(workers, len(starts))) as executor:
+                list(executor.map(write_chunk, starts))
+        else:
+            for start in starts:
+                write_chunk(start)
+        timer.lap("round_trip")
+        timer.stop()
+
+    def _encode_documents(self, documents: Optional[List[str]]) -> Optional[List[str]]:
+        if self.document_codec is None or not documents:
+            return documents
+        return [self.document_codec.compress_text(document) if document is not None else None for document in documents]
+
+    def _decode_document(self, document: Optional[str]) -> Optional[str]:
+        return self.document_codec.decompress_text(document) if self.document_codec is not None else document
+
+    def _batch_size(self, batch_size: Optional[int]) -> int:
+        batch_size = batch_size or self.insert_batch_size
+        max_batch_size = self.max_insert_batch_size()
+        return min(batch_size, max_batch_size) if max_batch_size else batch_size
+
+    def delete_embeddings(self, ids: List[str], batch_size: Optional[int] = None, **kwargs: Any) -> None:
+        """Delete the documents of the given ids, one `collection.delete` call per chunk.
+
+        Args:
+            ids(list[str]): document ids
+            batch_size(int): ids per call, see `insert_embeddings`
+        """
+        timer = instrumentation.timer("chroma.delete")
+        batch_size = self._batch_size(batch_size)
+        for start in range(0, len(ids), batch_size):
+            self.collection.delete(ids=ids[start:start + batch_size])
+        timer.lap("round_trip")
+        timer.stop()
+
+    def max_insert_batch_size(self) -> Optional[int]:
+        return self.client.max_batch_size
+
+    def wait_for_indexed(self, timeout: float = 3600, min_documents: Optional[int] = None, poll_interval: float = 0.1, **kwargs: Any) -> None:
+        """Wait until the collection holds `min_documents` documents.
+
+        Chroma adds the embeddings to the HNSW index before `collection.add` returns, so
+        without `min_documents` there is nothing to wait for. With several writers, or
+        other clients of the server, `collection.count()` is polled until it is reached.
+
+        Args:
+            timeout(float): seconds to wait before raising TimeoutError
+            min_documents(int): number of documents to wait for
+            poll_interval(float): seconds between two counts
+        """
+        if min_documents is None:
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            count = self.collection.count()
+            if count >= min_documents:
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"collection {self.collection.name} holds {count} of {min_documents} documents after {timeout}s")
+            time.sleep(poll_interval)
 
     def search_embedding(
         self,
         query: list[float],
         k: int = 10,
         filters: dict[str, str] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
         **kwargs: Any,
     ) -> List[EmbeddingSearchResult]:
         """Search embeddings from the database.
@@ -99,32 +319,128 @@ class ChromaClient(VectorDB):
             query(list[float]): embedding to use as a search query
             k(int): number of results to return
             filters(dict[str, str]): dict of key and value for filtering on metadata
+            projection(Projection): fields to return, mapped to the Chroma `include` list
+            kwargs: other arguments
+
+        """
+        timer = instrumentation.timer("chroma.search")
+        results = self.collection.query(
+            query_embeddings=query, n_results=k, where=filters, include=include_fields(projection)
+        )
+        timer.lap("round_trip")
+
+        result = self._result(results)
+        timer.lap("result")
+        timer.stop()
+        return result
+
+    def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Search the embeddings of several queries with a single `collection.query` call.
+
+        Chroma takes one `where` per call, so when each query has its own filter the
+        queries are grouped by filter and one call is made per distinct filter.
+
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results to return per query
+            filters(dict[str, str] | list[dict]): filter applied to every query, or one filter per query
+            projection(Projection): fields to return
             kwargs: other arguments
+        """
+        timer = instrumentation.timer("chroma.search_batch")
+        queries = np.asarray(queries, dtype=np.float32).tolist()
+        include = include_fields(projection)
+        timer.lap("encode")
+
+        parsed = [None] * len(queries)
+        for query_filters, indexes in group_by_filter(filters, len(queries)):
+            results = self.collection.query(
+                query_embeddings=[queries[i] for i in indexes], n_results=k, where=query_filters, include=include
+            )
+            timer.lap("round_trip")
+            for j, i in enumerate(indexes):
+                parsed[i] = self._result(results, j)
+            timer.lap("result")
+        timer.stop()
+        return parsed
 
+    def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, fetched with one `collection.get` call.
+
+        Args:
+            ids(list[str]): document ids
         """
-        results = self.collection.query(query_embeddings=query, n_results=k, where=filters)
+        timer = instrumentation.timer("chroma.get_documents")
+        results = self.collection.get(ids=ids, include=["documents"])
+        timer.lap("round_trip")
+        documents = self._documents_by_id(ids, results)
+        timer.lap("result")
+        timer.stop()
+        return documents
 
+    def _documents_by_id(self, ids: List[str], results: dict) -> List[Optional[str]]:
+        """Chroma returns the documents found in its own order, put them back in the order of ids."""
+        found = dict(zip(results["ids"], results["documents"]))
+        return [self._decode_document(found.get(id)) for id in ids]
+
+    def _result(self, results: dict, i: int = 0) -> EmbeddingSearchResult | CompactSearchResult:
+        """The i-th query of a Chroma query response as the client's result type."""
+        if not self.compact_results:
+            decode_document = self._decode_document if self.document_codec is not None else None
+            return self._parse_query_result(results, i, decode_document)
+        with_documents = results["documents"] is not None
+        return CompactSearchResult(
+            ids=results["ids"][i],
+            distances=np.asarray(results["distances"][i], dtype=np.float32) if results.get("distances") else None,
+            documents=results["documents"][i] if with_documents else None,
+            decode_document=self.document_codec.decompress_text if with_documents and self.document_codec is not None else None,
+            metadatas=results["metadatas"][i] if results["metadatas"] is not None else None,
+            embeddings=np.asarray(results["embeddings"][i], dtype=np.float32) if results["embeddings"] is not None else None,
+        )
+
+    @staticmethod
+    def _parse_query_result(
+        results: dict,
+        i: int = 0,
+        decode_document: Optional[Callable[[Optional[str]], Optional[str]]] = None,
+    ) -> EmbeddingSearchResult:
+        """Convert the i-th query of a Chroma query response into an EmbeddingSearchResult."""
         if results["embeddings"] is not None:
-            embeddings =  results["embeddings"][0]
+            embeddings =  results["embeddings"][i]
         else:
             embeddings = None
 
         if results["documents"] is not None:
-            documents =  results["documents"][0]
+            documents =  results["documents"][i]
+            if decode_document is not None:
+                documents = [decode_document(document) for document in documents]
         else:
             documents = None
 
         if results["metadatas"] is not None:
-            metadatas =  results["metadatas"][0]
+            metadatas =  results["metadatas"][i]
         else:
             metadatas = None
 
+        if results.get("distances") is not None:
+            distances = results["distances"][i]
+        else:
+            distances = None
+
 
         parsed_result = {
-            "ids": results["ids"][0],
+            "ids": results["ids"][i],
             "embeddings": embeddings,
             "documents": documents,
-            "metadatas": metadatas
+            "metadatas": metadatas,
+            "distances": distances,
         }
 
         embedding_search_result = EmbeddingSearchResult(**parsed_result)
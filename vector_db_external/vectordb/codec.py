@@ -0,0 +1,193 @@
+import base64
+import json
+import threading
+import zlib
+from collections import Counter
+from typing import Iterable, List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("the zstd document codec needs the zstandard package: pip install zstandard") from e
+    return zstandard
+
+
+class CompressionStats(BaseModel):
+    """Sizes of the documents compressed by a codec since it was created.
+
+    Args:
+        documents(int): number of documents compressed
+        raw_bytes(int): utf-8 size of the documents
+        compressed_bytes(int): size of the compressed documents
+    """
+
+    documents: int = 0
+    raw_bytes: int = 0
+    compressed_bytes: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """raw_bytes / compressed_bytes, above 1 when compression saves space."""
+        return self.raw_bytes / self.compressed_bytes if self.compressed_bytes else 0.0
+
+
+def _zlib_dictionary(samples: Iterable[str], dict_size: int) -> bytes:
+    """Preset dictionary for zlib, the words saving the most bytes over the samples.
+
+    zlib has no dictionary trainer: words are ranked by occurrences times length and
+    the best ones are kept, most valuable last since zlib reaches closer matches
+    with shorter distances.
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update(sample.split(" "))
+    words = sorted(counts, key=lambda word: counts[word] * len(word.encode()), reverse=True)
+
+    chosen = []
+    size = 0
+    for word in words:
+        if counts[word] < 2:
+            break
+        encoded = word.encode() + b" "
+        if size + len(encoded) > dict_size:
+            continue
+        chosen.append(encoded)
+        size += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+class DocumentCodec:
+    """Compression of the documents stored in the database, zlib or zstd, with an optional dictionary.
+
+    Short texts compress poorly on their own, a dictionary trained on a sample of the
+    corpus (see `train`) gives the compressor the common words up front. The same
+    codec, with the same dictionary, must be given to every client reading the
+    documents, `to_json` and `from_json` carry it between runs.
+
+    Args:
+        algorithm(str): "zlib" (standard library) or "zstd" (needs the zstandard package)
+        level(int): compression level, the algorithm default when None
+        dictionary(bytes): preset dictionary, see `train`
+    """
+
+    def __init__(
+        self,
+        algorithm: Literal["zlib", "zstd"] = "zlib",
+        level: Optional[int] = None,
+        dictionary: Optional[bytes] = None,
+    ):
+        if algorithm not in ("zlib", "zstd"):
+            raise ValueError(f"unknown document codec {algorithm}")
+        self.algorithm = algorithm
+        self.level = level
+        self.dictionary = dictionary
+        self._lock = threading.Lock()
+        self._stats = CompressionStats()
+        # zstd (de)compressors are not thread safe, each thread gets its own
+        self._local = threading.local()
+        if algorithm == "zstd":
+            _zstandard()
+
+    @classmethod
+    def train(
+        cls,
+        samples: List[str],
+        algorithm: Literal["zlib", "zstd"] = "zlib",
+        level: Optional[int] = None,
+        dict_size: int = 32 * 1024,
+    ) -> "DocumentCodec":
+        """Codec with a dictionary trained on a sample of the documents.
+
+        Args:
+            samples(list[str]): documents representative of the corpus, a few hundred or more
+            algorithm(str): "zlib" or "zstd"
+            level(int): compression level
+            dict_size(int): dictionary size in bytes, zlib only uses the last 32KB
+        """
+        if algorithm == "zstd":
+            zstandard = _zstandard()
+            dictionary = zstandard.train_dictionary(dict_size, [sample.encode() for sample in samples]).as_bytes()
+        else:
+            dictionary = _zlib_dictionary(samples, min(dict_size, 32 * 1024))
+        return cls(algorithm, level=level, dictionary=dictionary)
+
+    def __getstate__(self) -> dict:
+        return {"algorithm": self.algorithm, "level": self.level, "dictionary": self.dictionary}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def _zstd(self) -> tuple:
+        codecs = getattr(self._local, "zstd", None)
+        if codecs is None:
+            zstandard = _zstandard()
+            dictionary = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            level = self.level if self.level is not None else 3
+            codecs = self._local.zstd = (
+                zstandard.ZstdCompressor(level=level, dict_data=dictionary),
+                zstandard.ZstdDecompressor(dict_data=dictionary),
+            )
+        return codecs
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.algorithm == "zstd":
+            return self._zstd()[0].compress(data)
+        level = self.level if self.level is not None else -1
+        if self.dictionary:
+            compressor = zlib.compressobj(level, zdict=self.dictionary)
+            return compressor.compress(data) + compressor.flush()
+        return zlib.compress(data, level)
+
+    def compress(self, document: str) -> bytes:
+        data = document.encode()
+        compressed = self._compress(data)
+        with self._lock:
+            self._stats.documents += 1
+            self._stats.raw_bytes += len(data)
+            self._stats.compressed_bytes += len(compressed)
+        return compressed
+
+    def compressed_size(self, document: str) -> int:
+        """Size of the compressed document, not counted in `stats`."""
+        return len(self._compress(document.encode()))
+
+    def decompress(self, data: bytes | None) -> str | None:
+        if data is None:
+            return None
+        if self.algorithm == "zstd":
+            return self._zstd()[1].decompress(data).decode()
+        if self.dictionary:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+            return (decompressor.decompress(data) + decompressor.flush()).decode()
+        return zlib.decompress(data).decode()
+
+    def compress_text(self, document: str) -> str:
+        """Compressed document as base64 text, for databases that only store strings."""
+        return base64.b64encode(self.compress(document)).decode()
+
+    def decompress_text(self, data: str | None) -> str | None:
+        return self.decompress(base64.b64decode(data)) if data is not None else None
+
+    def stats(self) -> CompressionStats:
+        """Copy of the sizes of every document compressed so far."""
+        with self._lock:
+            return self._stats.model_copy()
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "algorithm": self.algorithm,
+                "level": self.level,
+                "dictionary": base64.b64encode(self.dictionary).decode() if self.dictionary else None,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "DocumentCodec":
+        config = json.loads(data)
+        dictionary = base64.b64decode(config["dictionary"]) if config["dictionary"] else None
+        return cls(config["algorithm"], level=config["level"], dictionary=dictionary)
@@ -0,0 +1,242 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# Hot path timings use the same clock as the benchmark latencies
+clock = time.perf_counter
+
+
+class Histogram:
+    """Log-linear histogram of integer values (nanoseconds), in the style of HdrHistogram.
+
+    Values below 2 ** sub_bucket_bits are counted exactly, above that every power of
+    two is split into 2 ** (sub_bucket_bits - 1) equal buckets, so any recorded value is
+    known within a relative error of 2 ** -(sub_bucket_bits - 1) (~3% for the default
+    6 bits) whatever its magnitude. Recording is a couple of integer operations.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 6):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return ((shift + 1) << (self.sub_bucket_bits - 1)) + (value >> shift) - (1 << (self.sub_bucket_bits - 1))
+
+    def bucket_bounds(self, index: int) -> tuple:
+        """[lower, upper) values counted in bucket `index`."""
+        half = 1 << (self.sub_bucket_bits - 1)
+        if index < 2 * half:
+            return index, index + 1
+        shift = index // half - 1
+        lower = (index - shift * half) << shift
+        return lower, lower + (1 << shift)
+
+    def record(self, value: int) -> None:
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("can not merge histograms of different precision")
+        # list() takes a consistent copy even if another thread is recording into `other`
+        for index, count in list(other.counts.items()):
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (0-100), capped by the maximum."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return float(min(self.bucket_bounds(index)[1] - 1, self.max))
+        return float(self.max)
+
+    def buckets(self) -> List[tuple]:
+        """(upper bound, count) of the non-empty buckets, by increasing value."""
+        return [(self.bucket_bounds(index)[1], self.counts[index]) for index in sorted(self.counts)]
+
+    def to_dict(self) -> dict:
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "counts": {str(index): count for index, count in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        """Histogram exported with `to_dict`, e.g. by another worker process."""
+        histogram = cls(data["sub_bucket_bits"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class PhaseTimer:
+    """Times the consecutive phases of one call.
+
+    `lap(phase)` charges the time since the previous lap (or the start) to `phase`,
+    laps of the same phase add up, and `stop()` records every phase plus the total.
+    """
+
+    __slots__ = ("instrumentation", "operation", "started", "last", "phases")
+
+    def __init__(self, instrumentation: "Instrumentation", operation: str):
+        self.instrumentation = instrumentation
+        self.operation = operation
+        self.started = self.last = clock()
+        self.phases: Dict[str, float] = {}
+
+    def lap(self, phase: str) -> None:
+        now = clock()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def stop(self) -> None:
+        histograms = self.instrumentation._histograms()
+        for phase, seconds in self.phases.items():
+            self.instrumentation._record(histograms, f"{self.operation}.{phase}", seconds)
+        self.instrumentation._record(histograms, f"{self.operation}.total", self.last - self.started)
+
+
+class _NullTimer:
+    """Timer handed out while instrumentation is disabled, every call is a no-op."""
+
+    __slots__ = ()
+
+    def lap(self, phase: str) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+Timer = PhaseTimer | _NullTimer
+
+
+class Instrumentation:
+    """Opt-in timing of the client hot paths, e.g. "redis.search.round_trip".
+
+    Disabled by default, `timer()` then returns a shared no-op timer so the
+    instrumented code only pays for an attribute lookup and empty method calls.
+    Every thread records into its own histograms, without locks, and `snapshot`
+    merges them. Set VECTORDB_INSTRUMENTATION=1 to enable it in every process, e.g.
+    for the load test workers.
+
+    Examples:
+        >>> instrumentation.enable()
+        >>> redis.search_embedding(query)
+        >>> print(instrumentation.to_prometheus())
+    """
+
+    def __init__(self, enabled: bool = False, sub_bucket_bits: int = 6):
+        self.enabled = enabled
+        self.sub_bucket_bits = sub_bucket_bits
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_histograms: List[Dict[str, Histogram]] = []
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            for histograms in self._thread_histograms:
+                histograms.clear()
+
+    def timer(self, operation: str) -> Timer:
+        if not self.enabled:
+            return NULL_TIMER
+        return PhaseTimer(self, operation)
+
+    def _histograms(self) -> Dict[str, Histogram]:
+        histograms = getattr(self._local, "histograms", None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+            with self._lock:
+                self._thread_histograms.append(histograms)
+        return histograms
+
+    def _record(self, histograms: Dict[str, Histogram], name: str, seconds: float) -> None:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram(self.sub_bucket_bits)
+        histogram.record(int(seconds * 1e9))
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record one duration outside of a PhaseTimer."""
+        if self.enabled:
+            self._record(self._histograms(), name, seconds)
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        """Histograms of every thread merged by name (values in nanoseconds)."""
+        merged: Dict[str, Histogram] = {}
+        with self._lock:
+            thread_histograms = [dict(histograms) for histograms in self._thread_histograms]
+        for histograms in thread_histograms:
+            for name, histogram in histograms.items():
+                if name not in merged:
+                    merged[name] = Histogram(self.sub_bucket_bits)
+                merged[name].merge(histogram)
+        return merged
+
+    def to_json(self) -> str:
+        return json.dumps({name: histogram.to_dict() for name, histogram in sorted(self.snapshot().items())})
+
+    def to_prometheus(self, metric: str = "vectordb_client_phase_seconds") -> str:
+        """Prometheus text exposition format, one histogram series per phase and only non-empty buckets."""
+        lines = [f"# HELP {metric} Time spent in each phase of the vector database client calls.", f"# TYPE {metric} histogram"]
+        for name, histogram in sorted(self.snapshot().items()):
+            cumulative = 0
+            for upper, count in histogram.buckets():
+                cumulative += count
+                lines.append(f'{metric}_bucket{{phase="{name}",le="{upper / 1e9:.9g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{phase="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{phase="{name}"}} {histogram.total / 1e9:.9g}')
+            lines.append(f'{metric}_count{{phase="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation(enabled=os.environ.get("VECTORDB_INSTRUMENTATION", "") not in ("", "0"))
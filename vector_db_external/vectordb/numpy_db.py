@@ -0,0 +1,373 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .vectordb_api import DBConfig, MetricType, Projection, VectorDB, group_by_filter
+from .search_result import EmbeddingSearchResult
+
+
+log = logging.getLogger(__name__)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """float32 copy of `vectors` with unit length rows, zero rows are left as they are."""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def metric_distances(
+    queries: np.ndarray,
+    vectors: np.ndarray,
+    metric_type: MetricType,
+    vector_sq_norms: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """(n_queries, n_vectors) distances, using the same conventions as Redis.
+
+    COSINE and IP return 1 - similarity, L2 the squared euclidean distance. For COSINE
+    both queries and vectors must already be normalized.
+    """
+    similarities = queries @ vectors.T
+    if metric_type == MetricType.L2:
+        if vector_sq_norms is None:
+            vector_sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        return vector_sq_norms[None, :] - 2 * similarities + q_norms[:, None]
+    return 1 - similarities
+
+
+class NumpyStore:
+    """In-memory vectors, documents and metadata of one NumpyVectorDB database.
+
+    Vectors live in a contiguous float32 matrix grown by doubling. For COSINE the rows
+    are normalized on insert, for L2 their squared norms are kept alongside. Every
+    (metadata key, value) pair has a boolean row mask, so filters are evaluated
+    without touching the metadata dicts. `delete` moves rows, so searches hold `lock`
+    from the filter mask until the ids of their rows are read.
+    """
+
+    def __init__(self, vector_dimension: int, metric_type: MetricType):
+        self.vector_dimension = vector_dimension
+        self.metric_type = metric_type
+        self.lock = threading.Lock()
+        self.size = 0
+        self.vectors = np.zeros((0, vector_dimension), dtype=np.float32)
+        self.sq_norms = np.zeros(0, dtype=np.float32)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Optional[dict]] = []
+        self.masks: Dict[Tuple[str, Any], np.ndarray] = {}
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= len(self.vectors):
+            return
+        capacity = max(capacity, 2 * len(self.vectors), 1024)
+
+        vectors = np.zeros((capacity, self.vector_dimension), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        self.vectors = vectors
+
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        sq_norms[:self.size] = self.sq_norms[:self.size]
+        self.sq_norms = sq_norms
+
+        for key, mask in self.masks.items():
+            grown = np.zeros(capacity, dtype=bool)
+            grown[:len(mask)] = mask
+            self.masks[key] = grown
+
+    def prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """Vectors as stored and compared: float32 and, for COSINE, unit length."""
+        if self.metric_type == MetricType.COSINE:
+            return normalize(vectors)
+        return np.array(vectors, dtype=np.float32, ndmin=2)
+
+    def insert(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        documents: Optional[List[str]],
+        metadata: Optional[List[dict]],
+    ) -> None:
+        with self.lock:
+            self._reserve(self.size + len(ids))
+            rows = np.empty(len(ids), dtype=np.int64)
+            for i, id in enumerate(ids):
+                row = self.rows.get(id)
+                if row is None:
+                    row = self.size
+                    self.size += 1
+                    self.rows[id] = row
+                    self.ids.append(id)
+                    self.documents.append(None)
+                    self.metadatas.append(None)
+                else:
+                    self._unset_masks(row)
+
+                self.documents[row] = documents[i] if documents else None
+                self.metadatas[row] = metadata[i] if metadata else None
+                for key, value in (self.metadatas[row] or {}).items():
+                    mask = self.masks.get((key, value))
+                    if mask is None:
+                        mask = self.masks[(key, value)] = np.zeros(len(self.vectors), dtype=bool)
+                    mask[row] = True
+                rows[i] = row
+
+            self.vectors[rows] = vectors
+            self.sq_norms[rows] = np.einsum("ij,ij->i", vectors, vectors)
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove the given ids, the last row is moved into each freed row so rows stay contiguous."""
+        with self.lock:
+            for id in ids:
+                row = self.rows.pop(id, None)
+                if row is None:
+                    continue
+                self._unset_masks(row)
+                last = self.size - 1
+                if row != last:
+                    self._unset_masks(last)
+                    self.vectors[row] = self.vectors[last]
+                    self.sq_norms[row] = self.sq_norms[last]
+                    self.ids[row] = self.ids[last]
+                    self.documents[row] = self.documents[last]
+                    self.metadatas[row] = self.metadatas[last]
+                    self.rows[self.ids[row]] = row
+                    for key, value in (self.metadatas[row] or {}).items():
+                        self.masks[(key, value)][row] = True
+                self.ids.pop()
+                self.documents.pop()
+                self.metadatas.pop()
+                self.size = last
+
+    def _unset_masks(self, row: int) -> None:
+        for key, value in (self.metadatas[row] or {}).items():
+            self.masks[(key, value)][row] = False
+
+    def filter_mask(self, filters: dict | None) -> Optional[np.ndarray]:
+        """Boolean mask of the rows matching every key and value of `filters`, None when unfiltered."""
+        if not filters:
+            return None
+        mask = np.ones(self.size, dtype=bool)
+        for key, value in filters.items():
+            values_mask = self.masks.get((key, value))
+            if values_mask is None:
+                return np.zeros(self.size, dtype=bool)
+            mask &= values_mask[:self.size]
+        return mask
+
+    def distances(self, queries: np.ndarray, size: int) -> np.ndarray:
+        """(n_queries, size) distances between prepared queries and the first `size` stored vectors."""
+        return metric_distances(queries, self.vectors[:size], self.metric_type, self.sq_norms[:size])
+
+
+class NumpyVectorDB(VectorDB):
+    """Exact (brute force) VectorDB kept in the process memory.
+
+    Every query is compared against every stored vector with one BLAS matrix product
+    and the k best are selected with `argpartition`, so results are exact: this is the
+    ground truth for recall computations and a no-network baseline for the harness.
+    Filters are equality matches on metadata keys, like `{"a": "keyword_1"}`.
+
+    Instances created with the same database_name in one process share their data.
+    Worker processes started with "spawn" can pass `dataset_path` to load a dataset
+    converted with `convert_records` when their database is still empty.
+    """
+
+    _stores: Dict[str, NumpyStore] = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(
+        self,
+        database_name: str = "vector_store_benchmark",
+        vector_dimension: int = 1536,
+        db_config: DBConfig | None = None,
+        drop_old: bool = False,
+        metric_type: MetricType = MetricType.COSINE,
+        query_chunk_size: int = 256,
+        dataset_path: Optional[str] = None,
+        **kwargs,
+    ):
+        self.database_name = database_name
+        self.vector_dimension = vector_dimension
+        self.metric_type = MetricType(metric_type)
+        self.query_chunk_size = query_chunk_size
+
+        with self._stores_lock:
+            store = self._stores.get(database_name)
+            if store is None or drop_old:
+                store = self._stores[database_name] = NumpyStore(vector_dimension, self.metric_type)
+            elif store.metric_type != self.metric_type or store.vector_dimension != vector_dimension:
+                raise ValueError(
+                    f"database {database_name} exists with {store.metric_type.value} and dimension {store.vector_dimension}"
+                )
+        self.store = store
+
+        if dataset_path is not None and store.size == 0:
+            from ..benchmark.datasets import MemmapDataset
+
+            self.load_dataset(MemmapDataset(dataset_path))
+
+    def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings into the database, ids that already exist are overwritten.
+
+        Args:
+            embeddings(np.ndarray | list[list[float]]): list of documents' embeddings
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+        """
+        self.store.insert(list(ids), self.store.prepare(embeddings), documents, metadata)
+
+    def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings into the database, inserts already replace existing ids."""
+        self.insert_embeddings(ids, embeddings, documents, metadata, **kwargs)
+
+    def delete_embeddings(self, ids: List[str], **kwargs: Any) -> None:
+        """Delete the given ids, missing ids are ignored.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        self.store.delete(list(ids))
+
+    def search_embedding(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Search the exact k nearest embeddings.
+
+        Args:
+            query(list[float]): embedding to use as a search query
+            k(int): number of results to return
+            filters(dict[str, str]): dict of key and value for filtering on metadata
+            projection(Projection): fields to return
+            kwargs: other arguments
+        """
+        return self.search_embeddings_batch([query], k=k, filters=filters, projection=projection, **kwargs)[0]
+
+    def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Search the exact k nearest embeddings of each query.
+
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results to return per query
+            filters(dict[str, str] | list[dict]): filter applied to every query, or one filter per query
+            projection(Projection): fields to return
+            kwargs: other arguments
+        """
+        projection = Projection(projection)
+        queries = self.store.prepare(queries)
+        with self.store.lock:
+            rows, distances = self.nearest_rows(queries, k=k, filters=filters)
+            return [
+                self._result(query_rows, query_distances, projection)
+                for query_rows, query_distances in zip(rows, distances)
+            ]
+
+    def nearest_rows(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Row numbers and distances of the exact k nearest stored vectors of each (prepared) query.
+
+        The caller holds `store.lock`, deletes move rows as soon as it is released.
+        """
+        store = self.store
+        size = store.size
+
+        rows = [None] * len(queries)
+        distances = [None] * len(queries)
+        for query_filters, indexes in group_by_filter(filters, len(queries)):
+            mask = store.filter_mask(query_filters)
+            for start in range(0, len(indexes), self.query_chunk_size):
+                chunk = indexes[start:start + self.query_chunk_size]
+                chunk_distances = store.distances(queries[chunk], size)
+                if mask is not None:
+                    chunk_distances[:, ~mask[:size]] = np.inf
+                    candidates = int(mask[:size].sum())
+                else:
+                    candidates = size
+
+                top_k = min(k, candidates)
+                if top_k == 0:
+                    for i in chunk:
+                        rows[i] = np.zeros(0, dtype=np.int64)
+                        distances[i] = np.zeros(0, dtype=np.float32)
+                    continue
+
+                top = np.argpartition(chunk_distances, top_k - 1, axis=1)[:, :top_k]
+                top_distances = np.take_along_axis(chunk_distances, top, axis=1)
+                order = np.argsort(top_distances, axis=1, kind="stable")
+                top = np.take_along_axis(top, order, axis=1)
+                top_distances = np.take_along_axis(top_distances, order, axis=1)
+                for j, i in enumerate(chunk):
+                    rows[i] = top[j]
+                    distances[i] = top_distances[j]
+        return rows, distances
+
+    def _result(
+        self,
+        rows: np.ndarray,
+        distances: np.ndarray,
+        projection: Projection = Projection.DOCUMENTS,
+    ) -> EmbeddingSearchResult:
+        store = self.store
+        return EmbeddingSearchResult(
+            ids=[store.ids[row] for row in rows],
+            # stored vectors, i.e. normalized for COSINE
+            embeddings=store.vectors[rows].tolist() if projection.includes(Projection.EMBEDDINGS) else None,
+            documents=[store.documents[row] for row in rows] if projection.includes(Projection.DOCUMENTS) else None,
+            metadatas=[store.metadatas[row] or {} for row in rows] if projection.includes(Projection.METADATA) else None,
+            distances=distances.tolist(),
+        )
+
+    def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        store = self.store
+        with store.lock:
+            rows = [store.rows.get(id) for id in ids]
+            return [store.documents[row] if row is not None else None for row in rows]
+
+    def count(self) -> int:
+        return self.store.size
+
+    def load_dataset(self, dataset: Any, batch_size: int = 10000) -> None:
+        """Insert every row of a `MemmapDataset`."""
+        for batch in dataset.batches(batch_size):
+            self.insert_embeddings(**batch)
@@ -0,0 +1,126 @@
+import json
+from typing import List, Tuple
+
+import numpy as np
+
+from .numpy_db import metric_distances, normalize
+from .vectordb_api import MetricType
+from .search_result import CompactSearchResult, EmbeddingSearchResult
+
+
+VECTOR_DTYPES = {
+    "FLOAT64": np.float64,
+    "FLOAT32": np.float32,
+    "FLOAT16": np.float16,
+    "INT8": np.int8,
+}
+
+
+def vector_bytes(vector_type: str, vector_dimension: int) -> int:
+    """Size of the raw vector blob of one document, before any index overhead."""
+    return np.dtype(VECTOR_DTYPES[vector_type]).itemsize * vector_dimension
+
+
+class ScalarQuantizer:
+    """Symmetric int8 scalar quantization with one scale per dimension.
+
+    Every dimension is divided by its own scale, the largest absolute value seen for
+    that dimension over 127, and rounded. Zero stays zero, so inner products and
+    cosine similarities of the codes stay close to the original ones. Distances
+    between codes are weighted by the scales, the order of the nearest neighbours is
+    only approximate and searches should re-rank against the full precision vectors.
+
+    Args:
+        scale(np.ndarray): (dim,) float32 scale of each dimension
+    """
+
+    def __init__(self, scale: np.ndarray):
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        """Scales covering the range of every dimension of a sample of the vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scale = np.abs(vectors).max(axis=0) / 127
+        scale[scale == 0] = 1
+        return cls(scale)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """int8 codes of float vectors, values outside of the fitted range are clipped."""
+        codes = np.rint(np.asarray(vectors, dtype=np.float32) / self.scale)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32) * self.scale
+
+    @property
+    def dimension(self) -> int:
+        return len(self.scale)
+
+    def to_json(self) -> str:
+        return json.dumps({"dimension": self.dimension, "scale": self.scale.tolist()})
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "ScalarQuantizer":
+        fields = json.loads(data)
+        quantizer = cls(fields["scale"])
+        if fields.get("dimension", quantizer.dimension) != quantizer.dimension:
+            raise ValueError(f"quantizer of dimension {fields['dimension']} has {quantizer.dimension} scales")
+        return quantizer
+
+
+def exact_order(
+    query: np.ndarray,
+    vectors: np.ndarray,
+    metric_type: MetricType,
+    k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows of the k nearest `vectors` to `query` and their exact distances.
+
+    Rows of NaN, i.e. candidates whose full precision vector is missing, come last.
+    """
+    query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if metric_type == MetricType.COSINE:
+        query, vectors = normalize(query), normalize(vectors)
+    distances = metric_distances(query, vectors, metric_type)[0]
+    distances[np.isnan(distances)] = np.inf
+    rows = np.argsort(distances, kind="stable")[:k]
+    return rows, distances[rows]
+
+
+def take(
+    result: EmbeddingSearchResult | CompactSearchResult,
+    rows: np.ndarray,
+    distances: np.ndarray,
+) -> EmbeddingSearchResult | CompactSearchResult:
+    """The given rows of a search result, in that order, with new distances."""
+    def select(values: list | None) -> list | None:
+        return [values[row] for row in rows] if values is not None else None
+
+    if isinstance(result, CompactSearchResult):
+        return CompactSearchResult(
+            ids=select(result.ids),
+            distances=np.asarray(distances, dtype=np.float32),
+            documents=select(result.received_documents),
+            metadatas=select(result.received_metadatas),
+            decode_document=result._decode_document,
+            decode_metadata=result._decode_metadata,
+            embeddings=result.embeddings[rows] if result.embeddings is not None else None,
+        )
+    return EmbeddingSearchResult(
+        ids=select(result.ids),
+        embeddings=select(result.embeddings),
+        documents=select(result.documents),
+        metadatas=select(result.metadatas),
+        distances=[float(distance) for distance in distances],
+    )
+
+
+def full_precision_rows(replies: List[bytes | None], vector_dimension: int) -> np.ndarray:
+    """(n, dim) float32 matrix of the vectors read from the full precision store, NaN rows for missing ones."""
+    vectors = np.full((len(replies), vector_dimension), np.nan, dtype=np.float32)
+    for i, reply in enumerate(replies):
+        if reply is not None:
+            vectors[i] = np.frombuffer(reply, dtype=np.float32)
+    return vectors
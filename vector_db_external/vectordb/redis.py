@@ -1,31 +1,71 @@
+import json
 import logging
 import os
-from typing import Any, Optional, List
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, Literal, Optional, List, Tuple
 
 import numpy as np
-from pydantic import SecretStr
+from pydantic import BaseModel, SecretStr, model_validator
 
 import redis
 from redis.commands.search.field import (
+    NumericField,
     TagField,
     TextField,
     VectorField,
 )
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from redis.commands.search.commands import SEARCH_CMD
+from redis.commands.search.document import Document
+from redis.client import NEVER_DECODE
 from redis.commands.search.query import Query
 from redis.exceptions import ResponseError
 
-from .vectordb_api import DBConfig, VectorDB
-from .search_result import EmbeddingSearchResult
+from .vectordb_api import DBConfig, MetricType, Projection, VectorDB, batch_filters
+from .vectordb_api import IndexType as VectorIndexType
+from .instrumentation import NULL_TIMER, Timer, instrumentation
+from .codec import DocumentCodec
+from .quantization import VECTOR_DTYPES, ScalarQuantizer, exact_order, full_precision_rows, take
+from .search_result import CompactSearchResult, EmbeddingSearchResult
 
 
 log = logging.getLogger(__name__)
 
 
+TAG_SEPARATOR = "|"
+# metadata keys that are not declared in the schema, stored as JSON and never indexed
+METADATA_EXTRA = "metadata_extra"
+
+_TAG_SPECIAL_CHARACTERS = re.compile(r"([^\w])")
+
+
+def escape_tag(value: str) -> str:
+    """Escape a TAG value for the query syntax, where punctuation and spaces are operators."""
+    return _TAG_SPECIAL_CHARACTERS.sub(r"\\\1", value)
+
+
 class RedisConfig(DBConfig):
+    """Redis connection settings, clients with equal settings share one connection pool.
+
+    Args:
+        max_connections(int): pool size, unlimited when None for the non-blocking pool
+        blocking_pool(bool): use a BlockingConnectionPool, which makes callers wait for a
+            free connection instead of opening more than max_connections
+        pool_timeout(float): seconds a caller waits for a connection of a blocking pool
+        socket_timeout(float): seconds to wait for a reply
+        socket_connect_timeout(float): seconds to wait for a connection to be established
+    """
+
     password: SecretStr
     host: SecretStr
     port: SecretStr
+    max_connections: Optional[int] = None
+    blocking_pool: bool = False
+    pool_timeout: Optional[float] = 20
+    socket_timeout: Optional[float] = None
+    socket_connect_timeout: Optional[float] = None
 
 
 def default_config():
@@ -36,13 +76,215 @@ def default_config():
     )
 
 
+_pools: Dict[tuple, redis.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _reset_pools() -> None:
+    # sockets inherited from the parent must not be shared, a forked child starts with no pools
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pools)
+
+
+def connection_pool(config: RedisConfig) -> redis.ConnectionPool:
+    """Connection pool shared by every client of this process created with an equal config."""
+    key = (
+        config.host.get_secret_value(),
+        config.port.get_secret_value(),
+        config.password.get_secret_value(),
+        config.max_connections,
+        config.blocking_pool,
+        config.pool_timeout,
+        config.socket_timeout,
+        config.socket_connect_timeout,
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            connection_kwargs = dict(
+                host=config.host.get_secret_value(),
+                port=config.port.get_secret_value(),
+                password=config.password.get_secret_value(),
+                db=0,
+                socket_timeout=config.socket_timeout,
+                socket_connect_timeout=config.socket_connect_timeout,
+            )
+            if config.blocking_pool:
+                pool = redis.BlockingConnectionPool(
+                    max_connections=config.max_connections or 50,
+                    timeout=config.pool_timeout,
+                    **connection_kwargs,
+                )
+            else:
+                pool = redis.ConnectionPool(max_connections=config.max_connections, **connection_kwargs)
+            _pools[key] = pool
+        return pool
+
+
+class RedisIndexConfig(BaseModel):
+    """Parameters of the Redis vector index, None leaves the Redis default.
+
+    Args:
+        index_type(IndexType): FLAT or HNSW
+        metric_type(MetricType): COSINE, L2 or IP
+        vector_type(str): type of the stored vectors and of the query vectors, FLOAT32, FLOAT64,
+            FLOAT16 or INT8. INT8 vectors are scalar quantized by the client, see `ScalarQuantizer`
+        m(int): HNSW maximum number of outgoing edges per node
+        ef_construction(int): HNSW candidate list size while building the graph
+        ef_runtime(int): HNSW default candidate list size while searching, can be overridden per query
+        initial_cap(int): initial index capacity
+        block_size(int): FLAT block size
+        metadata_fields(dict[str, str]): metadata keys indexed as their own TAG or NUMERIC field,
+            when empty all metadata goes to the single "metadata" TAG field as "key:value" pairs.
+            "extra" can not be declared, its hash field holds the undeclared metadata
+    """
+
+    index_type: VectorIndexType = VectorIndexType.HNSW
+    metric_type: MetricType = MetricType.COSINE
+    vector_type: Literal["FLOAT32", "FLOAT64", "FLOAT16", "INT8"] = "FLOAT32"
+    m: Optional[int] = None
+    ef_construction: Optional[int] = None
+    ef_runtime: Optional[int] = None
+    initial_cap: Optional[int] = None
+    block_size: Optional[int] = None
+    metadata_fields: Dict[str, Literal["TAG", "NUMERIC"]] = {}
+
+    @model_validator(mode="after")
+    def check_index_params(self) -> "RedisIndexConfig":
+        if self.index_type not in (VectorIndexType.HNSW, VectorIndexType.Flat):
+            raise ValueError(f"Redis supports FLAT and HNSW indexes, got {self.index_type.value}")
+        if self.index_type == VectorIndexType.Flat:
+            hnsw_params = [name for name in ("m", "ef_construction", "ef_runtime") if getattr(self, name) is not None]
+            if hnsw_params:
+                raise ValueError(f"{', '.join(hnsw_params)} can only be set on HNSW indexes")
+        elif self.block_size is not None:
+            raise ValueError("block_size can only be set on FLAT indexes")
+        if any(metadata_field(key) == METADATA_EXTRA for key in self.metadata_fields):
+            raise ValueError(f'metadata key "extra" can not be declared, the {METADATA_EXTRA} field holds the undeclared metadata')
+        return self
+
+    @property
+    def dtype(self) -> type:
+        return VECTOR_DTYPES[self.vector_type]
+
+    def vector_field(self, name: str, vector_dimension: int) -> VectorField:
+        attributes = {
+            "TYPE": self.vector_type,
+            "DIM": vector_dimension,
+            "DISTANCE_METRIC": self.metric_type.value,
+        }
+        optional = {
+            "M": self.m,
+            "EF_CONSTRUCTION": self.ef_construction,
+            "EF_RUNTIME": self.ef_runtime,
+            "INITIAL_CAP": self.initial_cap,
+            "BLOCK_SIZE": self.block_size,
+        }
+        attributes.update({key: value for key, value in optional.items() if value is not None})
+        return VectorField(name, self.index_type.value, attributes)
+
+    def metadata_schema(self) -> list:
+        """Index fields holding the metadata."""
+        if not self.metadata_fields:
+            return [TagField("metadata", separator=",")]
+        return [
+            NumericField(metadata_field(key)) if field_type == "NUMERIC"
+            else TagField(metadata_field(key), separator=TAG_SEPARATOR, case_sensitive=True)
+            for key, field_type in self.metadata_fields.items()
+        ]
+
+
+class MemoryUsage(BaseModel):
+    """Average bytes held by Redis per document.
+
+    Args:
+        documents(int): number of indexed documents
+        vector_type(str): vector type of the index
+        index_bytes(float): vector index (vectors and HNSW graph), from FT.INFO vector_index_sz_mb
+        hash_bytes(float): document hash (vector blob, document and metadata), from MEMORY USAGE
+        full_precision_bytes(float): float32 vector kept for re-ranking, possibly on another Redis
+        full_precision_shared(bool): whether the full precision vectors are on the Redis of the index
+    """
+
+    documents: int
+    vector_type: str
+    index_bytes: float
+    hash_bytes: float
+    full_precision_bytes: float = 0.0
+    full_precision_shared: bool = True
+
+    @property
+    def bytes_per_vector(self) -> float:
+        """Memory of the index node per document, the full precision store excluded."""
+        return self.index_bytes + self.hash_bytes
+
+    @property
+    def node_bytes_per_vector(self) -> float:
+        """Memory of the index node per document, with the full precision vectors when they are kept there too."""
+        return self.bytes_per_vector + (self.full_precision_bytes if self.full_precision_shared else 0.0)
+
+
+def _decode(value: bytes | None) -> str | None:
+    return value.decode("utf-8") if value is not None else None
+
+
+def search_args(index_name: str, query_obj: Query, query_params: Optional[dict] = None) -> list:
+    """FT.SEARCH arguments of a query, built with the public `Query.get_args`.
+
+    Args:
+        index_name(str): name of the index to search
+        query_obj(Query): query, including the returned fields
+        query_params(dict): values of the query parameters, e.g. {"vec": blob}
+    """
+    args = [index_name, *query_obj.get_args()]
+    if query_params:
+        args += ["PARAMS", 2 * len(query_params)]
+        for key, value in query_params.items():
+            args += [key, value]
+    return args
+
+
+def metadata_field(key: str) -> str:
+    """Hash field of a metadata key declared in `RedisIndexConfig.metadata_fields`."""
+    return f"metadata_{key}"
+
+
 class Redis(VectorDB):
+    """Redis client for VectorDB, using RediSearch vector indexes over hashes.
+
+    Connections come from the pool shared by every client of the process with the
+    same `RedisConfig`, see `connection_pool`. Pools are dropped in forked children
+    and a pickled client reconnects through the pool of the receiving process.
+
+    With `compact_results` searches return `CompactSearchResult`, parsed straight from
+    the raw FT.SEARCH reply without redis-py Documents or pydantic validation.
+
+    With `full_precision` every insert also writes the float32 vectors as plain keys,
+    outside of the index, to the Redis given by `full_precision_config` (the same one
+    by default). Searches on a FLOAT16 or INT8 index can then over-fetch
+    `k * rerank` candidates and re-rank them exactly.
+
+    With a `document_codec` documents are stored compressed, sent compressed by
+    FT.SEARCH and decompressed by the client, lazily with `compact_results`.
+    """
+
     def __init__(
         self,
         database_name: str = "vector_store_benchmark",
         vector_dimension: int = 1536,
         db_config: DBConfig | None = None,
         drop_old: bool = False,
+        insert_batch_size: int = 1000,
+        insert_batch_bytes: int = 32 * 1024 * 1024,
+        index_config: RedisIndexConfig | None = None,
+        compact_results: bool = False,
+        full_precision: bool = False,
+        full_precision_config: RedisConfig | None = None,
+        document_codec: DocumentCodec | None = None,
         **kwargs,
     ):
 
@@ -50,103 +292,439 @@ class Redis(VectorDB):
         self.index_name = database_name
         self.doc_prefix = f"{database_name}:"
         self.vector_dimension = vector_dimension
+        self.insert_batch_size = insert_batch_size
+        self.insert_batch_bytes = insert_batch_bytes
+        self.index_config = index_config if index_config is not None else RedisIndexConfig()
+        self.compact_results = compact_results
+        self.full_precision = full_precision
+        self.full_precision_config = full_precision_config if full_precision_config is not None else self.db_config
+        self._quantizer: ScalarQuantizer | None = None
+        self.document_codec = document_codec
 
-        self.conn = redis.Redis(
-            host=self.db_config.host.get_secret_value(),
-            port=self.db_config.port.get_secret_value(),
-            password=self.db_config.password.get_secret_value(),
-            db=0,
-        )
+        self._connect()
         self._make_index()
 
+    def _connect(self) -> None:
+        self.conn = redis.Redis(connection_pool=connection_pool(self.db_config))
+        self.full_precision_conn = redis.Redis(connection_pool=connection_pool(self.full_precision_config))
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["conn"]
+        del state["full_precision_conn"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._connect()
+
+    @property
+    def quantizer_key(self) -> str:
+        return f"{self.index_name}_quantizer"
+
+    def full_precision_key(self, id: str) -> str:
+        # outside of doc_prefix, so the index never sees these keys
+        return f"{self.index_name}_full:{id}"
+
+    def quantizer(self) -> ScalarQuantizer:
+        """Scales of an INT8 index, shared by every client through Redis."""
+        if self._quantizer is None:
+            self._load_quantizer(self.conn.get(self.quantizer_key))
+        return self._quantizer
+
+    def _load_quantizer(self, stored: str | bytes | None) -> None:
+        """Cache the quantizer read from `quantizer_key`, after checking it belongs to this index."""
+        if stored is None:
+            raise ValueError(f"index {self.index_name} has no quantizer, insert vectors or call fit_quantizer first")
+        quantizer = ScalarQuantizer.from_json(stored)
+        if quantizer.dimension != self.vector_dimension:
+            raise ValueError(
+                f"quantizer of index {self.index_name} has dimension {quantizer.dimension}, not {self.vector_dimension}, "
+                f"it was left by another index of the same name, call remove_database first"
+            )
+        self._quantizer = quantizer
+
+    def fit_quantizer(self, vectors: np.ndarray | List[List[float]]) -> ScalarQuantizer:
+        """Fit the INT8 scales on a sample of the vectors, unless another client already stored them.
+
+        Otherwise the first insert fits them on its own vectors, which should then be representative.
+        """
+        self.conn.set(self.quantizer_key, ScalarQuantizer.fit(self._float_matrix(vectors)).to_json(), nx=True)
+        self._quantizer = None
+        return self.quantizer()
 
     def remove_database(self):
+        """Drop the index, with the INT8 scales and the full precision vectors stored next to it.
+
+        A new index of the same name would otherwise reuse the scales fitted for this one.
+        """
         try:
             self.conn.ft(self.index_name).dropindex()
         except ResponseError:
             print(f"index {self.index_name} does not exist")
+        self.conn.delete(self.quantizer_key)
+        self._quantizer = None
+
+        keys = []
+        for key in self.full_precision_conn.scan_iter(match=self.full_precision_key("*"), count=self.insert_batch_size):
+            keys.append(key)
+            if len(keys) >= self.insert_batch_size:
+                self.full_precision_conn.delete(*keys)
+                keys = []
+        if keys:
+            self.full_precision_conn.delete(*keys)
 
     def _make_index(self):
         try:
             self.conn.ft(self.index_name).info()
         except Exception:
             schema = (
-                TagField("metadata", separator=","),
-                VectorField(
-                    "vector",
-                    "HNSW",  # Vector Index Type: FLAT or HNSW
-                    {
-                        "TYPE": "FLOAT32",  # FLOAT32 or FLOAT64
-                        "DIM": self.vector_dimension,
-                        "DISTANCE_METRIC": "COSINE",
-                    },
-                ),
+                *self.index_config.metadata_schema(),
+                self.index_config.vector_field("vector", self.vector_dimension),
             )
             definition = IndexDefinition(prefix=[self.doc_prefix], index_type=IndexType.HASH)
             rs = self.conn.ft(self.index_name)
             rs.create_index(schema, definition=definition)
 
-        self.conn = redis.Redis(
-            host=self.db_config.host.get_secret_value(),
-            port=self.db_config.port.get_secret_value(),
-            password=self.db_config.password.get_secret_value(),
-            db=0,
+    def rebuild_index(self, index_config: RedisIndexConfig | None = None, timeout: float = 3600, **params: Any) -> None:
+        """Drop the index, keeping the documents, and create it again with other parameters.
+
+        Redis re-indexes the existing hashes in the background, this waits until it is done.
+
+        Args:
+            index_config(RedisIndexConfig): new index parameters
+            timeout(float): seconds to wait for the documents to be indexed
+            params: RedisIndexConfig fields to change, when index_config is not given
+        """
+        if index_config is None:
+            index_config = RedisIndexConfig(**{**self.index_config.model_dump(), **params})
+        if index_config.vector_type != self.index_config.vector_type:
+            raise ValueError("the vector type can not change without inserting the documents again")
+        if index_config.metadata_fields != self.index_config.metadata_fields:
+            raise ValueError("the metadata fields can not change without inserting the documents again")
+
+        try:
+            self.conn.ft(self.index_name).dropindex(delete_documents=False)
+        except ResponseError:
+            log.info(f"index {self.index_name} does not exist")
+        self.index_config = index_config
+        self._make_index()
+        self.wait_for_indexed(timeout)
+
+    def memory_usage(self, sample_size: int = 100) -> "MemoryUsage":
+        """Average memory held per document, from FT.INFO and MEMORY USAGE of a sample of the documents."""
+        info = self.conn.ft(self.index_name).info()
+        documents = int(info.get("num_docs", 0))
+        index_bytes = float(info.get("vector_index_sz_mb", 0)) * 1024 * 1024 / documents if documents else 0.0
+
+        keys = []
+        cursor = 0
+        while len(keys) < sample_size:
+            cursor, found = self.conn.scan(cursor, match=f"{self.doc_prefix}*", count=sample_size)
+            keys.extend(found)
+            if cursor == 0:
+                break
+        keys = keys[:sample_size]
+
+        with self.conn.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+            hash_sizes = [size for size in pipe.execute() if size is not None]
+
+        full_precision_sizes = []
+        if self.full_precision and keys:
+            with self.full_precision_conn.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.memory_usage(self.full_precision_key(_decode(key)[len(self.doc_prefix):]))
+                full_precision_sizes = [size for size in pipe.execute() if size is not None]
+
+        return MemoryUsage(
+            documents=documents,
+            vector_type=self.index_config.vector_type,
+            index_bytes=index_bytes,
+            hash_bytes=float(np.mean(hash_sizes)) if hash_sizes else 0.0,
+            full_precision_bytes=float(np.mean(full_precision_sizes)) if full_precision_sizes else 0.0,
+            full_precision_shared=self.full_precision_shared,
+        )
+
+    @property
+    def full_precision_shared(self) -> bool:
+        """Whether the full precision vectors are written to the Redis of the index."""
+        config, other = self.db_config, self.full_precision_config
+        return (config.host.get_secret_value(), config.port.get_secret_value()) == (
+            other.host.get_secret_value(), other.port.get_secret_value()
         )
 
+    @staticmethod
+    def _indexed(info: dict, min_documents: Optional[int]) -> bool:
+        """Whether an FT.INFO reply shows every document indexed (and at least `min_documents` of them)."""
+        if int(info.get("indexing", 0)) != 0 or float(info.get("percent_indexed", 1)) < 1:
+            return False
+        return min_documents is None or int(info.get("num_docs", 0)) >= min_documents
+
+    def wait_for_indexed(self, timeout: float = 3600, min_documents: Optional[int] = None, poll_interval: float = 0.1) -> None:
+        """Wait until RediSearch has indexed every document, polling FT.INFO `indexing` and `percent_indexed`.
+
+        HSETs are acknowledged before the documents are indexed, and an index created
+        over existing hashes is filled by a background scan.
+
+        Args:
+            timeout(float): seconds to wait before raising TimeoutError
+            min_documents(int): also wait until the index holds this many documents (num_docs)
+            poll_interval(float): seconds between two FT.INFO calls
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            info = self.conn.ft(self.index_name).info()
+            if self._indexed(info, min_documents):
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"index {self.index_name} still indexing after {timeout}s "
+                    f"({info.get('num_docs')} documents, {info.get('percent_indexed')} indexed)"
+                )
+            time.sleep(poll_interval)
+
     def insert_embeddings(
         self,
         ids: list[str],
-        embeddings: List[List[float]],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
         documents: Optional[List[str]] = None,
         metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        batch_bytes: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
         """Insert embeddings into the database.
 
+        Embeddings are converted to a single matrix of the index vector type once and each row is sent
+        as a memoryview over it, so passing a contiguous array (or a raw buffer) of that
+        type avoids any copy on the client side.
+
         Args:
-            embeddings(list[list[float]]): list of documents' embeddings
+            embeddings(np.ndarray | list[list[float]] | bytes): (n, dim) float32 array, list of documents' embeddings or float32 buffer
             documents(list[str]): list of textual documents
             ids(list[str]): list of ids for each given document
             metadata(dict[str, str]): dict of key and value for metadata
+            batch_size(int): flush the pipeline every `batch_size` rows, defaults to `self.insert_batch_size`
+            batch_bytes(int): flush the pipeline once the pending payload reaches `batch_bytes`, defaults to `self.insert_batch_bytes`
         """
-        batch_size = 1000
-        with self.conn.pipeline(transaction=False) as pipe:
-            for i, embedding in enumerate(embeddings):
-                embedding = np.array(embedding).astype(np.float32)
-                mapping = {
-                    "text_id": ids[i],
-                    "vector": embedding.tobytes(),
-
-                }
-
-
-                if documents:
-                    if documents[i]:
-                        mapping.update({"document": documents[i]})
-
-                if metadata:
-                    if metadata[i]:
-                        mapping.update(
-                            {
-                                "metadata": ",".join(
-                                    [f"{k}:{v}" for k, v in metadata[i].items()]
-                                )
-                            }
+        self._write_hashes(
+            instrumentation.timer("redis.insert"), ids, embeddings, documents, metadata, batch_size, batch_bytes
+        )
+
+    def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        batch_size: Optional[int] = None,
+        batch_bytes: Optional[int] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert embeddings, replacing the hashes of ids that already exist.
+
+        Each hash is deleted before it is written again, so fields of the previous
+        version (e.g. a document or metadata the new one does not have) do not survive.
+        Every batch runs in a MULTI/EXEC transaction: searches see either the old or
+        the new version of a document, never neither.
+
+        Args:
+            embeddings(np.ndarray | list[list[float]] | bytes): (n, dim) float32 array, list of documents' embeddings or float32 buffer
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+            batch_size(int): rows per transaction, defaults to `self.insert_batch_size`
+            batch_bytes(int): commit the transaction once the pending payload reaches `batch_bytes`, defaults to `self.insert_batch_bytes`
+        """
+        self._write_hashes(
+            instrumentation.timer("redis.upsert"), ids, embeddings, documents, metadata, batch_size, batch_bytes, replace=True
+        )
+
+    def _write_hashes(
+        self,
+        timer: Timer,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        documents: Optional[List[str]],
+        metadata: Optional[List[dict]],
+        batch_size: Optional[int],
+        batch_bytes: Optional[int],
+        replace: bool = False,
+    ) -> None:
+        batch_size = batch_size or self.insert_batch_size
+        batch_bytes = batch_bytes or self.insert_batch_bytes
+
+        if self.full_precision:
+            self._insert_full_precision(ids, embeddings, batch_size)
+            timer.lap("full_precision")
+        pending_rows = 0
+        pending_bytes = 0
+        with self.conn.pipeline(transaction=replace) as pipe:
+            for key, mapping, nbytes in self._hashes(ids, embeddings, documents, metadata):
+                if replace:
+                    pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pending_rows += 1
+                pending_bytes += nbytes
+                if pending_rows >= batch_size or pending_bytes >= batch_bytes:
+                    timer.lap("encode")
+                    pipe.execute()
+                    timer.lap("round_trip")
+                    pending_rows = 0
+                    pending_bytes = 0
+
+            if pending_rows:
+                timer.lap("encode")
+                pipe.execute()
+                timer.lap("round_trip")
+        timer.stop()
+
+    def delete_embeddings(self, ids: List[str], batch_size: Optional[int] = None, **kwargs: Any) -> None:
+        """Delete the hashes of the given ids, which removes them from the index, with one DEL per batch.
+
+        Args:
+            ids(list[str]): document ids
+            batch_size(int): keys per DEL command, defaults to `self.insert_batch_size`
+        """
+        batch_size = batch_size or self.insert_batch_size
+        timer = instrumentation.timer("redis.delete")
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            self.conn.delete(*[f"{self.doc_prefix}{id}" for id in batch])
+            if self.full_precision:
+                self.full_precision_conn.delete(*[self.full_precision_key(id) for id in batch])
+        timer.lap("round_trip")
+        timer.stop()
+
+    def _insert_full_precision(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        batch_size: int,
+    ) -> None:
+        """Write the float32 vectors read back when re-ranking."""
+        matrix = self._float_matrix(embeddings)
+        with self.full_precision_conn.pipeline(transaction=False) as pipe:
+            for start in range(0, len(matrix), batch_size):
+                for i in range(start, min(start + batch_size, len(matrix))):
+                    pipe.set(self.full_precision_key(ids[i]), memoryview(matrix[i]).cast("B"))
+                pipe.execute()
+
+    def _float_matrix(self, embeddings: np.ndarray | List[List[float]] | bytes | memoryview) -> np.ndarray:
+        """(n, dim) float32 matrix of embeddings, buffers are read as float32."""
+        if isinstance(embeddings, (bytes, bytearray, memoryview)):
+            matrix = np.frombuffer(embeddings, dtype=np.float32)
+        else:
+            matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        return matrix.reshape(-1, self.vector_dimension)
+
+    def _encode_vectors(self, embeddings: np.ndarray | List[List[float]]) -> np.ndarray:
+        """Vectors in the index vector type, quantized for INT8 indexes."""
+        if self.index_config.vector_type == "INT8":
+            return self.quantizer().encode(self._float_matrix(embeddings))
+        return np.ascontiguousarray(embeddings, dtype=self.index_config.dtype)
+
+    def _vector_rows(self, embeddings: np.ndarray | List[List[float]] | bytes | memoryview) -> Tuple[memoryview, int]:
+        """Convert embeddings to the index vector type once and return them as a flat byte view plus the size of a row.
+
+        Buffers are in the index vector type, except for INT8 indexes where they hold
+        float32 vectors to quantize. The quantizer is fitted on the first insert when
+        no client fitted it yet.
+        """
+        dtype = self.index_config.dtype
+        if self.index_config.vector_type == "INT8":
+            matrix = self._float_matrix(embeddings)
+            if self._quantizer is None and not self.conn.exists(self.quantizer_key):
+                self.fit_quantizer(matrix)
+            matrix = self._encode_vectors(matrix)
+        elif isinstance(embeddings, (bytes, bytearray, memoryview)):
+            matrix = np.frombuffer(embeddings, dtype=dtype)
+        else:
+            matrix = np.ascontiguousarray(embeddings, dtype=dtype)
+
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(-1, self.vector_dimension)
+
+        return memoryview(matrix).cast("B"), matrix.shape[1] * matrix.itemsize
+
+    def _hashes(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+    ) -> Iterator[Tuple[str, dict, int]]:
+        """Yield the key, hash fields and approximate payload size of each document of an insert."""
+        rows, row_bytes = self._vector_rows(embeddings)
+        for i in range(len(rows) // row_bytes):
+            vector = rows[i * row_bytes:(i + 1) * row_bytes]
+            mapping = self._hash_mapping(i, ids, vector, documents, metadata)
+            nbytes = row_bytes + len(mapping.get("document", ""))
+            yield f"{self.doc_prefix}{ids[i]}", mapping, nbytes
+
+    def _hash_mapping(
+        self,
+        i: int,
+        ids: list[str],
+        vector: bytes | memoryview,
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+    ) -> dict:
+        """Hash fields stored for the i-th document of an insert."""
+        mapping = {
+            "text_id": ids[i],
+            "vector": vector,
+        }
+
+        if documents:
+            if documents[i]:
+                document = documents[i]
+                if self.document_codec is not None:
+                    document = self.document_codec.compress(document)
+                mapping.update({"document": document})
+
+        if metadata and self.index_config.metadata_fields:
+            if metadata[i]:
+                mapping.update(self._metadata_mapping(metadata[i]))
+        elif metadata:
+            if metadata[i]:
+                mapping.update(
+                    {
+                        "metadata": ",".join(
+                            [f"{k}:{v}" for k, v in metadata[i].items()]
                         )
-                pipe.hset(
-                    f"{self.doc_prefix}{ids[i]}",
-                    mapping=mapping,
+                    }
                 )
-                if i % batch_size == 0:
-                    pipe.execute()
+        return mapping
 
-            pipe.execute()
+    def _metadata_mapping(self, metadata: dict) -> dict:
+        """Hash fields of one document's metadata when metadata_fields are declared."""
+        mapping = {}
+        extra = {}
+        for key, value in metadata.items():
+            field_type = self.index_config.metadata_fields.get(key)
+            if field_type is None:
+                extra[key] = value
+            elif field_type == "NUMERIC":
+                mapping[metadata_field(key)] = str(int(value)) if isinstance(value, (int, np.integer)) else repr(float(value))
+            else:
+                value = str(value)
+                if TAG_SEPARATOR in value:
+                    raise ValueError(f"metadata {key} value {value!r} contains the tag separator {TAG_SEPARATOR!r}")
+                mapping[metadata_field(key)] = value
+        if extra:
+            mapping[METADATA_EXTRA] = json.dumps(extra)
+        return mapping
 
     def search_embedding(
         self,
         query: list[float],
         k: int = 10,
         filters: dict[str, str] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        rerank: Optional[int] = None,
         **kwargs: Any,
     ) -> dict:
         """Search embeddings from the database.
@@ -155,7 +733,11 @@ class Redis(VectorDB):
             query(list[float]): embedding to use as a search query
             k(int): number of results to return
             filters(dict[str, str]): dict of key and value for filtering on metadata
-            kwargs: other arguments
+            projection(Projection): fields to return, only those are sent back by Redis
+            kwargs: other arguments, `ef_runtime` overrides the HNSW EF_RUNTIME of this query,
+                `hybrid_policy` ("ADHOC_BF" or "BATCHES") and `batch_size` control how a
+                filtered query is executed, `rerank` fetches k * rerank candidates and
+                re-ranks them against the full precision vectors
 
 
 
@@ -163,61 +745,372 @@ class Redis(VectorDB):
 
 
         """
-        query_vector = np.array(query).astype(np.float32).tobytes()
+        timer = instrumentation.timer("redis.search")
+        projection = Projection(projection)
+        candidates = self._candidates(k, rerank)
+        query_obj, query_params = self._search_query(
+            query, candidates, filters, projection=projection, timer=timer, **kwargs
+        )
+        # same steps as Search.search, split so every phase can be timed
+        args = search_args(self.index_name, query_obj, query_params)
+        timer.lap("build_query")
+        response = self.conn.execute_command(SEARCH_CMD, *args, **{NEVER_DECODE: True})
+        timer.lap("round_trip")
+        result = self._parse_response(response, projection, timer)
+        if rerank:
+            result = self._rerank(query, result, k, self._read_full_precision([result]))
+            timer.lap("rerank")
+        timer.stop()
+        return result
 
-        query_prefix = "*"
+    def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        rerank: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Search the embeddings of several queries, sending all FT.SEARCH commands in one pipeline.
 
-        if filters:
-            query_prefix = ""
-            for meta_key, meta_value in filters.items():
-                query_prefix += "@metadata:{" + str(meta_key) + "\:" + str(meta_value) + "} "
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results to return per query
+            filters(dict[str, str] | list[dict]): filter applied to every query, or one filter per query
+            projection(Projection): fields to return
+            rerank(int): re-rank k * rerank candidates against the full precision vectors
+            kwargs: other arguments, see `search_embedding`
+        """
+        timer = instrumentation.timer("redis.search_batch")
+        projection = Projection(projection)
+        candidates = self._candidates(k, rerank)
+        queries = np.asarray(queries, dtype=np.float32)
+        with self.conn.pipeline(transaction=False) as pipe:
+            for query, query_filters in zip(queries, batch_filters(filters, len(queries))):
+                query_obj, query_params = self._search_query(
+                    query, candidates, query_filters, projection=projection, timer=timer, **kwargs
+                )
+                pipe.execute_command(SEARCH_CMD, *search_args(self.index_name, query_obj, query_params), **{NEVER_DECODE: True})
+                timer.lap("build_query")
+            responses = pipe.execute()
+            timer.lap("round_trip")
+
+        results = self._parse_pipeline_results(responses, projection, timer)
+        if rerank:
+            results = self._rerank_batch(queries, results, k, self._read_full_precision(results))
+            timer.lap("rerank")
+        timer.stop()
+        return results
+
+    def _candidates(self, k: int, rerank: Optional[int]) -> int:
+        """Number of results to fetch from the index."""
+        if not rerank:
+            return k
+        if not self.full_precision:
+            raise ValueError("rerank needs the full precision vectors, create the client with full_precision=True")
+        return k * rerank
+
+    def _full_precision_keys(self, results: list) -> List[str]:
+        return [self.full_precision_key(id) for result in results for id in result.ids]
+
+    def _read_full_precision(self, results: list) -> List[bytes | None]:
+        """Full precision vectors of every candidate of `results`, with one MGET."""
+        keys = self._full_precision_keys(results)
+        return self.full_precision_conn.mget(keys) if keys else []
+
+    def _rerank(
+        self,
+        query: list[float],
+        result: EmbeddingSearchResult | CompactSearchResult,
+        k: int,
+        replies: List[bytes | None],
+    ) -> EmbeddingSearchResult | CompactSearchResult:
+        """The k nearest candidates of `result` by exact distance, given the replies of a MGET of their full precision keys."""
+        vectors = full_precision_rows(replies, self.vector_dimension)
+        rows, distances = exact_order(query, vectors, self.index_config.metric_type, k)
+        return take(result, rows, distances)
+
+    def _rerank_batch(self, queries: np.ndarray, results: list, k: int, replies: List[bytes | None]) -> list:
+        """`_rerank` every result of a batch, given one MGET reply for all of their candidates."""
+        reranked = []
+        start = 0
+        for query, result in zip(queries, results):
+            reranked.append(self._rerank(query, result, k, replies[start:start + len(result.ids)]))
+            start += len(result.ids)
+        return reranked
+
+    def _parse_pipeline_results(
+        self,
+        responses: list,
+        projection: Projection = Projection.DOCUMENTS,
+        timer: Timer = NULL_TIMER,
+    ) -> List[EmbeddingSearchResult]:
+        """Parse raw FT.SEARCH replies returned by a pipeline."""
+        return [self._parse_response(response, projection, timer) for response in responses]
 
-            query_prefix = query_prefix.strip()
+    def _parse_response(
+        self,
+        response: list,
+        projection: Projection = Projection.DOCUMENTS,
+        timer: Timer = NULL_TIMER,
+    ) -> EmbeddingSearchResult | CompactSearchResult:
+        """Convert a raw (undecoded) FT.SEARCH reply into the client's result type."""
+        if self.compact_results:
+            return self._parse_compact_result(response, projection, timer)
+        docs = self._search_documents(response, projection)
+        timer.lap("documents")
+        return self._parse_search_result(docs, projection, timer)
+
+    def _search_documents(self, response: list, projection: Projection) -> List[Document]:
+        """Documents of a raw FT.SEARCH reply, with every field decoded apart from the `_raw_fields`.
+
+        The reply is [total, key, [field, value, ...], key, [field, value, ...], ...].
+        """
+        raw_fields = self._raw_fields(projection)
+        docs = []
+        for i in range(1, len(response), 2):
+            fields = response[i + 1]
+            row = {}
+            for j in range(0, len(fields), 2):
+                name = fields[j].decode()
+                row[name] = fields[j + 1] if name in raw_fields else _decode(fields[j + 1])
+            row.pop("id", None)
+            docs.append(Document(_decode(response[i]), **row))
+        return docs
+
+    def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, read with one pipelined HGET per id.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        timer = instrumentation.timer("redis.get_documents")
+        with self.conn.pipeline(transaction=False) as pipe:
+            for id in ids:
+                pipe.hget(f"{self.doc_prefix}{id}", "document")
+            timer.lap("encode")
+            documents = pipe.execute()
+            timer.lap("round_trip")
+        documents = [self._decode_document(document) for document in documents]
+        timer.lap("result")
+        timer.stop()
+        return documents
+
+    def _decode_document(self, value: bytes | None) -> str | None:
+        """Document field as read from Redis, decompressed when the client has a document codec."""
+        if self.document_codec is not None:
+            return self.document_codec.decompress(value)
+        return _decode(value)
+
+    def _parse_compact_result(
+        self,
+        response: list,
+        projection: Projection = Projection.DOCUMENTS,
+        timer: Timer = NULL_TIMER,
+    ) -> CompactSearchResult:
+        """Read ids and distances out of a raw FT.SEARCH reply, documents and metadata are decoded on access.
+
+        The reply is [total, key, [field, value, ...], key, [field, value, ...], ...].
+        """
+        ids = []
+        distances = []
+        documents = []
+        vectors = []
+        rows = []
+        for i in range(1, len(response), 2):
+            fields = response[i + 1]
+            row = {fields[j].decode(): fields[j + 1] for j in range(0, len(fields), 2)}
+            ids.append(row["text_id"].decode())
+            distances.append(float(row["distance"]))
+            documents.append(row.get("document"))
+            vectors.append(row.get("vector"))
+            rows.append(row)
+        timer.lap("documents")
+
+        with_documents = projection.includes(Projection.DOCUMENTS)
+        with_metadata = projection.includes(Projection.METADATA)
+        result = CompactSearchResult(
+            ids=ids,
+            distances=np.asarray(distances, dtype=np.float32),
+            documents=documents if with_documents else None,
+            metadatas=rows if with_metadata else None,
+            decode_document=self._decode_document if with_documents else None,
+            decode_metadata=self._parse_raw_metadata if with_metadata else None,
+            embeddings=self._parse_vectors(vectors) if projection.includes(Projection.EMBEDDINGS) else None,
+        )
+        timer.lap("result")
+        return result
+
+    def _parse_vectors(self, vectors: List[bytes]) -> np.ndarray:
+        """(k, dim) matrix of the raw vectors returned by FT.SEARCH."""
+        dtype = self.index_config.dtype
+        matrix = np.empty((len(vectors), self.vector_dimension), dtype=dtype)
+        for i, vector in enumerate(vectors):
+            matrix[i] = np.frombuffer(vector, dtype=dtype)
+        return matrix
+
+    def _parse_raw_metadata(self, row: dict) -> dict:
+        return self._parse_metadata({key: _decode(value) for key, value in row.items() if key.startswith("metadata")})
+
+    def _search_query(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        ef_runtime: Optional[int] = None,
+        hybrid_policy: Optional[Literal["ADHOC_BF", "BATCHES"]] = None,
+        batch_size: Optional[int] = None,
+        projection: Projection = Projection.DOCUMENTS,
+        timer: Timer = NULL_TIMER,
+        **kwargs: Any,
+    ) -> Tuple[Query, dict]:
+        """Build the KNN query and its parameters for `search_embedding`."""
+        query_vector = self._encode_vectors(np.asarray(query).reshape(1, -1)).tobytes()
+
+        query_prefix = self._filter_expression(filters)
+        timer.lap("encode")
+
+        query_params = {"vec": query_vector}
+        knn_params = ""
+        if ef_runtime is not None:
+            if self.index_config.index_type != VectorIndexType.HNSW:
+                raise ValueError("ef_runtime only applies to HNSW indexes")
+            knn_params += " EF_RUNTIME $ef_runtime"
+            query_params["ef_runtime"] = ef_runtime
+
+        if batch_size is not None and hybrid_policy != "BATCHES":
+            raise ValueError("batch_size only applies to the BATCHES hybrid policy")
+        # Redis rejects hybrid attributes on a query without a filter, so they are left out
+        if hybrid_policy is not None and query_prefix != "*":
+            if hybrid_policy not in ("ADHOC_BF", "BATCHES"):
+                raise ValueError(f"unknown hybrid policy {hybrid_policy}")
+            knn_params += f" HYBRID_POLICY {hybrid_policy}"
+            if batch_size is not None:
+                knn_params += " BATCH_SIZE $batch_size"
+                query_params["batch_size"] = batch_size
 
         query_obj = (
-            Query(f"({query_prefix})=>[KNN {k} @vector $vec as distance]")
+            Query(f"({query_prefix})=>[KNN {k} @vector $vec{knn_params} as distance]")
             .sort_by("distance")
-            .return_fields("id", "text_id", "distance", "document", "metadata")
+            .return_fields(*self._return_fields(projection))
             .paging(0, k)
             .dialect(2)
         )
-        query_params = {"vec": query_vector}
-        results = self.conn.ft(self.index_name).search(query_obj, query_params).docs
+        for field in self._raw_fields(projection):
+            query_obj.return_field(field, decode_field=False)
+        return query_obj, query_params
+
+    def _raw_fields(self, projection: Projection) -> List[str]:
+        """Hash fields returned by FT.SEARCH as bytes: the vector, and the compressed document."""
+        fields = []
+        if projection.includes(Projection.EMBEDDINGS):
+            fields.append("vector")
+        if projection.includes(Projection.DOCUMENTS) and self.document_codec is not None:
+            fields.append("document")
+        return fields
+
+    def _return_fields(self, projection: Projection) -> List[str]:
+        """Hash fields returned by FT.SEARCH for a projection, apart from the raw vector."""
+        fields = ["id", "text_id", "distance"]
+        if projection.includes(Projection.METADATA):
+            fields += self._metadata_return_fields()
+        if projection.includes(Projection.DOCUMENTS) and self.document_codec is None:
+            # compressed documents are returned undecoded, see _search_query
+            fields.append("document")
+        return fields
+
+    def _filter_expression(self, filters: dict | None) -> str:
+        """Query clauses matching every key and value of `filters`, "*" when unfiltered."""
+        if not filters:
+            return "*"
 
+        metadata_fields = self.index_config.metadata_fields
+        if not metadata_fields:
+            query_prefix = ""
+            for meta_key, meta_value in filters.items():
+                query_prefix += "@metadata:{" + str(meta_key) + "\\:" + str(meta_value) + "} "
+            return query_prefix.strip()
+
+        clauses = []
+        for key, value in filters.items():
+            field_type = metadata_fields.get(key)
+            if field_type is None:
+                raise ValueError(f"metadata {key} is not an indexed field, declare it in metadata_fields")
+            if field_type == "NUMERIC":
+                clauses.append(f"@{metadata_field(key)}:[{value} {value}]")
+            else:
+                clauses.append(f"@{metadata_field(key)}:{{{escape_tag(str(value))}}}")
+        return " ".join(clauses)
+
+    def _metadata_return_fields(self) -> List[str]:
+        if not self.index_config.metadata_fields:
+            return ["metadata"]
+        return [metadata_field(key) for key in self.index_config.metadata_fields] + [METADATA_EXTRA]
+
+    def _parse_metadata(self, fields: dict) -> dict:
+        """Metadata of a FT.SEARCH document given its (decoded) fields, typed according to metadata_fields."""
+        metadata_fields = self.index_config.metadata_fields
+        if not metadata_fields:
+            meta_components = {}
+            if 'metadata' in fields:
+                for meta in fields['metadata'].split(","):
+                    key, value = meta.split(":")
+                    meta_components[key] = value
+            return meta_components
+
+        metadata = {}
+        for key, field_type in metadata_fields.items():
+            value = fields.get(metadata_field(key))
+            if value is None:
+                continue
+            if field_type == "NUMERIC":
+                value = float(value) if any(c in value for c in ".eEn") else int(value)
+            metadata[key] = value
+        if METADATA_EXTRA in fields:
+            metadata.update(json.loads(fields[METADATA_EXTRA]))
+        return metadata
+
+    def _parse_search_result(
+        self,
+        results: list,
+        projection: Projection = Projection.DOCUMENTS,
+        timer: Timer = NULL_TIMER,
+    ) -> EmbeddingSearchResult:
+        """Convert the documents returned by FT.SEARCH into an EmbeddingSearchResult."""
         ids = []
+        distances = []
         documents = []
         metadatas = []
 
         for doc in results:
             ids.append(doc.text_id)
-            
+            distances.append(float(doc.distance))
+
             if hasattr(doc, 'document'):
-                documents.append(doc.document)
+                document = doc.document
+                if self.document_codec is not None:
+                    document = self.document_codec.decompress(document)
+                documents.append(document)
             else:
                 documents.append(None)
 
-            if hasattr(doc, 'metadata'):
-                meta_components = {}
-                for meta in doc.metadata.split(","):
-                    key, value = meta.split(":")
-                    meta_components[key] = value
-                metadatas.append(meta_components)
-            else:
-                metadatas.append({})
-
-
-
+            metadatas.append(self._parse_metadata(doc.__dict__))
+        timer.lap("metadata")
 
+        embeddings = None
+        if projection.includes(Projection.EMBEDDINGS):
+            embeddings = self._parse_vectors([doc.vector for doc in results]).tolist()
 
         parsed_result = {
             "ids": ids,
-            "embeddings": None,
-            "documents": documents,
-            "metadatas": metadatas
+            "embeddings": embeddings,
+            "documents": documents if projection.includes(Projection.DOCUMENTS) else None,
+            "metadatas": metadatas if projection.includes(Projection.METADATA) else None,
+            "distances": distances,
         }
 
-
-
         embedding_search_result = EmbeddingSearchResult(**parsed_result)
+        timer.lap("result")
 
         return embedding_search_result
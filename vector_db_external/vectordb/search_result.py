@@ -1,10 +1,78 @@
+import numpy as np
 from pydantic import BaseModel
 
-from typing import Tuple, List, Optional
+from typing import Any, Callable, Tuple, List, Optional
 
 
 class EmbeddingSearchResult(BaseModel):
     ids: List[str]
-    embeddings: List[float] | None
+    embeddings: List[List[float]] | None
     metadatas: List[dict]  | List[None] | None
     documents:  List[str]  | List[None | str] | None
+    distances: List[float] | None = None
+
+
+class CompactSearchResult:
+    """Search result for the hot path, built without pydantic validation.
+
+    Ids are a list, distances a float32 array and embeddings, when requested, a
+    (k, dim) array. Documents and metadata are kept as the client received them and
+    decoded on first access with `decode_document` and `decode_metadata`, so callers
+    that only need ids pay nothing for them, and `received_documents` and
+    `received_metadatas` keep them as received, e.g. compressed bytes. Decoding only
+    reads the received values and publishes the decoded list with one assignment, so
+    threads sharing a cached result may decode twice but never see a partial list.
+    Exposes the same attributes as EmbeddingSearchResult, `to_model` converts it.
+    """
+
+    __slots__ = (
+        "ids", "distances", "embeddings", "received_documents", "received_metadatas",
+        "_documents", "_metadatas", "_decode_document", "_decode_metadata",
+    )
+
+    def __init__(
+        self,
+        ids: List[str],
+        distances: np.ndarray | None = None,
+        documents: Optional[list] = None,
+        metadatas: Optional[list] = None,
+        decode_document: Optional[Callable[[Any], Optional[str]]] = None,
+        decode_metadata: Optional[Callable[[Any], dict]] = None,
+        embeddings: Optional[list] = None,
+    ):
+        self.ids = ids
+        self.distances = distances
+        self.embeddings = embeddings
+        self.received_documents = documents
+        self.received_metadatas = metadatas
+        self._documents = documents if decode_document is None else None
+        self._metadatas = metadatas if decode_metadata is None else None
+        self._decode_document = decode_document
+        self._decode_metadata = decode_metadata
+
+    @property
+    def documents(self) -> Optional[List[Optional[str]]]:
+        if self._documents is None and self.received_documents is not None:
+            self._documents = [self._decode_document(document) for document in self.received_documents]
+        return self._documents
+
+    @property
+    def metadatas(self) -> Optional[List[dict]]:
+        if self._metadatas is None and self.received_metadatas is not None:
+            self._metadatas = [self._decode_metadata(metadata) for metadata in self.received_metadatas]
+        return self._metadatas
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"CompactSearchResult(ids={self.ids!r}, distances={self.distances!r})"
+
+    def to_model(self) -> EmbeddingSearchResult:
+        return EmbeddingSearchResult(
+            ids=self.ids,
+            embeddings=np.asarray(self.embeddings).tolist() if self.embeddings is not None else None,
+            documents=self.documents,
+            metadatas=self.metadatas,
+            distances=self.distances.tolist() if self.distances is not None else None,
+        )
@@ -0,0 +1,275 @@
+import heapq
+import itertools
+import logging
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import numpy as np
+
+from .vectordb_api import VectorDB
+from .instrumentation import clock, instrumentation
+from .search_result import CompactSearchResult, EmbeddingSearchResult
+
+
+log = logging.getLogger(__name__)
+
+
+def shard_of(id: str, shards: int) -> int:
+    """Index of the shard owning `id`, a crc32 of the id so every process and run agrees."""
+    return zlib.crc32(id.encode()) % shards
+
+
+def merge_results(
+    results: List[EmbeddingSearchResult | CompactSearchResult],
+    k: int,
+) -> EmbeddingSearchResult:
+    """Global top k of per-shard results, each sorted by increasing distance, with a k-way heap merge.
+
+    A field (documents, metadata, embeddings) is returned only when every shard returned it.
+    """
+    if any(result.distances is None for result in results):
+        raise ValueError("shard results without distances can not be merged")
+
+    def entries(shard: int, result: EmbeddingSearchResult | CompactSearchResult):
+        return ((float(distance), shard, row) for row, distance in enumerate(result.distances))
+
+    top = list(itertools.islice(heapq.merge(*[entries(shard, result) for shard, result in enumerate(results)]), k))
+
+    def select(field: str, convert: Callable[[Any], Any] = lambda value: value) -> Optional[list]:
+        values = [getattr(result, field) for result in results]
+        if any(value is None for value in values):
+            return None
+        return [convert(values[shard][row]) for _, shard, row in top]
+
+    return EmbeddingSearchResult(
+        ids=[results[shard].ids[row] for _, shard, row in top],
+        embeddings=select("embeddings", lambda vector: np.asarray(vector, dtype=np.float64).tolist()),
+        documents=select("documents"),
+        metadatas=select("metadatas"),
+        distances=[distance for distance, _, _ in top],
+    )
+
+
+class ShardedVectorDB(VectorDB):
+    """Scatter-gather VectorDB that hash-partitions ids across several VectorDBs.
+
+    Every id belongs to one shard (see `shard_of`): inserts, upserts and deletes are
+    split by owner and sent to the shards in parallel. Searches go to every shard in
+    parallel, each returning its own top k, and `merge_results` keeps the global top
+    k by distance, so all shards must use the same metric. Shards are either given as
+    `shards` or created from `db_class`, the keyword arguments shared by all of them
+    and one dict of `shard_kwargs` per shard, so the wrapper also works with `DBFactory`.
+
+    Shard calls run on a thread pool of `max_workers` threads shared by every caller
+    of the instance, started on the first call and released by `close`. With
+    `instrumentation` enabled each shard call is recorded as
+    "sharded.shard<i>.<operation>", and every search as "sharded.search" with the
+    phases "scatter" (waiting for the slowest shard) and "merge".
+
+    Examples:
+        >>> db = ShardedVectorDB(
+        >>>     db_class=Redis,
+        >>>     shard_kwargs=[{"db_config": config} for config in redis_configs],
+        >>>     database_name="random_dataset",
+        >>> )
+        >>> db.search_embedding(query, k=10)
+    """
+
+    def __init__(
+        self,
+        shards: Optional[List[VectorDB]] = None,
+        db_class: Optional[Type[VectorDB]] = None,
+        shard_kwargs: Optional[List[Dict[str, Any]]] = None,
+        max_workers: Optional[int] = None,
+        **db_kwargs: Any,
+    ):
+        if shards is None:
+            if db_class is None or not shard_kwargs:
+                raise ValueError("either shards or db_class and shard_kwargs are required")
+            shards = [db_class(**{**db_kwargs, **kwargs}) for kwargs in shard_kwargs]
+        if not shards:
+            raise ValueError("at least one shard is required")
+        self.shards = shards
+        self.max_workers = max_workers if max_workers is not None else 16 * len(shards)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="shard")
+            return self._executor
+
+    def close(self) -> None:
+        """Shut down the thread pool and close every shard."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for shard in self.shards:
+            shard.close()
+
+    def _call(self, shard: int, operation: str, *args: Any, **kwargs: Any) -> Any:
+        started = clock()
+        result = getattr(self.shards[shard], operation)(*args, **kwargs)
+        instrumentation.record(f"sharded.shard{shard}.{operation}", clock() - started)
+        return result
+
+    def _scatter(self, calls: Dict[int, tuple], operation: str, **kwargs: Any) -> Dict[int, Any]:
+        """Call `operation` on each shard of `calls` with its positional arguments, in parallel."""
+        futures = {
+            shard: self._pool().submit(self._call, shard, operation, *args, **kwargs) for shard, args in calls.items()
+        }
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def _partition(self, ids: List[str]) -> Dict[int, List[int]]:
+        """Positions of the given ids grouped by owning shard."""
+        rows: Dict[int, List[int]] = {}
+        for i, id in enumerate(ids):
+            rows.setdefault(shard_of(id, len(self.shards)), []).append(i)
+        return rows
+
+    def _write(
+        self,
+        operation: str,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]] | bytes | memoryview,
+        documents: Optional[List[str]],
+        metadata: Optional[List[dict]],
+        **kwargs: Any,
+    ) -> None:
+        if isinstance(embeddings, (bytes, bytearray, memoryview)):
+            embeddings = np.frombuffer(embeddings, dtype=np.float32).reshape(len(ids), -1)
+
+        def pick(values: Any, rows: List[int]) -> Any:
+            if values is None:
+                return None
+            if isinstance(values, np.ndarray):
+                return values[rows]
+            return [values[row] for row in rows]
+
+        calls = {
+            shard: ([ids[row] for row in rows], pick(embeddings, rows), pick(documents, rows), pick(metadata, rows))
+            for shard, rows in self._partition(ids).items()
+        }
+        self._scatter(calls, operation, **kwargs)
+
+    def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert every embedding into the shard owning its id.
+
+        Args:
+            embeddings(np.ndarray | list[list[float]] | bytes): list of documents' embeddings, or float32 buffer
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+        """
+        self._write("insert_embeddings", ids, embeddings, documents, metadata, **kwargs)
+
+    def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Upsert every embedding into the shard owning its id, see `insert_embeddings`."""
+        self._write("upsert_embeddings", ids, embeddings, documents, metadata, **kwargs)
+
+    def delete_embeddings(self, ids: List[str], **kwargs: Any) -> None:
+        """Delete every id from the shard owning it.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        calls = {shard: ([ids[row] for row in rows],) for shard, rows in self._partition(ids).items()}
+        self._scatter(calls, "delete_embeddings", **kwargs)
+
+    def wait_for_indexed(self, timeout: float = 3600, min_documents: Optional[int] = None, **kwargs: Any) -> None:
+        """Wait until every shard has indexed its documents, in parallel.
+
+        `min_documents` counts the whole collection, which no shard can check on its own,
+        so it is not passed to the shards.
+
+        Args:
+            timeout(float): seconds each shard waits before raising TimeoutError
+        """
+        self._scatter({shard: () for shard in range(len(self.shards))}, "wait_for_indexed", timeout=timeout, **kwargs)
+
+    def max_insert_batch_size(self) -> Optional[int]:
+        sizes = [size for size in (shard.max_insert_batch_size() for shard in self.shards) if size]
+        return min(sizes) if sizes else None
+
+    def search_embedding(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Search every shard in parallel and merge their top k.
+
+        Args:
+            query(list[float]): embedding to use as a search query
+            k(int): number of results to return
+            filters(dict[str, str]): dict of key and value for filtering on metadata
+            kwargs: other arguments, passed to every shard
+        """
+        timer = instrumentation.timer("sharded.search")
+        calls = {shard: (query,) for shard in range(len(self.shards))}
+        results = self._scatter(calls, "search_embedding", k=k, filters=filters, **kwargs)
+        timer.lap("scatter")
+        result = merge_results([results[shard] for shard in range(len(self.shards))], k)
+        timer.lap("merge")
+        timer.stop()
+        return result
+
+    def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 10,
+        filters: dict[str, str] | List[dict] | None = None,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Search a batch of queries on every shard in parallel and merge the top k of each query.
+
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings
+            k(int): number of results to return per query
+            filters(dict[str, str] | list[dict]): filter applied to every query, or one filter per query
+            kwargs: other arguments, passed to every shard
+        """
+        timer = instrumentation.timer("sharded.search_batch")
+        calls = {shard: (queries,) for shard in range(len(self.shards))}
+        results = self._scatter(calls, "search_embeddings_batch", k=k, filters=filters, **kwargs)
+        timer.lap("scatter")
+        merged = [
+            merge_results([results[shard][i] for shard in range(len(self.shards))], k) for i in range(len(queries))
+        ]
+        timer.lap("merge")
+        timer.stop()
+        return merged
+
+    def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, fetched from their shards in parallel.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        partition = self._partition(ids)
+        calls = {shard: ([ids[row] for row in rows],) for shard, rows in partition.items()}
+        found = self._scatter(calls, "get_documents")
+        documents: List[Optional[str]] = [None] * len(ids)
+        for shard, rows in partition.items():
+            for row, document in zip(rows, found[shard]):
+                documents[row] = document
+        return documents
@@ -0,0 +1,414 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from .vectordb_api import AsyncVectorDB, DBConfig, Projection, VectorDB
+from .instrumentation import Timer, instrumentation
+from .search_result import EmbeddingSearchResult
+
+
+log = logging.getLogger(__name__)
+
+
+_WORDS = (
+    "the of and in to was is for on as by with he that at from his it an were are which "
+    "this also be first has or had its new one after their who city two other were national "
+    "state river world war year born film university team season album village county"
+).split()
+
+
+class ServerBusyError(ConnectionError):
+    """The simulated server queue is full, like a server refusing connections under overload."""
+
+
+class ServiceTime(BaseModel):
+    """Service time distribution of a simulated operation.
+
+    Lognormal around `median_ms`, `sigma` is the standard deviation of its logarithm.
+    With probability `stall_probability` an extra `stall_ms` is added, e.g. a fork
+    for a background save or a garbage collection pause.
+    """
+
+    median_ms: float = 1.0
+    sigma: float = 0.5
+    stall_probability: float = 0.0
+    stall_ms: float = 200.0
+
+    def sample(self, rng: random.Random) -> float:
+        """One service time, in seconds."""
+        milliseconds = self.median_ms * math.exp(self.sigma * rng.gauss(0.0, 1.0)) if self.median_ms > 0 else 0.0
+        if self.stall_probability and rng.random() < self.stall_probability:
+            milliseconds += self.stall_ms
+        return milliseconds / 1000
+
+
+class SimulatedConfig(DBConfig):
+    """Behaviour of the simulated server.
+
+    Args:
+        search_time(ServiceTime): service time of one search
+        insert_time(ServiceTime): service time of one insert call
+        write_slowdown(float): searches take this fraction longer for every write being served, like an index locked by inserts
+        max_concurrency(int): requests served at the same time, the others wait in the queue
+        queue_size(int): requests allowed to wait, further ones fail with ServerBusyError; unbounded when None
+        size(int): number of documents the simulated database holds
+        document_median_bytes(int): median size of the returned documents, lognormal like Wikipedia articles
+        document_sigma(float): standard deviation of the logarithm of the document sizes
+        document_max_bytes(int): largest document size
+        document_pool(int): number of distinct documents generated up front
+        transfer_mb_per_second(float): adds the time to send the response payload, ignored when None
+        seed(int): seed of the document sizes and contents
+    """
+
+    search_time: ServiceTime = ServiceTime(median_ms=2.0)
+    insert_time: ServiceTime = ServiceTime(median_ms=5.0)
+    write_slowdown: float = 0.0
+    max_concurrency: int = 64
+    queue_size: Optional[int] = 4096
+    size: int = 25000
+    document_median_bytes: int = 2500
+    document_sigma: float = 0.8
+    document_max_bytes: int = 200_000
+    document_pool: int = 1000
+    transfer_mb_per_second: Optional[float] = None
+    seed: int = 0
+
+
+def _documents(config: SimulatedConfig) -> List[str]:
+    """Pool of generated documents whose sizes follow the configured distribution."""
+    rng = random.Random(config.seed)
+    documents = []
+    for _ in range(config.document_pool):
+        size = int(config.document_median_bytes * math.exp(config.document_sigma * rng.gauss(0.0, 1.0)))
+        size = min(size, config.document_max_bytes)
+        words = []
+        length = 0
+        while length < size:
+            word = rng.choice(_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        documents.append(" ".join(words)[:size])
+    return documents
+
+
+class SimulatedServer:
+    """State of one simulated database in the current process: its queue and its documents."""
+
+    def __init__(self, config: SimulatedConfig):
+        self.config = config
+        self.documents = _documents(config)
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(config.max_concurrency)
+        self.in_flight = 0
+        self.rejected = 0
+        self.writing = 0
+
+    def admit(self) -> None:
+        """Count a request in, or reject it when every slot is busy and the queue is full."""
+        with self.lock:
+            queue_size = self.config.queue_size
+            if queue_size is not None and self.in_flight >= self.config.max_concurrency + queue_size:
+                self.rejected += 1
+                raise ServerBusyError(f"simulated server queue full ({queue_size} waiting)")
+            self.in_flight += 1
+
+    def finish(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+    def start_service(self, service_time: float, write: bool) -> float:
+        """Count a write in, or slow a read down by the writes being served, once the request has a slot."""
+        with self.lock:
+            if write:
+                self.writing += 1
+                return service_time
+            return service_time * (1 + self.config.write_slowdown * self.writing)
+
+    def finish_service(self, write: bool) -> None:
+        if write:
+            with self.lock:
+                self.writing -= 1
+
+    def transfer_time(self, nbytes: int) -> float:
+        if not self.config.transfer_mb_per_second:
+            return 0.0
+        return nbytes / (self.config.transfer_mb_per_second * 1024 * 1024)
+
+    def search_result(self, query: Any, k: int, filters: dict | None, projection: Projection) -> EmbeddingSearchResult:
+        """Deterministic result of a query: the same query always gets the same ids and documents."""
+        seed = zlib.crc32(np.ascontiguousarray(query, dtype=np.float32).tobytes())
+        if filters:
+            seed = zlib.crc32(repr(sorted(filters.items())).encode(), seed)
+        rng = random.Random(seed)
+        rows = rng.sample(range(self.config.size), min(k, self.config.size))
+        distances = sorted(rng.random() for _ in rows)
+        return EmbeddingSearchResult(
+            ids=[f"doc{row}" for row in rows],
+            embeddings=None,
+            documents=[self.document(row) for row in rows] if projection.includes(Projection.DOCUMENTS) else None,
+            metadatas=[dict(filters or {}) for _ in rows] if projection.includes(Projection.METADATA) else None,
+            distances=distances,
+        )
+
+    def document(self, row: int) -> str:
+        return self.documents[row % len(self.documents)]
+
+    def document_row(self, id: str) -> Optional[int]:
+        if not id.startswith("doc") or not id[3:].isdigit() or int(id[3:]) >= self.config.size:
+            return None
+        return int(id[3:])
+
+
+def _result_bytes(result: EmbeddingSearchResult) -> int:
+    return sum(len(id) for id in result.ids) + sum(len(document) for document in result.documents or [] if document)
+
+
+class SimulatedVectorDB(VectorDB):
+    """VectorDB without any external service, that behaves like a remote server.
+
+    Every call waits for one of `max_concurrency` server slots, then sleeps for a
+    service time drawn from the configured distribution, plus the transfer time of
+    the response when `transfer_mb_per_second` is set. At most `queue_size` calls
+    wait for a slot, the next ones fail right away with ServerBusyError. Searches
+    return k deterministic ids with documents sized like Wikipedia articles, inserts
+    are only timed. With `write_slowdown` reads get slower while writes are served.
+
+    The server is simulated inside each process: instances of one process created
+    with the same database_name share its queue, worker processes each have their
+    own. Each call is timed by `instrumentation` as "simulated.search" (phases
+    "queue" and "service") so the load harness overhead is the latency it reports
+    minus the simulated time.
+
+    Examples:
+        >>> config = SimulatedConfig(search_time=ServiceTime(median_ms=2, stall_probability=0.001), max_concurrency=128)
+        >>> runner = LoadTestRunner(DBFactory(SimulatedVectorDB, db_config=config), LoadTestConfig())
+        >>> print(runner.run([SearchScenario(queries, k=10)]).table())
+    """
+
+    _servers: Dict[str, SimulatedServer] = {}
+    _servers_lock = threading.Lock()
+
+    def __init__(
+        self,
+        database_name: str = "vector_store_benchmark",
+        vector_dimension: int = 1536,
+        db_config: DBConfig | None = None,
+        drop_old: bool = False,
+        **kwargs,
+    ):
+        self.database_name = database_name
+        self.vector_dimension = vector_dimension
+        self.db_config = db_config if db_config is not None else SimulatedConfig()
+        self.server = self.simulated_server(database_name, self.db_config, drop_old)
+        self._local = threading.local()
+
+    @classmethod
+    def simulated_server(cls, database_name: str, config: SimulatedConfig, drop_old: bool = False) -> SimulatedServer:
+        with cls._servers_lock:
+            server = cls._servers.get(database_name)
+            if server is None or drop_old or server.config != config:
+                server = cls._servers[database_name] = SimulatedServer(config)
+        return server
+
+    def _rng(self) -> random.Random:
+        rng = getattr(self._local, "rng", None)
+        if rng is None:
+            rng = self._local.rng = random.Random()
+        return rng
+
+    def _serve(self, timer: Timer, service_time: float, write: bool = False) -> None:
+        server = self.server
+        server.admit()
+        try:
+            with server.slots:
+                timer.lap("queue")
+                try:
+                    time.sleep(server.start_service(service_time, write))
+                finally:
+                    server.finish_service(write)
+            timer.lap("service")
+        finally:
+            server.finish()
+
+    def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Wait for an insert service time, nothing is stored.
+
+        Args:
+            embeddings(np.ndarray | list[list[float]]): list of documents' embeddings
+            documents(list[str]): list of textual documents
+            ids(list[str]): list of ids for each given document
+            metadata(dict[str, str]): dict of key and value for metadata
+        """
+        timer = instrumentation.timer("simulated.insert")
+        nbytes = 4 * self.vector_dimension * len(ids) + sum(len(document) for document in documents or [] if document)
+        self._serve(timer, self.db_config.insert_time.sample(self._rng()) + self.server.transfer_time(nbytes), write=True)
+        timer.stop()
+
+    def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Wait for an insert service time, see `insert_embeddings`."""
+        self.insert_embeddings(ids, embeddings, documents, metadata, **kwargs)
+
+    def delete_embeddings(self, ids: List[str], **kwargs: Any) -> None:
+        """Wait for an insert service time, nothing is deleted.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        timer = instrumentation.timer("simulated.delete")
+        self._serve(timer, self.db_config.insert_time.sample(self._rng()), write=True)
+        timer.stop()
+
+    def search_embedding(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Wait for a search service time and return k simulated results.
+
+        Args:
+            query(list[float]): embedding to use as a search query
+            k(int): number of results to return
+            filters(dict[str, str]): dict of key and value, returned as the metadata of every result
+            projection(Projection): fields to return, documents only add transfer time when returned
+            kwargs: other arguments
+        """
+        timer = instrumentation.timer("simulated.search")
+        result = self.server.search_result(query, k, filters, Projection(projection))
+        service_time = self.db_config.search_time.sample(self._rng()) + self.server.transfer_time(_result_bytes(result))
+        self._serve(timer, service_time)
+        timer.stop()
+        return result
+
+    def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Simulated documents of the given ids, served like a search.
+
+        Args:
+            ids(list[str]): document ids
+        """
+        timer = instrumentation.timer("simulated.get_documents")
+        rows = [self.server.document_row(id) for id in ids]
+        documents = [self.server.document(row) if row is not None else None for row in rows]
+        nbytes = sum(len(document) for document in documents if document)
+        self._serve(timer, self.db_config.search_time.sample(self._rng()) + self.server.transfer_time(nbytes))
+        timer.stop()
+        return documents
+
+
+class AsyncSimulatedVectorDB(AsyncVectorDB):
+    """asyncio counterpart of SimulatedVectorDB, waiting with `asyncio.sleep`.
+
+    Server slots are an asyncio.Semaphore of the event loop that first uses them, so
+    every instance simulates its own server queue.
+    """
+
+    def __init__(
+        self,
+        database_name: str = "vector_store_benchmark",
+        vector_dimension: int = 1536,
+        db_config: DBConfig | None = None,
+        drop_old: bool = False,
+        **kwargs,
+    ):
+        self.database_name = database_name
+        self.vector_dimension = vector_dimension
+        self.db_config = db_config if db_config is not None else SimulatedConfig()
+        self.server = SimulatedServer(self.db_config)
+        self.rng = random.Random()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _serve(self, timer: Timer, service_time: float, write: bool = False) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.db_config.max_concurrency)
+        self.server.admit()
+        try:
+            async with self._slots:
+                timer.lap("queue")
+                try:
+                    await asyncio.sleep(self.server.start_service(service_time, write))
+                finally:
+                    self.server.finish_service(write)
+            timer.lap("service")
+        finally:
+            self.server.finish()
+
+    async def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Wait for an insert service time, see `SimulatedVectorDB.insert_embeddings`."""
+        timer = instrumentation.timer("simulated.insert")
+        nbytes = 4 * self.vector_dimension * len(ids) + sum(len(document) for document in documents or [] if document)
+        await self._serve(timer, self.db_config.insert_time.sample(self.rng) + self.server.transfer_time(nbytes), write=True)
+        timer.stop()
+
+    async def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray | List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Wait for an insert service time, see `SimulatedVectorDB.insert_embeddings`."""
+        await self.insert_embeddings(ids, embeddings, documents, metadata, **kwargs)
+
+    async def delete_embeddings(self, ids: List[str], **kwargs: Any) -> None:
+        """Wait for an insert service time, see `SimulatedVectorDB.delete_embeddings`."""
+        timer = instrumentation.timer("simulated.delete")
+        await self._serve(timer, self.db_config.insert_time.sample(self.rng), write=True)
+        timer.stop()
+
+    async def search_embedding(
+        self,
+        query: list[float],
+        k: int = 10,
+        filters: dict[str, str] | None = None,
+        projection: Projection = Projection.DOCUMENTS,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Wait for a search service time and return k simulated results, see `SimulatedVectorDB.search_embedding`."""
+        timer = instrumentation.timer("simulated.search")
+        result = self.server.search_result(query, k, filters, Projection(projection))
+        service_time = self.db_config.search_time.sample(self.rng) + self.server.transfer_time(_result_bytes(result))
+        await self._serve(timer, service_time)
+        timer.stop()
+        return result
+
+    async def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Simulated documents of the given ids, see `SimulatedVectorDB.get_documents`."""
+        timer = instrumentation.timer("simulated.get_documents")
+        rows = [self.server.document_row(id) for id in ids]
+        documents = [self.server.document(row) if row is not None else None for row in rows]
+        nbytes = sum(len(document) for document in documents if document)
+        await self._serve(timer, self.db_config.search_time.sample(self.rng) + self.server.transfer_time(nbytes))
+        timer.stop()
+        return documents
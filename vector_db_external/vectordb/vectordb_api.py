@@ -1,8 +1,11 @@
+import asyncio
+import json
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Optional, List
+from typing import Any, Optional, List, Tuple
 from .search_result import EmbeddingSearchResult
 
+import numpy as np
 from pydantic import BaseModel
 
 
@@ -21,6 +24,42 @@ class IndexType(str, Enum):
     ES_HNSW = "hnsw"
 
 
+class Projection(str, Enum):
+    """Fields returned by a search, each level adds to the previous one.
+
+    IDS returns ids and distances, METADATA adds the metadata, DOCUMENTS the
+    documents (the default) and EMBEDDINGS the stored vectors. Fields left out are
+    None in the result, documents can be fetched later with `get_documents`.
+    """
+
+    IDS = "ids"
+    METADATA = "metadata"
+    DOCUMENTS = "documents"
+    EMBEDDINGS = "embeddings"
+
+    def includes(self, level: "Projection") -> bool:
+        levels = list(Projection)
+        return levels.index(self) >= levels.index(Projection(level))
+
+
+def batch_filters(filters: dict | List[dict] | None, n: int) -> List[dict | None]:
+    """Expand the `filters` argument of `search_embeddings_batch` into one filter per query."""
+    if isinstance(filters, list):
+        if len(filters) != n:
+            raise ValueError(f"got {len(filters)} filters for {n} queries")
+        return filters
+    return [filters] * n
+
+
+def group_by_filter(filters: dict | List[dict] | None, n: int) -> List[Tuple[dict | None, List[int]]]:
+    """Group the indexes of a batch of n queries by their filter."""
+    groups = {}
+    for i, query_filters in enumerate(batch_filters(filters, n)):
+        key = json.dumps(query_filters, sort_keys=True, default=str)
+        groups.setdefault(key, (query_filters, []))[1].append(i)
+    return list(groups.values())
+
+
 class DBConfig(ABC, BaseModel):
     """DBConfig contains the connection info of vector database
 
@@ -88,6 +127,38 @@ class VectorDB(ABC):
             **kwargs(Any): vector database specific parameters.
         """
 
+    def max_insert_batch_size(self) -> Optional[int]:
+        """Largest number of embeddings accepted by one insert_embeddings call, None when unlimited."""
+        return None
+
+    def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert the embeddings, replacing the vector, document and metadata of ids that already exist.
+
+        Args:
+            ids(List[str]): list of document ids.
+            embeddings(List[List[float]]): list of embedding to add to the vector database.
+            metadatas(List[dict]): Optional list of metadatas associated with the texts.
+            documents(List[str]): list of texts to add to the vectorstore.
+            **kwargs(Any): vector database specific parameters.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can not upsert embeddings")
+
+    def delete_embeddings(self, ids: List[str], **kwargs: Any) -> None:
+        """Delete the documents of the given ids, missing ids are ignored.
+
+        Args:
+            ids(List[str]): list of document ids.
+            **kwargs(Any): vector database specific parameters.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can not delete embeddings")
+
     @abstractmethod
     def search_embedding(
         self,
@@ -102,8 +173,178 @@ class VectorDB(ABC):
             query(list[float]): query embedding to look up documents similar to.
             k(int): Number of most similar embeddings to return. Defaults to 100.
             filters(dict, optional): filtering expression to filter the data while searching.
-            **kwargs(Any): vector database specific parameters.
+            **kwargs(Any): vector database specific parameters, `projection` (see Projection) selects the returned fields.
 
         Returns:
             list[EmbeddingSearchResult]: list of k most similar EmbeddingSearchResults to the query embedding.
         """
+
+    def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 100,
+        filters: dict | List[dict] | None = None,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Get the k most similar embeddings of each query vector.
+
+        The default implementation calls `search_embedding` once per query, databases
+        able to answer several queries in one round trip should override it.
+
+        Args:
+            queries(np.ndarray): (n, dim) matrix of query embeddings.
+            k(int): Number of most similar embeddings to return per query. Defaults to 100.
+            filters(dict | list[dict], optional): filter applied to every query, or one filter per query.
+            **kwargs(Any): vector database specific parameters.
+
+        Returns:
+            list[EmbeddingSearchResult]: one result per query, in the same order as `queries`.
+        """
+        return [
+            self.search_embedding(query, k=k, filters=query_filters, **kwargs)
+            for query, query_filters in zip(queries, batch_filters(filters, len(queries)))
+        ]
+
+    def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, e.g. to fetch the text of results searched with `Projection.IDS`.
+
+        Args:
+            ids(List[str]): document ids
+
+        Returns:
+            list[str]: one document per id, in the same order, None for missing ids or documents.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can not fetch documents by id")
+
+    def wait_for_indexed(self, timeout: float = 3600, min_documents: Optional[int] = None, **kwargs: Any) -> None:
+        """Wait until every inserted embedding is searchable.
+
+        Databases indexing in the background (e.g. RediSearch) return from insert_embeddings
+        before the index is complete. The default implementation returns at once, for
+        databases indexing synchronously.
+
+        Args:
+            timeout(float): seconds to wait before raising TimeoutError
+            min_documents(int): also wait until the database holds this many documents, when it can count them
+            **kwargs(Any): vector database specific parameters.
+        """
+
+    def close(self) -> None:
+        """Release the connections and threads held by the client, it can not be used afterwards."""
+
+
+class AsyncVectorDB(ABC):
+    """asyncio counterpart of VectorDB.
+
+    A single event loop can keep thousands of insert_embeddings/search_embedding calls
+    in flight without one OS thread per call. Connections are bound to the event loop
+    that first uses them, call `close` from that same loop when done.
+
+    Examples:
+        >>> redis = AsyncRedis()
+        >>> await redis.insert_embeddings(ids, embeddings)
+        >>> await redis.search_embedding(query)
+        >>> await redis.close()
+    """
+
+    @abstractmethod
+    def __init__(
+        self,
+        database_name: str,
+        vector_dimension: int,
+        db_config: Optional[DBConfig] = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        Initalizes the AsyncVectorDB
+
+        Args:
+            database_name (str): The name of the vector database.
+            vector_dimension (int): The dimensionality of the vectors.
+            db_config (Optional[DBConfig]): Configuration for the vector database.
+            **kwargs (Any): Additional keyword arguments for vector database initialization.
+        """
+
+    @abstractmethod
+    async def insert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert the embeddings to the vector database.
+
+        Args:
+            ids(List[str]): list of document ids.
+            embeddings(List[List[float]]): list of embedding to add to the vector database.
+            metadatas(List[dict]): Optional list of metadatas associated with the texts.
+            documents(List[str]): list of texts to add to the vectorstore.
+            **kwargs(Any): vector database specific parameters.
+        """
+
+    @abstractmethod
+    async def search_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+        **kwargs: Any,
+    ) -> EmbeddingSearchResult:
+        """Get k most similar embeddings to query vector.
+
+        Args:
+            query(list[float]): query embedding to look up documents similar to.
+            k(int): Number of most similar embeddings to return. Defaults to 100.
+            filters(dict, optional): filtering expression to filter the data while searching.
+            **kwargs(Any): vector database specific parameters.
+
+        Returns:
+            EmbeddingSearchResult: k most similar embeddings to the query embedding.
+        """
+
+    async def search_embeddings_batch(
+        self,
+        queries: np.ndarray | List[List[float]],
+        k: int = 100,
+        filters: dict | List[dict] | None = None,
+        **kwargs: Any,
+    ) -> List[EmbeddingSearchResult]:
+        """Get the k most similar embeddings of each query vector, see `VectorDB.search_embeddings_batch`.
+
+        The default implementation runs one `search_embedding` per query concurrently.
+        """
+        return list(
+            await asyncio.gather(
+                *[
+                    self.search_embedding(query, k=k, filters=query_filters, **kwargs)
+                    for query, query_filters in zip(queries, batch_filters(filters, len(queries)))
+                ]
+            )
+        )
+
+    async def upsert_embeddings(
+        self,
+        ids: list[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadata: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Insert the embeddings, replacing the ids that already exist, see `VectorDB.upsert_embeddings`."""
+        raise NotImplementedError(f"{type(self).__name__} can not upsert embeddings")
+
+    async def delete_embeddings(self, ids: List[str], **kwargs: Any) -> None:
+        """Delete the documents of the given ids, see `VectorDB.delete_embeddings`."""
+        raise NotImplementedError(f"{type(self).__name__} can not delete embeddings")
+
+    async def get_documents(self, ids: List[str]) -> List[Optional[str]]:
+        """Documents stored for the given ids, see `VectorDB.get_documents`."""
+        raise NotImplementedError(f"{type(self).__name__} can not fetch documents by id")
+
+    async def wait_for_indexed(self, timeout: float = 3600, min_documents: Optional[int] = None, **kwargs: Any) -> None:
+        """Wait until every inserted embedding is searchable, see `VectorDB.wait_for_indexed`."""
+
+    async def close(self) -> None:
+        """Release the connections held by the client."""